@@ -3,28 +3,50 @@ Movieflix app as a web service.
 
 API endpoints:
 Users:
-GET /api/users: List all users.
+GET /api/users: List users, one page at a time.
 POST /api/users: Add a new user.
 GET /api/users/<user_id>/movies: List a user’s favorite movies.
+GET /api/users/<user_id>/recommendations: Movies similar to a user's favourites.
 POST /api/users/<user_id>/movies/<movie_id>: Add a new favorite movie for a user.
+POST /api/users/<user_id>/movies: Add many favorite movies for a user in one transaction.
 DELETE /api/users/movies/<user_movie_id>: Delete a favorite movie for a user.
+DELETE /api/users/<user_id>/movies: Delete many favorite movies of a user in one transaction.
+POST /api/users/<user_id>/reviews: Add many movie reviews by a user in one transaction.
 
 Movies:
-GET /api/movies: List all movies.
+GET /api/movies: List movies, one page at a time, with filters.
+GET /api/movies/search?q=: Full-text search of movies, best match first.
+GET /api/movies/top?by=user_rating&limit=: Top movies by users' average rating.
 POST /api/movies: Add a new movie.
+POST /api/movies/bulk: Import movies from a CSV / JSONL file or a list of names.
+GET /api/movies/enrichment_jobs/<int:job_id>: Status of a movie's OMDb enrichment.
 PUT /api/movies/update_movie/<int:movie_id>: Update a movie.
 DELETE /api/movies/delete_movie/<int:movie_id>: Delete a movie.
-GET /movies/<int:movie_id>/reviews: List all movie reviews for a movie
+GET /movies/<int:movie_id>/reviews: List a movie's reviews, one page at a time
 POST /users/<int:user_id>/add_movie_review/<int:movie_id>: Add a movie review for a movie
+
+Cache:
+GET /api/cache/stats: Entity cache hit/miss counters.
+GET /api/omdb/cache/stats: OMDb responses cache counters.
+GET /api/omdb/stats: OMDb client latency and error metrics.
 """
+import io
+
 import requests
-from flask import Blueprint, jsonify, g, request
+from flask import Blueprint, jsonify, g, request, current_app
+
+from http_cache import conditional_get
+from json_stream import stream_items, wants_stream
+from movie_import import import_movies, read_titles, DEFAULT_BATCH_SIZE
+from omdb_client import omdb_client, fetch_movie_api_response, format_movie_info, \
+    get_empty_info
+from request_args import get_page_args, get_movies_page_args, get_search_args, \
+    get_top_movies_args, get_recommendations_args, isnumber, USERS_SORT_FIELDS, \
+    REVIEWS_SORT_FIELDS
 
 api = Blueprint('api', __name__)
 
-API_KEY = 'd5a88f10'
-BASE_URL_KEY = f'http://www.omdbapi.com/?apikey={API_KEY}'
-IMDB_BASE_URL = 'https://www.imdb.com/title/'
+MAX_BATCH_ITEMS = 500  # items per batch request, one IN (...) list
 
 
 def jsonify_error_message(message, code: int):
@@ -39,18 +61,33 @@ def jsonify_error_message(message, code: int):
 
 
 @api.route('/users', methods=['GET'])
+@conditional_get('users')
 def get_users():
     """
-    Return all the users
+    Return a page of users
+    query string: limit, cursor, sort (id | user_name), order (asc | desc),
+                  stream=1 for all the users as a streamed response
     :returns
-        List of Users dictionary |
+        Users page {"users": List of Users dictionary,
+                    "next_cursor": str | null} |
+        Streamed users (JSON or NDJSON) |
         Error Message
     """
-    users = g.users_data_manager.get_all_users()
-    if users is None:
+    page_args = get_page_args(request.args, USERS_SORT_FIELDS)
+    if isinstance(page_args, list):
+        return jsonify_error_message(page_args, 400)
+
+    if wants_stream():
+        return stream_items(g.users_data_manager.iter_users(page_args['sort_by'],
+                                                            page_args['descending']),
+                            'users')
+
+    users_page = g.users_data_manager.get_users_page(**page_args)
+    if users_page is None:
         return jsonify_error_message("Users not found.", 404)
 
-    return jsonify(users), 200  # ok
+    users, next_cursor = users_page
+    return jsonify({"users": users, "next_cursor": next_cursor}), 200  # ok
 
 
 def validate_user_input(user_info: dict) -> list:
@@ -97,6 +134,7 @@ def add_user():
 
 
 @api.route('/users/<int:user_id>/movies', methods=['GET'])
+@conditional_get('user_movies')
 def get_user_movies(user_id: int):
     """
     Get user movies given user id
@@ -113,6 +151,33 @@ def get_user_movies(user_id: int):
     return jsonify(user['movies']), 200
 
 
+@api.route('/users/<int:user_id>/recommendations', methods=['GET'])
+@conditional_get('recommendations')
+def get_user_recommendations(user_id: int):
+    """
+    Get the movies most similar to a user's favourites,
+    that the user has not favourited yet
+    query string: limit
+    :param user_id: int
+    :return:
+        {"movies": List of Movies dictionary with their score} |
+        Error Message
+    """
+    recommendations_args = get_recommendations_args(request.args)
+    if isinstance(recommendations_args, list):
+        return jsonify_error_message(recommendations_args, 400)
+
+    user = g.users_data_manager.get_user(user_id)
+    if user is None:
+        return jsonify_error_message("User not found.", 404)
+
+    movies = g.recommendations.get_user_recommendations(user_id, **recommendations_args)
+    if movies is None:
+        return jsonify_error_message("Cannot get recommendations.", 500)
+
+    return jsonify({"movies": movies}), 200
+
+
 @api.route('/users/<int:user_id>/movies/<int:movie_id>', methods=['POST'])
 def add_user_movie(user_id: int, movie_id: int):
     """
@@ -133,15 +198,156 @@ def add_user_movie(user_id: int, movie_id: int):
     if user is None:
         return jsonify_error_message("User not found.", 404)
 
-    if movie_id in [user_movie['id'] for user_movie in user['movies']]:
+    added = g.users_movies_data_manager.add_user_movie(user_movie_info)
+    if added is False:  # (user_id, movie_id) unique constraint
         return jsonify_error_message("Cannot add movie as its already added.", 400)
 
-    if g.users_movies_data_manager.add_user_movie(user_movie_info) is None:
+    if added is None:
         return jsonify_error_message("Cannot add movie.", 500)  # server error
 
     return jsonify({"message": "Movie successfully added to user."}), 201  # created
 
 
+def get_batch_args(body, key: str) -> dict | list:
+    """
+    Validates the items list of a batch request body {key: [...]}
+    :param body: request JSON
+    :param key: str
+    :return:
+        batch arguments (dict) |
+        error messages (list)
+    """
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list) or len(items) == 0:
+        return [f'Expected a JSON body {{"{key}": [...]}} with at least one item.']
+    if len(items) > MAX_BATCH_ITEMS:
+        return [f'At most {MAX_BATCH_ITEMS} items per request.']
+    return {key: items}
+
+
+def is_id(value) -> bool:
+    """
+    Check if a JSON value is an integer id
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def batch_report(movie_ids: list, errors: list, results: list,
+                 done_key: str, messages: dict) -> dict:
+    """
+    Merge the validation errors and the write results
+    into the per item report of a batch request
+    :param movie_ids: list
+    :param errors: validation error message or None, per movie (list)
+    :param results: write results of the movies without error (list)
+    :param done_key: 'added' | 'deleted'
+    :param messages: error message of a False / None write result (dict)
+    :return:
+        {done_key: int, "results": [{"movie_id", done_key, "error"}]} (dict)
+    """
+    results = iter(results)
+    report = []
+    for movie_id, error in zip(movie_ids, errors):
+        if error is None:
+            result = next(results)
+            error = None if result else messages[result]
+        item = {'movie_id': movie_id, done_key: error is None}
+        if error is not None:
+            item['error'] = error
+        report.append(item)
+    return {done_key: sum(item[done_key] for item in report), 'results': report}
+
+
+def get_movie_ids_errors(movie_ids: list, invalid: dict) -> list:
+    """
+    Return the validation error of each movie of a batch:
+    the first movie id check it fails or a repeated movie id
+    :param movie_ids: list
+    :param invalid: error message -> movie ids failing the check (dict)
+    :return:
+        error message or None, per movie (list)
+    """
+    errors, seen = [], set()
+    for movie_id in movie_ids:
+        error = 'Duplicate movie in the request.' if movie_id in seen else None
+        for message, failing_ids in invalid.items():
+            if error is None and movie_id in failing_ids:
+                error = message
+        errors.append(error)
+        seen.add(movie_id)
+    return errors
+
+
+@api.route('/users/<int:user_id>/movies', methods=['POST'])
+def add_user_movies(user_id: int):
+    """
+    Add many favourite movies to a user,
+    validated with one query per check
+    and inserted in one transaction
+    body: {"movie_ids": [int, ...]}
+    :param user_id: int
+    :return:
+        {"added": int, "results": [{"movie_id", "added", "error"}]} |
+        Error message
+    """
+    batch_args = get_batch_args(request.get_json(silent=True), 'movie_ids')
+    if isinstance(batch_args, list):
+        return jsonify_error_message(batch_args, 400)
+    movie_ids = batch_args['movie_ids']
+    if not all(is_id(movie_id) for movie_id in movie_ids):
+        return jsonify_error_message("Movie ids must be integers.", 400)
+
+    user = g.users_data_manager.get_user(user_id)
+    if user is None:
+        return jsonify_error_message("User not found.", 404)
+
+    existing = g.movies_data_manager.get_existing_movie_ids(movie_ids)
+    favourites = g.users_movies_data_manager.get_favourite_ids(user_id, movie_ids)
+    if existing is None or favourites is None:
+        return jsonify_error_message("Cannot add movies.", 500)
+
+    errors = get_movie_ids_errors(movie_ids, {
+        "Movie not found.": set(movie_ids) - existing,
+        "Cannot add movie as its already added.": favourites})
+    valid = [movie_id for movie_id, error in zip(movie_ids, errors) if error is None]
+    results = g.users_movies_data_manager.add_user_movies(user_id, valid)
+
+    return jsonify(batch_report(movie_ids, errors, results, 'added',
+                                {False: "Cannot add movie as its already added.",
+                                 None: "Cannot add movie."})), 200
+
+
+@api.route('/users/<int:user_id>/movies', methods=['DELETE'])
+def delete_user_movies(user_id: int):
+    """
+    Delete many fav movies of a user in one transaction
+    body: {"movie_ids": [int, ...]}
+    :param user_id: int
+    :return:
+        {"deleted": int, "results": [{"movie_id", "deleted", "error"}]} |
+        Error message
+    """
+    batch_args = get_batch_args(request.get_json(silent=True), 'movie_ids')
+    if isinstance(batch_args, list):
+        return jsonify_error_message(batch_args, 400)
+    movie_ids = batch_args['movie_ids']
+    if not all(is_id(movie_id) for movie_id in movie_ids):
+        return jsonify_error_message("Movie ids must be integers.", 400)
+
+    user = g.users_data_manager.get_user(user_id)
+    if user is None:
+        return jsonify_error_message("User not found.", 404)
+
+    errors = get_movie_ids_errors(movie_ids, {})
+    valid = [movie_id for movie_id, error in zip(movie_ids, errors) if error is None]
+    results = g.users_movies_data_manager.delete_user_movies(user_id, valid)
+    if results is None:
+        return jsonify_error_message("Cannot delete movies.", 500)
+
+    return jsonify(batch_report(movie_ids, errors, results, 'deleted',
+                                {None: "User Movie not found."})), 200
+
+
 @api.route('/users/movies/<int:user_movie_id>', methods=['DELETE'])
 def delete_user_movie(user_movie_id: int):
     """
@@ -163,28 +369,78 @@ def delete_user_movie(user_movie_id: int):
 
 
 @api.route('/movies', methods=['GET'])
+@conditional_get('movies')
 def get_movies():
     """
-    Get all the movies from the movies table
+    Get a page of movies from the movies table
+    query string: limit, cursor,
+                  sort (id | movie_name | year | rating), order (asc | desc),
+                  min_year, max_year, min_rating, director,
+                  stream=1 for all the movies as a streamed response
+    :returns
+        Movies page {"movies": List of Movies dictionary,
+                     "next_cursor": str | null} |
+        Streamed movies (JSON or NDJSON) |
+        Error Message
+    """
+    page_args = get_movies_page_args(request.args)
+    if isinstance(page_args, list):
+        return jsonify_error_message(page_args, 400)
+
+    if wants_stream():
+        return stream_items(g.movies_data_manager.iter_movies(page_args['filters'],
+                                                              page_args['sort_by'],
+                                                              page_args['descending']),
+                            'movies')
+
+    movies_page = g.movies_data_manager.get_movies_page(**page_args)
+    if movies_page is None:
+        return jsonify_error_message("Movies not found.", 404)
+
+    movies, next_cursor = movies_page
+    return jsonify({"movies": movies, "next_cursor": next_cursor}), 200
+
+
+@api.route('/movies/top', methods=['GET'])
+@conditional_get('movies')
+def get_top_movies():
+    """
+    Get the top movies, without their reviews
+    query string: by (user_rating | review_count | rating), limit, min_reviews
+    :returns
+        {"movies": List of Movies dictionary} |
+        Error Message
     """
-    movies = g.movies_data_manager.get_movies()
+    top_args = get_top_movies_args(request.args)
+    if isinstance(top_args, list):
+        return jsonify_error_message(top_args, 400)
+
+    movies = g.movies_data_manager.get_top_movies(**top_args)
     if movies is None:
         return jsonify_error_message("Movies not found.", 404)
 
-    return jsonify(movies), 200
+    return jsonify({"movies": movies}), 200
 
 
-def fetch_movie_api_response(title: str) -> dict:
+@api.route('/movies/search', methods=['GET'])
+@conditional_get('movies')
+def search_movies():
     """
-    Fetch api response movie info
-    given movie title
-    :param title: str
-    :return: movie info (dict)
+    Search movies by name, director and review text
+    query string: q, the last word matches as a prefix, limit
+    :returns
+        {"movies": List of Movies dictionary, best match first} |
+        Error Message
     """
-    response = requests.get(f'{BASE_URL_KEY}&t={title}', timeout=5)
-    response.raise_for_status()  # check if there was an error with the request
+    search_args = get_search_args(request.args)
+    if isinstance(search_args, list):
+        return jsonify_error_message(search_args, 400)
+
+    movies = g.movies_data_manager.search_movies(**search_args)
+    if movies is None:
+        return jsonify_error_message("Search is not available.", 500)
 
-    return response.json()
+    return jsonify({"movies": movies}), 200
 
 
 def isfloat(number: str) -> bool:
@@ -226,10 +482,10 @@ def get_error_messages(movie_info: dict) -> list:
         error_messages.append('Director name must start with letter')
 
     if len(year) != 0:
-        if not year.isdigit():
+        if not isnumber(year):
             error_messages.append('Year must be number')
 
-        if year.isdigit() and len(year) != 4:
+        if isnumber(year) and len(year) != 4:
             error_messages.append('Year must be 4 digits')
 
     if len(rating) != 0:
@@ -241,37 +497,21 @@ def get_error_messages(movie_info: dict) -> list:
     return error_messages
 
 
-def format_movie_info(response: dict, movie_name: str) -> dict:
+def fetch_movie_info(movie_name: str) -> dict:
     """
-    Format movie info
-    :param response: dict
+    Fetch and format a movie info from OMDb API
     :param movie_name: str
     :return:
         movie info (dict)
+    :raises:
+        ValueError for an invalid movie name or OMDb response,
+        requests.exceptions.RequestException for request errors
     """
-    return {'movie_name': response.get('Title', movie_name),
-            'director': response.get('Director', ''),
-            'year': int(response.get('Year', '0000')[:4]),
-            'rating': float(response.get('imdbRating', 0.0)),
-            'poster': response.get('Poster', ''),
-            'website': IMDB_BASE_URL + response.get('imdbID', '')
-            }
+    error_messages = get_error_messages({'movie_name': movie_name})
+    if error_messages:
+        raise ValueError(', '.join(error_messages))
 
-
-def get_empty_info(movie_name: str) -> dict:
-    """
-    Return empty movie info
-    :param movie_name: str
-    :return:
-        empty movie info (dict)
-    """
-    return {'movie_name': movie_name,
-            'director': '',
-            'year': 0,
-            'rating': 0.0,
-            'poster': '',
-            'website': ''
-            }
+    return format_movie_info(fetch_movie_api_response(movie_name), movie_name)
 
 
 def get_new_movie_info() -> dict | list:
@@ -311,17 +551,102 @@ def add_new_movie():
         Successfully added message |
         Error message
     """
+    if current_app.config['OMDB_ENRICHMENT_MODE'] == 'async':
+        return add_new_movie_async()
+
     new_movie_info = get_new_movie_info()
     if isinstance(new_movie_info, list):
         return jsonify_error_message(new_movie_info, 400)
 
-    if g.movies_data_manager.add_new_movie(new_movie_info) is None:
+    added = g.movies_data_manager.add_new_movie(new_movie_info)
+    if added is False:  # movie_name unique constraint
         return jsonify_error_message('Cannot add movie. '
-                                     'Movie already exist in the database.', 500)
+                                     'Movie already exist in the database.', 400)
+
+    if added is None:
+        return jsonify_error_message('Cannot add movie.', 500)
 
     return jsonify({'message': 'Movie is successfully added.'}), 201
 
 
+def add_new_movie_async():
+    """
+    Add a new movie with empty details right away
+    and queue the OMDb API lookup
+    :return:
+        Successfully added message with the enrichment job |
+        Error message
+    """
+    movie_name = request.json.get('movie_name', '')
+
+    error_messages = get_error_messages({'movie_name': movie_name})
+    if error_messages:
+        return jsonify_error_message(error_messages, 400)
+
+    movie_id = g.movies_data_manager.add_pending_movie(get_empty_info(movie_name))
+    if movie_id is False:  # movie_name unique constraint
+        return jsonify_error_message('Cannot add movie. '
+                                     'Movie already exist in the database.', 400)
+
+    if movie_id is None:
+        return jsonify_error_message('Cannot add movie.', 500)
+
+    job = g.enrichment_queue.enqueue(movie_id, movie_name)
+    return jsonify({'message': 'Movie is successfully added. '
+                               'Its details are being fetched.',
+                    'movie_id': movie_id,
+                    'enrichment_job': job}), 202  # accepted
+
+
+@api.route('/movies/enrichment_jobs/<int:job_id>', methods=['GET'])
+def get_enrichment_job(job_id: int):
+    """
+    Get the status of a movie enrichment job
+    :param job_id: int
+    :return:
+        Job {"id", "movie_id", "movie_name", "status",
+             "attempts", "next_attempt_at", "last_error"} |
+        Error message
+    """
+    job = g.enrichment_queue.get_job(job_id)
+    if job is None:
+        return jsonify_error_message('Enrichment job not found.', 404)
+
+    return jsonify(job), 200
+
+
+@api.route('/movies/bulk', methods=['POST'])
+def add_new_movies():
+    """
+    Import many movies in batched transactions,
+    from an uploaded CSV / JSONL "file"
+    or a JSON body {"movie_names": [...]}
+    query string: batch_size
+    :return:
+        Import report {"imported": int,
+                       "failed": [{"row", "movie_name", "error"}]} |
+        Error message
+    """
+    batch_size = request.args.get('batch_size', str(DEFAULT_BATCH_SIZE))
+    if not isnumber(batch_size) or int(batch_size) < 1:
+        return jsonify_error_message('Batch size must be a positive number.', 400)
+
+    if 'file' in request.files:
+        upload = request.files['file']
+        rows = read_titles(io.TextIOWrapper(upload.stream, encoding='utf-8'),
+                           upload.filename or '')
+    elif request.is_json and isinstance(request.json.get('movie_names'), list):
+        rows = ((row_number, movie_name if isinstance(movie_name, str) else None)
+                for row_number, movie_name in enumerate(request.json['movie_names'], start=1))
+    else:
+        return jsonify_error_message('Upload a CSV / JSONL file '
+                                     'or send a list of movie_names.', 400)
+
+    report = import_movies(rows, g.movies_data_manager, fetch_movie_info,
+                           batch_size=int(batch_size))
+    return jsonify(report), 200
+
+
 def get_movie_info() -> dict:
     """
     Get updated movie details
@@ -410,20 +735,41 @@ def delete_movie(movie_id: int):
 
 
 @api.route('/movies/<int:movie_id>/reviews', methods=['GET'])
+@conditional_get('movie_reviews')
 def get_movie_reviews(movie_id: int):
     """
-    Get all the movie's reviews
+    Get a page of the movie's reviews
     for that specific movie
     given movie_id
+    query string: limit, cursor, sort (id | rating), order (asc | desc),
+                  stream=1 for all the reviews as a streamed response
     :param movie_id: int
     :returns:
-        Movie reviews json(list[dict])
+        Movie reviews page {"movie_reviews": list[dict],
+                            "next_cursor": str | null} |
+        Streamed movie reviews (JSON or NDJSON) |
+        Error Message
     """
-    movie = g.movies_data_manager.get_movie(movie_id)
+    page_args = get_page_args(request.args, REVIEWS_SORT_FIELDS)
+    if isinstance(page_args, list):
+        return jsonify_error_message(page_args, 400)
+
+    movie = g.movies_data_manager.get_movie_summary(movie_id)
     if movie is None:
         return jsonify_error_message("Movie not found.", 404)
 
-    return jsonify(movie["movie_reviews"]), 200  # ok
+    if wants_stream():
+        return stream_items(g.movies_reviews_data_manager.
+                            iter_movie_reviews(movie_id, page_args['sort_by'],
+                                               page_args['descending']),
+                            'movie_reviews')
+
+    reviews_page = g.movies_reviews_data_manager.get_movie_reviews_page(movie_id, **page_args)
+    if reviews_page is None:
+        return jsonify_error_message("Movie reviews not found.", 404)
+
+    movie_reviews, next_cursor = reviews_page
+    return jsonify({"movie_reviews": movie_reviews, "next_cursor": next_cursor}), 200  # ok
 
 
 def get_error_message(user_id: int, movie_id: int):
@@ -442,15 +788,9 @@ def get_error_message(user_id: int, movie_id: int):
     if not movie:
         return jsonify_error_message("Movie not found.", 404)
 
-    user_movies = user.get('movies')
-    if movie_id not in [user_movie['id'] for user_movie in user_movies]:
+    if not g.users_movies_data_manager.is_favourite(user_id, movie_id):
         return jsonify_error_message("User not favourite this movie cannot make review.", 404)
 
-    movie_reviews = movie["movie_reviews"]
-    movie_reviews_user_ids = [movie_review["user_id"] for movie_review in movie_reviews]
-    if user_id in movie_reviews_user_ids:
-        return jsonify_error_message("Cannot add review as its already added.", 400)
-
     return False
 
 
@@ -476,11 +816,113 @@ def add_movie_review(user_id: int, movie_id: int):
     :param user_id: int
     :param movie_id: int
     """
-    if get_error_message(user_id, movie_id):
-        return get_error_message(user_id, movie_id)
+    error_message = get_error_message(user_id, movie_id)
+    if error_message:
+        return error_message
+
+    added = g.movies_reviews_data_manager.add_movie_review(get_reviewed_info(user_id, movie_id))
+    if added is False:  # (user_id, movie_id) unique constraint
+        return jsonify_error_message("Cannot add review as its already added.", 400)
 
-    if g.movies_reviews_data_manager. \
-            add_movie_review(get_reviewed_info(user_id, movie_id)) is None:
+    if added is None:
         return jsonify_error_message("Cannot add review.", 500)  # server error
 
     return jsonify({"message": "Movie review successfully added for this user."}), 201  # created
+
+
+def get_review_errors(review) -> str | None:
+    """
+    Return the error of a review item of a batch
+    :param review: JSON value
+    :return:
+        error message (str) |
+        None when valid
+    """
+    if not isinstance(review, dict) or not is_id(review.get('movie_id')):
+        return 'Each review needs an integer "movie_id".'
+
+    rating = review.get('rating', 0.0)
+    if isinstance(rating, bool) or not isinstance(rating, (int, float)) \
+            or not 0.0 <= rating <= 10.0:
+        return 'Rating must be a number from 0 to 10.'
+
+    if not isinstance(review.get('review_text', ''), str):
+        return 'Review text must be a string.'
+    return None
+
+
+@api.route('/users/<int:user_id>/reviews', methods=['POST'])
+def add_movie_reviews(user_id: int):
+    """
+    Add many movie reviews by a user,
+    validated with one query per check
+    and inserted in one transaction
+    body: {"reviews": [{"movie_id": int, "rating": float, "review_text": str}, ...]}
+    :param user_id: int
+    :return:
+        {"added": int, "results": [{"movie_id", "added", "error"}]} |
+        Error message
+    """
+    batch_args = get_batch_args(request.get_json(silent=True), 'reviews')
+    if isinstance(batch_args, list):
+        return jsonify_error_message(batch_args, 400)
+    reviews = batch_args['reviews']
+    review_errors = [get_review_errors(review) for review in reviews]
+    if any(review_errors):
+        return jsonify_error_message([error for error in review_errors if error], 400)
+
+    user = g.users_data_manager.get_user(user_id)
+    if user is None:
+        return jsonify_error_message("User not found.", 404)
+
+    movie_ids = [review['movie_id'] for review in reviews]
+    favourites = g.users_movies_data_manager.get_favourite_ids(user_id, movie_ids)
+    reviewed = g.movies_reviews_data_manager.get_reviewed_movie_ids(user_id, movie_ids)
+    if favourites is None or reviewed is None:
+        return jsonify_error_message("Cannot add reviews.", 500)
+
+    errors = get_movie_ids_errors(movie_ids, {
+        "User not favourite this movie cannot make review.": set(movie_ids) - set(favourites),
+        "Cannot add review as its already added.": reviewed})
+    results = g.movies_reviews_data_manager.add_movie_reviews(
+        [{'user_id': user_id,
+          'movie_id': review['movie_id'],
+          'rating': review.get('rating', 0.0),
+          'review_text': review.get('review_text', '')}
+         for review, error in zip(reviews, errors) if error is None])
+
+    return jsonify(batch_report(movie_ids, errors, results, 'added',
+                                {False: "Cannot add review as its already added.",
+                                 None: "Cannot add review."})), 200
+
+
+@api.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Return the entity cache counters
+    :return:
+        hits, misses, evictions, size, max_size, ttl (json)
+    """
+    return jsonify(g.entity_cache.stats()), 200
+
+
+@api.route('/omdb/cache/stats', methods=['GET'])
+def get_omdb_cache_stats():
+    """
+    Return the OMDb responses cache counters
+    :return:
+        hits, negative_hits, misses, stale_served, offline_misses,
+        entries, negative_entries, ttl, negative_ttl, cache_only (json)
+    """
+    return jsonify(g.omdb_cache.stats()), 200
+
+
+@api.route('/omdb/stats', methods=['GET'])
+def get_omdb_stats():
+    """
+    Return the OMDb client metrics
+    :return:
+        requests, errors, retries, latency totals
+        and cumulative latency buckets (json)
+    """
+    return jsonify(omdb_client.stats()), 200
@@ -4,15 +4,27 @@ Using
 Users Blueprint
 Movies Blueprint
 API Blueprint for webservice
+
+create_app builds the app, its data managers and caches.
+`python app.py` runs the development server, wsgi.py
+is the entry point of a multi-process WSGI server (gunicorn.conf.py).
 """
+import json
 import os
+import weakref
 
+import click
 from flask import Flask, render_template, g
 from flask_cors import CORS
 
 from users_routes import users_bp
 from movies_routes import movies_bp
-from api import api
+from api import api, fetch_movie_info
+from omdb_cache import OMDbCache
+from omdb_client import omdb_client
+from enrichment_queue import EnrichmentQueue
+from movie_import import import_movies, read_titles, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
+from config import Config, get_engine_options
 
 from data_manager.data_models import User, Movie, UserMovie, MovieReview, db
 from data_manager.users import Users
@@ -20,44 +32,204 @@ from data_manager.movies import Movies
 from data_manager.users_movies import UsersMovies
 from data_manager.movies_reviews import MoviesReviews
 from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.migrations import upgrade_schema
+from data_manager.cache_backends import create_cache
+from data_manager.resource_versions import ResourceVersions, DatabaseResourceVersions
+from data_manager.recommendations import Recommendations
+from data_manager.sqlite_pragmas import set_sqlite_pragmas
+from data_manager.replicas import ReplicaRouter
+from data_manager.request_metrics import RequestMetrics
+from data_manager.user_profiles import UserProfiles
 
-app = Flask(__name__)
-app.app_context()
-
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + \
-                                        os.path.join(basedir, 'data/movieflix.sqlite')
+# entities of the entity cache embedding the rows of each table,
+# evicted when another process writes to it
+TABLE_CACHE_ENTITIES = {
+    'users': ('users',),
+    'movies': ('movies',),  # and the users embedding them, by dependency
+    'users_movies': ('users',),
+    'movies_reviews': ('movies',),
+    'user_profiles': ('users',),
+}
 
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+# engines of every created app, disposed in forked children by one at-fork hook;
+# weakly held so the registry does not keep a discarded app's engines alive
+forked_engines = weakref.WeakSet()
 
-users_data_manager = Users(SQLiteDataManager('id', User, db))
-movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
-users_movies_data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db))
-movies_reviews_data_manager = MoviesReviews(SQLiteDataManager('id', MovieReview, db))
 
-app.register_blueprint(users_bp)
-app.register_blueprint(movies_bp)
-app.register_blueprint(api, url_prefix='/api')
+def dispose_forked_engines():
+    """
+    A worker forked after start up (gunicorn preload_app)
+    opens its own connections instead of sharing the parent's
+    """
+    for engine in list(forked_engines):
+        engine.dispose(close=False)
 
 
-CORS(app)
+os.register_at_fork(after_in_child=dispose_forked_engines)
 
 
-@app.before_request
-def before_request():
+def create_app(config: object | dict | None = None) -> Flask:
     """
-    Creating data managers for global uses
-    before each request
+    Create the app: open the database, upgrade its schema,
+    build the caches and data managers and register
+    the blueprints and CLI commands
+    :param config: object (e.g. config.WSGIConfig) or dict
+        loaded over Config | None
+    :return:
+        Flask
     """
-    g.users_data_manager = users_data_manager
-    g.movies_data_manager = movies_data_manager
-    g.users_movies_data_manager = users_movies_data_manager
-    g.movies_reviews_data_manager = movies_reviews_data_manager
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+        if 'SQLALCHEMY_DATABASE_URI' in config and 'SQLALCHEMY_ENGINE_OPTIONS' not in config:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = \
+                get_engine_options(config['SQLALCHEMY_DATABASE_URI'])
+    elif config is not None:
+        app.config.from_object(config)
+
+    db.init_app(app)
+    replica_router = ReplicaRouter(db)
+    replica_router.init_app(app)
+    if app.config['RESOURCE_VERSIONS'] == 'database':
+        resource_versions = DatabaseResourceVersions(db)
+    else:
+        resource_versions = ResourceVersions()
+    recommendations = Recommendations(db, versions=resource_versions)
+    user_profiles = UserProfiles(db, replica_router, resource_versions)
+    with app.app_context():
+        set_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        db.create_all()
+        upgrade_schema(db)
+        if isinstance(resource_versions, DatabaseResourceVersions):
+            resource_versions.init_app(app)
+        recommendations.ensure_built()
+        user_profiles.ensure_built()
+        if app.config['REQUEST_METRICS']:
+            RequestMetrics().init_app(app, [db.engine, *replica_router.engines])
+        forked_engines.update([db.engine, *replica_router.engines])
+
+    entity_cache = create_cache(app.config['CACHE_BACKEND'], 'entity_cache', 4096, 300.0,
+                                app.config['CACHE_PATH'])
+    page_cache = None
+    if app.config['PAGE_CACHE_SIZE'] > 0:
+        page_cache = create_cache(app.config['CACHE_BACKEND'], 'page_cache',
+                                  app.config['PAGE_CACHE_SIZE'], 300.0, app.config['CACHE_PATH'])
+
+    if isinstance(resource_versions, DatabaseResourceVersions):
+        def written_elsewhere(table: str, written_at: float):
+            """
+            Another process wrote to table: read the primary
+            during the replica lag and evict the cached rows of table
+            from this process's cache. A shared cache is already evicted,
+            the pages are cached by ETag.
+            """
+            replica_router.mark_written_at(written_at)
+            if app.config['CACHE_BACKEND'] == 'memory':
+                for entity in TABLE_CACHE_ENTITIES.get(table, ()):
+                    entity_cache.invalidate_entity(entity)
+
+        resource_versions.subscribe(written_elsewhere)
+
+    users_data_manager = Users(SQLiteDataManager('id', User, db, resource_versions,
+                                                 replica_router),
+                               entity_cache, recommendations, user_profiles)
+    movies_data_manager = Movies(SQLiteDataManager('id', Movie, db, resource_versions,
+                                                   replica_router),
+                                 entity_cache, user_profiles)
+    users_movies_data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db,
+                                                              resource_versions, replica_router),
+                                            entity_cache, recommendations, user_profiles)
+    movies_reviews_data_manager = MoviesReviews(SQLiteDataManager('id', MovieReview, db,
+                                                                  resource_versions,
+                                                                  replica_router),
+                                                entity_cache, recommendations)
+    omdb_cache = OMDbCache(app.config['OMDB_CACHE_PATH'], app.config['OMDB_CACHE_TTL'],
+                           app.config['OMDB_CACHE_NEGATIVE_TTL'], app.config['OMDB_CACHE_ONLY'])
+    omdb_client.use_cache(omdb_cache)
+    enrichment_queue = EnrichmentQueue(app, db, movies_data_manager, fetch_movie_info)
+    if app.config['ENRICHMENT_QUEUE_START']:
+        enrichment_queue.start()
+
+    # the g attributes of each request, in app.extensions for scripts
+    services = {
+        'users_data_manager': users_data_manager,
+        'movies_data_manager': movies_data_manager,
+        'users_movies_data_manager': users_movies_data_manager,
+        'movies_reviews_data_manager': movies_reviews_data_manager,
+        'entity_cache': entity_cache,
+        'enrichment_queue': enrichment_queue,
+        'resource_versions': resource_versions,
+        'page_cache': page_cache,
+        'recommendations': recommendations,
+        'omdb_cache': omdb_cache,
+    }
+    app.extensions['movieflix'] = services
+
+    app.register_blueprint(users_bp)
+    app.register_blueprint(movies_bp)
+    app.register_blueprint(api, url_prefix='/api')
+
+    CORS(app)
+
+    @app.before_request
+    def before_request():
+        """
+        Creating data managers for global uses
+        before each request
+        """
+        for name, service in services.items():
+            setattr(g, name, service)
+
+    @app.cli.command('import-movies')
+    @click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True,
+                  help='Movies inserted per transaction.')
+    @click.option('--workers', default=DEFAULT_WORKERS, show_default=True,
+                  help='Concurrent OMDb lookups.')
+    def import_movies_command(file_path: str, batch_size: int, workers: int):
+        """
+        Import movies from a CSV or JSONL file of movie names
+        """
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            report = import_movies(read_titles(file, file_path), movies_data_manager,
+                                   fetch_movie_info, batch_size, workers)
+        print(json.dumps(report, indent=2))
+
+    @app.cli.command('rebuild-recommendations')
+    def rebuild_recommendations_command():
+        """
+        Recompute the neighbours of every movie
+        """
+        print(f'stored {recommendations.rebuild()} movie neighbours')
+
+    @app.cli.command('rebuild-user-profiles')
+    def rebuild_user_profiles_command():
+        """
+        Rebuild the profile document of every user
+        """
+        print(f'stored {user_profiles.rebuild()} user profiles')
+
+    @app.cli.command('check-user-profiles')
+    @click.option('--repair', is_flag=True,
+                  help='Rebuild the missing and stale profiles, remove the orphaned ones.')
+    def check_user_profiles_command(repair: bool):
+        """
+        Compare every user profile with its users and movies rows
+        """
+        report = user_profiles.check(repair)
+        print(json.dumps(report, indent=2))
+        if report is None or (not repair and (report['missing'] or report['stale']
+                                              or report['orphaned'])):
+            raise SystemExit(1)
+
+    app.add_url_rule('/', 'home', home)
+    app.register_error_handler(404, page_not_found)
+    app.register_error_handler(400, bad_request_error)
+    app.register_error_handler(500, internal_server_error)
+    return app
 
 
-@app.route('/')
 def home():
     """
     Home page
@@ -67,7 +239,6 @@ def home():
     return render_template('index.html')
 
 
-@app.errorhandler(404)
 def page_not_found(_error):
     """
     Handle 404, Not Found Error
@@ -77,7 +248,6 @@ def page_not_found(_error):
     return render_template('404.html'), 404
 
 
-@app.errorhandler(400)
 def bad_request_error(error):
     """
     Handle 400, Bad Request Error
@@ -88,7 +258,6 @@ def bad_request_error(error):
     return render_template('400.html', errors=error.description), 400
 
 
-@app.errorhandler(500)
 def internal_server_error(_error):
     """
     Handle 500, Internal Server Error
@@ -99,4 +268,4 @@ def internal_server_error(_error):
 
 
 if __name__ == "__main__":
-    app.run(port=5002)
+    create_app().run(port=5002)
@@ -0,0 +1,8 @@
+"""
+Benchmarks of the data managers and the API endpoints:
+
+    python -m benchmarks.run --sizes 1k 100k --output results.json
+    python -m benchmarks.run --sizes 1k --baseline results.json --max-regression 10
+    python -m benchmarks.compare results.json other_results.json --max-regression 10
+    python -m benchmarks.json_reads --items 20000
+"""
@@ -0,0 +1,69 @@
+"""
+Compare benchmark results with a baseline,
+failing when a benchmark got slower than allowed
+
+    python -m benchmarks.compare baseline.json results.json --max-regression 10
+"""
+import argparse
+import json
+import sys
+
+MIN_DELTA_MS = 0.05  # slowdowns below this are timer noise
+
+
+def compare(baseline: dict, current: dict, max_regression: float,
+            min_delta_ms: float = MIN_DELTA_MS) -> list[str]:
+    """
+    Print the change of the median of every benchmark
+    found in both results
+    :param baseline: results of benchmarks.run
+    :param current: results of benchmarks.run
+    :param max_regression: float, allowed slowdown in percent
+    :param min_delta_ms: float, slowdowns below are ignored
+    :return:
+        regressed benchmarks names (list[str])
+    """
+    regressions = []
+    for name, timing in current['results'].items():
+        baseline_timing = baseline['results'].get(name)
+        if baseline_timing is None:
+            continue
+
+        before, after = baseline_timing['median_ms'], timing['median_ms']
+        change = (after - before) / before * 100 if before else 0.0
+        regressed = change > max_regression and after - before > min_delta_ms
+        if regressed:
+            regressions.append(name)
+        print(f'{"REGRESSED" if regressed else "ok":>9} {name}: '
+              f'{before:.3f} ms -> {after:.3f} ms ({change:+.1f}%)')
+    return regressions
+
+
+def load_results(file_name: str) -> dict:
+    """
+    Read a results file of benchmarks.run
+    """
+    with open(file_name, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main():
+    """
+    Exit with status 1 when a benchmark regressed
+    """
+    parser = argparse.ArgumentParser(description='Compare benchmark results with a baseline')
+    parser.add_argument('baseline')
+    parser.add_argument('results')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='allowed slowdown of a median, in percent')
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.baseline), load_results(args.results),
+                          args.max_regression)
+    if regressions:
+        print(f'{len(regressions)} benchmarks regressed by more than {args.max_regression}%')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
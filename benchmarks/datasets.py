@@ -0,0 +1,132 @@
+"""
+Synthetic, reproducible datasets:
+the same size and seed give the same rows
+"""
+import json
+import random
+
+from sqlalchemy import insert
+
+from data_manager.data_models import User, Movie, UserMovie, MovieReview
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+SEED = 1337
+CHUNK_SIZE = 10_000  # rows per executemany
+
+
+def dataset_counts(movies: int) -> dict:
+    """
+    Rows of each table for a number of movies:
+    a user per 10 movies, 10 favourites and 5 reviews per user
+    :param movies: int
+    :return:
+        {"movies", "users", "favourites", "reviews"} (dict)
+    """
+    users = max(movies // 10, 1)
+    return {'movies': movies,
+            'users': users,
+            'favourites': users * min(10, movies),
+            'reviews': users * min(5, movies)}
+
+
+def movie_rows(count: int, rng: random.Random):
+    """
+    Movies numbered 1 to count
+    :return:
+        movie rows (Iterator[dict])
+    """
+    for movie_id in range(1, count + 1):
+        yield {'id': movie_id,
+               'movie_name': f'Movie {movie_id}',
+               'director': f'Director {rng.randrange(count // 20 + 1)}',
+               'year': rng.randint(1950, 2024),
+               'rating': round(rng.uniform(1, 10), 1),
+               'poster': f'https://example.com/posters/{movie_id}.jpg',
+               'website': f'https://www.imdb.com/title/tt{movie_id:07}'}
+
+
+def user_rows(count: int):
+    """
+    Users numbered 1 to count
+    :return:
+        user rows (Iterator[dict])
+    """
+    for user_id in range(1, count + 1):
+        yield {'id': user_id, 'user_name': f'User {user_id}'}
+
+
+def user_movie_ids(users: int, movies: int, per_user: int, rng: random.Random):
+    """
+    Distinct movies of each user
+    :return:
+        (user id, movie id) (Iterator[tuple])
+    """
+    for user_id in range(1, users + 1):
+        for movie_id in rng.sample(range(1, movies + 1), per_user):
+            yield user_id, movie_id
+
+
+def favourite_rows(counts: dict, rng: random.Random):
+    """
+    :return:
+        users_movies rows (Iterator[dict])
+    """
+    for user_id, movie_id in user_movie_ids(counts['users'], counts['movies'],
+                                            counts['favourites'] // counts['users'], rng):
+        yield {'user_id': user_id, 'movie_id': movie_id}
+
+
+def review_rows(counts: dict, rng: random.Random):
+    """
+    :return:
+        movies_reviews rows (Iterator[dict])
+    """
+    for user_id, movie_id in user_movie_ids(counts['users'], counts['movies'],
+                                            counts['reviews'] // counts['users'], rng):
+        yield {'user_id': user_id, 'movie_id': movie_id,
+               'review_text': f'Review of movie {movie_id} by user {user_id}',
+               'rating': float(rng.randint(1, 10))}
+
+
+def chunks(rows, size: int = CHUNK_SIZE):
+    """
+    Split rows into lists of size rows
+    :return:
+        lists of rows (Iterator[list])
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def create_database(db, counts: dict) -> None:
+    """
+    Insert the dataset into the empty tables
+    of the app database, the search index and
+    review aggregates triggers fill as usual
+    :param db: SQLAlchemy
+    :param counts: dataset_counts
+    """
+    rng = random.Random(SEED)
+    for entity, rows in ((Movie, movie_rows(counts['movies'], rng)),
+                         (User, user_rows(counts['users'])),
+                         (UserMovie, favourite_rows(counts, rng)),
+                         (MovieReview, review_rows(counts, rng))):
+        for chunk in chunks(rows):
+            db.session.execute(insert(entity), chunk)
+        db.session.commit()
+
+
+def create_json_movies(file_name: str, counts: dict) -> None:
+    """
+    Write the movies of the dataset to a JSONDataManager file
+    :param file_name: str
+    :param counts: dataset_counts
+    """
+    with open(file_name, 'w', encoding='utf-8') as file:
+        json.dump(list(movie_rows(counts['movies'], random.Random(SEED))), file)
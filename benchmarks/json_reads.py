@@ -0,0 +1,68 @@
+"""
+Compare the reads of JSONDataManager parsing the json file
+on every call with the in-memory copy kept until the file changes.
+
+    python -m benchmarks.json_reads --items 20000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from data_manager.json_data_manager import JSONDataManager, orjson
+
+from .timing import measure
+
+VARIANTS = {'parse per call': {'cache': False},
+            'parse mmap per call': {'cache': False, 'use_mmap': True},
+            'cached': {'cache': True}}
+
+
+def create_movies(file_name: str, items: int) -> None:
+    """
+    Write items synthetic movies to file_name
+    """
+    with open(file_name, 'w', encoding='utf-8') as file:
+        json.dump([{'id': movie_id,
+                    'movie_name': f'Movie {movie_id}',
+                    'director': f'Director {movie_id % 500}',
+                    'year': 1950 + movie_id % 75,
+                    'rating': round(random.uniform(1, 10), 1),
+                    'poster': f'https://example.com/posters/{movie_id}.jpg',
+                    'website': f'https://www.imdb.com/title/tt{movie_id:07}'}
+                   for movie_id in range(1, items + 1)], file)
+
+
+def main():
+    """
+    Time get_all_data, get_item_by_id, get_page and update_item
+    of each variant on the same file
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{args.items} movies, json parser: {"orjson" if orjson else "json"}')
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.json')
+        create_movies(file_name, args.items)
+        for name, options in VARIANTS.items():
+            movies = JSONDataManager(file_name, 'id', **options)
+            ids = [random.randint(1, args.items) for _ in range(args.repeat)]
+            timings = {
+                'get_all_data': measure(movies.get_all_data, args.repeat),
+                'get_item_by_id': measure(lambda: movies.get_item_by_id(ids.pop()),
+                                          args.repeat),
+                'get_page': measure(lambda: movies.get_page(20, filters=[('year', '==', 1999)]),
+                                    args.repeat),
+                'update_item': measure(lambda: movies.update_item({'id': 1, 'rating': 5.0}),
+                                       args.repeat),
+            }
+            print(f'{name:>19}: ' + ', '.join(f'{operation} {timing["median_ms"]:.3f} ms'
+                                               for operation, timing in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
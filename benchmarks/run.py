@@ -0,0 +1,98 @@
+"""
+Run the benchmarks on synthetic datasets, one process
+and one temporary SQLite database per size,
+and write the results as JSON
+
+    python -m benchmarks.run --sizes 1k 100k --repeat 5 --output results.json
+    python -m benchmarks.run --baseline results.json --max-regression 10
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from .compare import compare, load_results
+from .datasets import SIZES, SEED, dataset_counts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_size(size: str, repeat: int) -> dict:
+    """
+    Run benchmarks.suite on a new database
+    :param size: key of SIZES
+    :param repeat: int
+    :return:
+        timings by "size/group/benchmark" (dict)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'results.json')
+        env = dict(os.environ,
+                   DATABASE_URL='sqlite:///' + os.path.join(directory, 'movieflix.sqlite'))
+        env.pop('DATABASE_REPLICA_URLS', None)
+        # the app's prints go to stderr, the results to a file
+        subprocess.run([sys.executable, '-m', 'benchmarks.suite', size, output,
+                        '--repeat', str(repeat)],
+                       cwd=ROOT, env=env, check=True, stdout=sys.stderr)
+        with open(output, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+
+def git_commit() -> str | None:
+    """
+    Return the commit being benchmarked
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """
+    Run the sizes, write the results and
+    exit with status 1 when a baseline benchmark regressed
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of the data managers and the API')
+    parser.add_argument('--sizes', nargs='+', choices=SIZES, default=['1k'])
+    parser.add_argument('--repeat', type=int, default=5, help='calls of each benchmark')
+    parser.add_argument('--output', help='results JSON file, stdout by default')
+    parser.add_argument('--baseline', help='results JSON file to compare with')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='allowed slowdown of a median, in percent')
+    args = parser.parse_args()
+
+    results = {'meta': {'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                        'commit': git_commit(),
+                        'python': platform.python_version(),
+                        'sqlite': sqlite3.sqlite_version,
+                        'platform': platform.platform(),
+                        'repeat': args.repeat,
+                        'seed': SEED,
+                        'datasets': {size: dataset_counts(SIZES[size]) for size in args.sizes}},
+               'results': {}}
+    for size in args.sizes:
+        print(f'benchmarking {size}', file=sys.stderr)
+        results['results'].update(run_size(size, args.repeat))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, args.max_regression)
+        if regressions:
+            print(f'{len(regressions)} benchmarks regressed by more than {args.max_regression}%')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
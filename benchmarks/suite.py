@@ -0,0 +1,169 @@
+"""
+The benchmarks of one dataset size, run by benchmarks.run
+in a process of their own: the app is created once,
+with DATABASE_URL pointing at an empty database.
+
+    DATABASE_URL=sqlite:////tmp/benchmark.sqlite python -m benchmarks.suite 1k results.json
+"""
+import argparse
+import json
+import os
+import random
+from functools import partial
+
+from data_manager.data_models import db, Movie
+from data_manager.json_data_manager import JSONDataManager
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+from .datasets import SIZES, SEED, dataset_counts, create_database, create_json_movies
+from .timing import measure
+
+PAGE_SIZE = 20
+BATCH_SIZE = 20  # movies of a batch favourites request
+
+# main read endpoints, with the entity cache emptied before each call
+API_READS = ('/api/users?limit=20',
+             '/api/users?limit=20&sort=user_name&order=desc',
+             '/api/movies?limit=20',
+             '/api/movies?limit=20&sort=rating&order=desc&min_year=2000',
+             '/api/movies/search?q=movie%2042',
+             '/api/movies/top?by=user_rating&limit=10',
+             '/api/users/1/movies',
+             '/api/movies/1/reviews')
+
+
+def crud_benchmarks(manager, new_item, movies: int, repeat: int, setup=None) -> dict:
+    """
+    Time the reads and writes of a movies data manager
+    :param manager: DataManagerInterface
+    :param new_item: callable returning the movie number n to add
+    :param movies: int, movies ids are 1 to movies
+    :param repeat: int
+    :param setup: callable | None, run before each call
+    :return:
+        timings by operation (dict)
+    """
+    rng = random.Random(SEED)
+    added = iter(range(repeat))
+    results = {
+        'get_item_by_id': measure(lambda: manager.get_item_by_id(rng.randint(1, movies)),
+                                  repeat, setup),
+        'get_page': measure(lambda: manager.get_page(PAGE_SIZE), repeat, setup),
+        'get_page_filtered': measure(lambda: manager.get_page(PAGE_SIZE,
+                                                              filters=[('year', '>=', 2000)],
+                                                              sort_by='rating', descending=True),
+                                     repeat, setup),
+        'get_all_data': measure(manager.get_all_data, repeat, setup),
+        'add_item': measure(lambda: manager.add_item(new_item(next(added))), repeat, setup),
+        'update_item': measure(lambda: manager.update_item({'id': rng.randint(1, movies),
+                                                            'rating': rng.randint(1, 100) / 10}),
+                               repeat, setup),
+    }
+    # the added movies took the ids after the dataset ones
+    deleted = iter(range(movies + 1, movies + repeat + 1))
+    results['delete_item'] = measure(lambda: manager.delete_item(next(deleted)), repeat, setup)
+    return results
+
+
+def api_benchmarks(app, movie_ids: list, repeat: int) -> dict:
+    """
+    Time the main /api endpoints through the Flask test client
+    :param app: Flask
+    :param movie_ids: list, movies user 1 has not favourited
+    :param repeat: int
+    :return:
+        timings by request (dict)
+    """
+    client = app.test_client()
+
+    def call(method: str, url: str, body: dict | None = None):
+        response = client.open(url, method=method, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method} {url}: {response.status_code} {response.get_data()}')
+
+    results = {}
+    for url in API_READS:
+        results[f'GET {url}'] = measure(partial(call, 'GET', url), repeat,
+                                        app.extensions['movieflix']['entity_cache'].clear)
+
+    batch = {'movie_ids': movie_ids}
+    add = partial(call, 'POST', '/api/users/1/movies', batch)
+    delete = partial(call, 'DELETE', '/api/users/1/movies', batch)
+    results['POST /api/users/1/movies'] = measure(add, repeat, delete)
+    results['DELETE /api/users/1/movies'] = measure(delete, repeat, add)
+    return results
+
+
+def run_suite(size: str, repeat: int, directory: str) -> dict:
+    """
+    Create the dataset of size and time every benchmark
+    :param size: key of SIZES
+    :param repeat: int
+    :param directory: str, for the JSONDataManager file
+    :return:
+        timings by "size/group/benchmark" (dict)
+    """
+    # config.Config reads DATABASE_URL when it is imported
+    from app import create_app  # pylint: disable=import-outside-toplevel
+
+    app = create_app()
+    services = app.extensions['movieflix']
+
+    counts = dataset_counts(SIZES[size])
+    movies = counts['movies']
+    json_file_name = os.path.join(directory, 'movies.json')
+    create_json_movies(json_file_name, counts)
+
+    results = {}
+    with app.app_context():
+        create_database(db, counts)
+
+        groups = {
+            'sqlite': crud_benchmarks(SQLiteDataManager('id', Movie, db),
+                                      lambda number: Movie(movie_name=f'Benchmark {number}'),
+                                      movies, repeat, db.session.remove),
+            'json': crud_benchmarks(JSONDataManager(json_file_name, 'id'),
+                                    lambda number: {'movie_name': f'Benchmark {number}'},
+                                    movies, repeat),
+        }
+
+        def cold():
+            services['entity_cache'].clear()
+            db.session.remove()
+
+        groups['wrappers'] = {
+            'Users.get_all_users': measure(services['users_data_manager'].get_all_users,
+                                           repeat, cold),
+            'Movies.get_movies': measure(services['movies_data_manager'].get_movies,
+                                         repeat, cold),
+        }
+        candidates = list(range(1, min(movies, 2 * BATCH_SIZE + 20) + 1))
+        favourites = services['users_movies_data_manager'].get_favourite_ids(1, candidates)
+        movie_ids = [movie_id for movie_id in candidates if movie_id not in favourites]
+        db.session.remove()
+
+    groups['api'] = api_benchmarks(app, movie_ids[:BATCH_SIZE], repeat)
+
+    for group, timings in groups.items():
+        for name, timing in timings.items():
+            results[f'{size}/{group}/{name}'] = timing
+    return results
+
+
+def main():
+    """
+    Write the timings of one size to a JSON file
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of one dataset size')
+    parser.add_argument('size', choices=SIZES)
+    parser.add_argument('output')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run_suite(args.size, args.repeat, os.path.dirname(os.path.abspath(args.output)))
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Timing of a benchmarked call
+"""
+import statistics
+import time
+
+
+def measure(function, repeat: int, setup=None) -> dict:
+    """
+    Call function repeat times, setup runs before
+    each call and is not timed
+    :param function: callable
+    :param repeat: int
+    :param setup: callable | None
+    :return:
+        milliseconds of a call (dict):
+            {"median_ms", "min_ms", "max_ms", "repeat"}
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(statistics.median(timings), 4),
+            'min_ms': round(min(timings), 4),
+            'max_ms': round(max(timings), 4),
+            'repeat': repeat}
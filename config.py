@@ -0,0 +1,141 @@
+"""
+App configuration read from environment variables:
+the database URL, its read replicas and connection pool,
+the SQLite pragmas set on every new connection,
+the OMDb enrichment, cache backend and page cache settings
+and the request instrumentation
+"""
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(basedir, 'data/movieflix.sqlite')
+DEFAULT_CACHE_PATH = os.path.join(basedir, 'data/cache.sqlite')
+DEFAULT_OMDB_CACHE_PATH = os.path.join(basedir, 'data/omdb_cache.sqlite')
+
+
+def get_database_url() -> str:
+    """
+    Return DATABASE_URL, the SQLite file by default.
+    postgres:// URLs are accepted for postgresql://
+    :return:
+        database URL (str)
+    """
+    database_url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if database_url.startswith('postgres://'):
+        database_url = 'postgresql://' + database_url[len('postgres://'):]
+    return database_url
+
+
+def get_replica_urls() -> list[str]:
+    """
+    Return the comma separated DATABASE_REPLICA_URLS,
+    e.g. a read-only copy of the SQLite file:
+    sqlite:///file:/path/replica.sqlite?mode=ro&uri=true
+    :return:
+        replica URLs (list[str])
+    """
+    return [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+            if url.strip()]
+
+
+def is_sqlite_memory(database_url: str) -> bool:
+    """
+    Check if the URL is an in-memory SQLite database,
+    which has one connection and no pool settings
+    """
+    return database_url.startswith('sqlite') and \
+        database_url.split('?')[0] in ('sqlite://', 'sqlite:///:memory:')
+
+
+def get_engine_options(database_url: str) -> dict:
+    """
+    Return the SQLAlchemy engine options of a database URL:
+    pool size, overflow, timeout, recycle and pre-ping
+    :param database_url: str
+    :return:
+        engine options (dict)
+    """
+    if is_sqlite_memory(database_url):
+        return {}
+
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        # checks the connection with a round trip when it leaves the pool,
+        # a server restart then costs a reconnect instead of an error
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+    if not database_url.startswith('sqlite'):
+        # server side idle timeouts close old connections
+        options['pool_recycle'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+def get_sqlite_pragmas() -> dict:
+    """
+    Return the pragmas set on each new SQLite connection
+    :return:
+        pragma name -> value (dict)
+    """
+    return {
+        # readers do not block the writer and the writer does not block readers
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        # in WAL mode NORMAL only syncs at checkpoints, still safe against corruption
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        # wait for a lock instead of failing with "database is locked"
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        # read the database file through mmap, 0 disables it
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+
+
+class Config:
+    """
+    Default configuration, loaded with app.config.from_object
+    """
+    SQLALCHEMY_DATABASE_URI = get_database_url()
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_PRAGMAS = get_sqlite_pragmas()
+    DATABASE_REPLICA_URLS = get_replica_urls()
+    # seconds a write may take to reach the replicas,
+    # reads go to the primary meanwhile
+    DATABASE_REPLICA_LAG = float(os.environ.get('DATABASE_REPLICA_LAG', 5.0))
+    # 'sync': add movie waits for OMDb API,
+    # 'async': the movie is added right away and its details are fetched in the background
+    OMDB_ENRICHMENT_MODE = os.environ.get('OMDB_ENRICHMENT_MODE', 'sync')
+    # start the enrichment workers in create_app, resuming the queued jobs
+    ENRICHMENT_QUEUE_START = os.environ.get('ENRICHMENT_QUEUE_START', '1') == '1'
+    # OMDb responses cache: found movies are kept OMDB_CACHE_TTL seconds,
+    # "Movie not found!" OMDB_CACHE_NEGATIVE_TTL seconds,
+    # OMDB_CACHE_ONLY=1 never calls OMDb (offline)
+    OMDB_CACHE_PATH = os.environ.get('OMDB_CACHE_PATH', DEFAULT_OMDB_CACHE_PATH)
+    OMDB_CACHE_TTL = float(os.environ.get('OMDB_CACHE_TTL', 30 * 24 * 3600))
+    OMDB_CACHE_NEGATIVE_TTL = float(os.environ.get('OMDB_CACHE_NEGATIVE_TTL', 24 * 3600))
+    OMDB_CACHE_ONLY = os.environ.get('OMDB_CACHE_ONLY', '0') == '1'
+    # rendered movies / users pages kept in memory, 0 disables the page cache
+    PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 256))
+    # entity and page caches: 'memory' in each process,
+    # 'sqlite' in CACHE_PATH, shared by the processes of the host
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_PATH = os.environ.get('CACHE_PATH', DEFAULT_CACHE_PATH)
+    # table versions (ETags, cross-process cache eviction): 'memory' for one process,
+    # 'database' in the resource_versions table, read every VERSIONS_POLL_INTERVAL seconds
+    RESOURCE_VERSIONS = os.environ.get('RESOURCE_VERSIONS', 'memory')
+    VERSIONS_POLL_INTERVAL = float(os.environ.get('VERSIONS_POLL_INTERVAL', 1.0))
+    # per-request SQL and timing instrumentation: Server-Timing headers,
+    # a JSON log line per request and /metrics, off by default
+    REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '0') == '1'
+    # statements slower than this are logged when REQUEST_METRICS is on, 0 disables
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+
+
+class WSGIConfig(Config):
+    """
+    Configuration of wsgi.py, served by several worker processes:
+    they share the table versions through the database
+    and start their enrichment workers after the fork (gunicorn.conf.py)
+    """
+    RESOURCE_VERSIONS = os.environ.get('RESOURCE_VERSIONS', 'database')
+    ENRICHMENT_QUEUE_START = os.environ.get('ENRICHMENT_QUEUE_START', '0') == '1'
@@ -0,0 +1,30 @@
+"""
+Backends of the entity and page caches, selected with CACHE_BACKEND:
+- 'memory': an EntityCache per process, the other processes' writes
+  evict its entries through DatabaseResourceVersions
+- 'sqlite': a SQLiteEntityCache file shared by the processes of a host
+"""
+from .entity_cache import EntityCache
+from .sqlite_entity_cache import SQLiteEntityCache
+
+CACHE_BACKENDS = ('memory', 'sqlite')
+
+
+def create_cache(backend: str, name: str, max_size: int, ttl: float = 300.0,
+                 path: str | None = None) -> EntityCache | SQLiteEntityCache:
+    """
+    Return a cache of the backend
+    :param backend: 'memory' | 'sqlite'
+    :param name: str, table of the cache in the sqlite file
+    :param max_size: int
+    :param ttl: float
+    :param path: str, the sqlite file
+    :return:
+        EntityCache | SQLiteEntityCache
+    """
+    if backend == 'memory':
+        return EntityCache(max_size=max_size, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteEntityCache(path, name, max_size=max_size, ttl=ttl)
+    raise ValueError(f'CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}, '
+                     f'not {backend!r}')
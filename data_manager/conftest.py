@@ -0,0 +1,26 @@
+"""
+Fixtures of the database tests
+"""
+import os
+
+import pytest
+from flask import Flask
+
+from data_manager.data_models import db
+
+
+@pytest.fixture
+def app():
+    """
+    A Flask app on an empty database, in an app context.
+    TEST_DATABASE_URL runs the tests against another database, e.g. PostgreSQL
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()  # a server database waits for open transactions to drop
+        db.engine.dispose()
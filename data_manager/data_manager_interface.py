@@ -23,6 +23,81 @@ class DataManagerInterface(ABC):
             Query object representing all the data
         """
 
+    @abstractmethod
+    def get_page(self, limit: int, cursor: str | None = None,
+                 filters: list[tuple] | None = None,
+                 sort_by: str | None = None,
+                 descending: bool = False,
+                 use_case: str = 'list'):
+        """
+        Return one page of items ordered by sort_by then id,
+        starting after the item encoded in cursor
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: 'list' | 'summary' | 'rows', the relationships loaded with the items,
+            'rows' for read-only rows instead of entities
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+
+    @abstractmethod
+    def iter_items(self, filters: list[tuple] | None = None,
+                   sort_by: str | None = None,
+                   descending: bool = False,
+                   batch_size: int = 500):
+        """
+        Iterate over all items ordered by sort_by then id,
+        without loading them all at once
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param batch_size: int
+        :return:
+            items (Iterator)
+        """
+
+    @abstractmethod
+    def search(self, match_query: str, limit: int):
+        """
+        Return the items matching a full-text query,
+        best match first
+        :param match_query: FTS5 MATCH query
+        :param limit: int
+        :return:
+            items (list) |
+            None
+        """
+
+    @abstractmethod
+    def get_unlinked_page(self, link_entity, link_key: str, link_filters: list[tuple],
+                          limit: int, cursor: str | None = None,
+                          filters: list[tuple] | None = None,
+                          sort_by: str | None = None,
+                          descending: bool = False,
+                          use_case: str = 'list'):
+        """
+        Return one page of the items that have no
+        matching row in a link table,
+        e.g. the movies a user has not favourited
+        :param link_entity: link table model (db) |
+            data manager of the link items (json)
+        :param link_key: link column referencing this item id
+        :param link_filters: list of (key, operator, value) tuples on the links
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: 'list' | 'summary' | 'rows'
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+
     @abstractmethod
     def get_item_by_id(self, item_id):
         """
@@ -39,7 +114,33 @@ class DataManagerInterface(ABC):
         Add new item to file
         :param new_item: (dict)
         :return:
-            Successfully add item, True (bool)
+            Successfully add item, True (bool) |
+            Duplicate item, False (bool) |
+            None
+        """
+
+    @abstractmethod
+    def add_items(self, new_items: list) -> list[bool | None]:
+        """
+        Add many items in one transaction
+        :param new_items: list
+        :return:
+            per item result (list):
+                True for added |
+                False for duplicate item |
+                None for other errors
+        """
+
+    @abstractmethod
+    def insert_mappings(self, mappings: list[dict]) -> list[bool | None]:
+        """
+        Add many items given as column dicts in one transaction
+        :param mappings: list[dict]
+        :return:
+            per item result (list):
+                True for added |
+                False for duplicate item |
+                None for other errors
         """
 
     @abstractmethod
@@ -61,3 +162,14 @@ class DataManagerInterface(ABC):
             True for success delete item (bool) |
             None
         """
+
+    @abstractmethod
+    def delete_items(self, item_ids: list) -> list[bool | None]:
+        """
+        Delete many items in one transaction
+        :param item_ids: list
+        :return:
+            per item result (list):
+                True for deleted |
+                None for item not found or other errors
+        """
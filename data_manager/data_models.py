@@ -4,6 +4,10 @@ User
 Movie
 UserMovie
 MovieReview
+EnrichmentJob
+MovieNeighbour
+UserProfile
+ResourceVersion
 """
 from flask_sqlalchemy import SQLAlchemy
 
@@ -15,12 +19,15 @@ class User(db.Model):
     User Class
     """
     __tablename__ = 'users'
+    __table_args__ = (db.Index('ix_users_user_name_id', 'user_name', 'id'),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_name = db.Column(db.String)
     movies = db.relationship('UserMovie', back_populates='user', cascade='all, delete-orphan')
     movie_reviews = db.relationship('MovieReview',
                                     back_populates='user',
                                     cascade='all, delete-orphan')
+    # deleted with the user in the same transaction
+    profile = db.relationship('UserProfile', cascade='all, delete-orphan', uselist=False)
 
     def __repr__(self) -> str:
         return f"User(id={self.id}, user_name={self.user_name})"
@@ -36,6 +43,12 @@ class Movie(db.Model):
     Movie Class
     """
     __tablename__ = 'movies'
+    # (sort column, id) indexes serve the keyset paginated listings
+    __table_args__ = (db.Index('ix_movies_year_id', 'year', 'id'),
+                      db.Index('ix_movies_rating_id', 'rating', 'id'),
+                      db.Index('ix_movies_director_id', 'director', 'id'),
+                      db.Index('ix_movies_user_rating_id', 'user_rating', 'id'),
+                      db.Index('ix_movies_review_count_id', 'review_count', 'id'))
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     movie_name = db.Column(db.String(50), unique=True)
     director = db.Column(db.String(50))
@@ -43,6 +56,10 @@ class Movie(db.Model):
     rating = db.Column(db.Float, default=0.0)
     poster = db.Column(db.String)
     website = db.Column(db.String)
+    # movies_reviews aggregates, maintained by triggers (review_aggregates.py)
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    review_rating_sum = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    user_rating = db.Column(db.Float)  # average review rating, null without reviews
     users = db.relationship('UserMovie', back_populates='movie')
     movie_reviews = db.relationship('MovieReview', back_populates='movie')  # New relationship
 
@@ -65,6 +82,10 @@ class UserMovie(db.Model):
     UserMovie Class
     """
     __tablename__ = "users_movies"
+    # (user_id, movie_id) unique index also serves lookups by user_id
+    __table_args__ = (db.UniqueConstraint('user_id', 'movie_id',
+                                          name='uq_users_movies_user_id_movie_id'),
+                      db.Index('ix_users_movies_movie_id', 'movie_id'))
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False)
@@ -78,6 +99,12 @@ class MovieReview(db.Model):
     MovieReview Class
     """
     __tablename__ = "movies_reviews"
+    # one review per user and movie,
+    # a movie's reviews page, ordered by id or by rating
+    __table_args__ = (db.UniqueConstraint('user_id', 'movie_id',
+                                          name='uq_movies_reviews_user_id_movie_id'),
+                      db.Index('ix_movies_reviews_movie_id', 'movie_id'),
+                      db.Index('ix_movies_reviews_movie_id_rating_id', 'movie_id', 'rating', 'id'))
     id = db.Column(db.Integer,
                    primary_key=True,
                    autoincrement=True)
@@ -88,3 +115,63 @@ class MovieReview(db.Model):
 
     user = db.relationship('User', back_populates='movie_reviews')
     movie = db.relationship('Movie', back_populates='movie_reviews')
+
+
+class EnrichmentJob(db.Model):
+    """
+    EnrichmentJob Class
+    Persistent queue of movies waiting for
+    their details from OMDb API
+    """
+    __tablename__ = "enrichment_jobs"
+    __table_args__ = (db.Index('ix_enrichment_jobs_status_next_attempt_at',
+                               'status', 'next_attempt_at'),)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False)
+    movie_name = db.Column(db.String, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.Float, nullable=False)
+    last_error = db.Column(db.String)
+    updated_at = db.Column(db.Float, nullable=False)
+
+
+class MovieNeighbour(db.Model):
+    """
+    MovieNeighbour Class
+    Top-K most similar movies of each movie,
+    by item-item cosine similarity of users' favourites
+    (data_manager/recommendations.py)
+    """
+    __tablename__ = "movie_neighbours"
+    __table_args__ = (db.Index('ix_movie_neighbours_movie_id_score', 'movie_id', 'score'),
+                      db.Index('ix_movie_neighbours_neighbour_id', 'neighbour_id'))
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    neighbour_id = db.Column(db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
+
+class UserProfile(db.Model):
+    """
+    UserProfile Class
+    Materialized user document, the user and its favourite
+    movies as Users.get_user returns them
+    (data_manager/user_profiles.py)
+    """
+    __tablename__ = "user_profiles"
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'),
+                        primary_key=True)
+    document = db.Column(db.JSON, nullable=False)
+
+
+class ResourceVersion(db.Model):
+    """
+    ResourceVersion Class
+    Version counter of each table shared by the
+    worker processes (data_manager/resource_versions.py)
+    """
+    __tablename__ = "resource_versions"
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    modified_at = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.Float, nullable=False)
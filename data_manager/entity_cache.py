@@ -0,0 +1,134 @@
+"""
+EntityCache class
+Read-through cache of the serialized entity dicts
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class EntityCache:
+    """
+    LRU cache with TTL of entity dicts keyed by (entity, id).
+
+    An entry can depend on other entities, e.g. a user dict
+    embeds its favourite movies: invalidating ('movies', 3)
+    also evicts every cached dict that was stored with
+    depends_on=[('movies', 3)].
+    Cached dicts are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires at, value, depends on)
+        self._dependents = {}  # key -> set of keys depending on it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: tuple) -> None:
+        """
+        Remove an entry and its dependency links,
+        the lock must be held
+        :param key: (entity, id)
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for dependency in entry[2]:
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def get(self, entity: str, item_id: int) -> dict | None:
+        """
+        Return the cached dict of an entity
+        :param entity: str
+        :param item_id: int
+        :return:
+            cached dict |
+            None if missing or expired
+        """
+        key = (entity, item_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, entity: str, item_id: int, value: dict, depends_on=()) -> None:
+        """
+        Cache the dict of an entity
+        :param entity: str
+        :param item_id: int
+        :param value: dict
+        :param depends_on: iterable of (entity, id) embedded in value
+        """
+        key = (entity, item_id)
+        depends_on = tuple(depends_on)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self._ttl, value, depends_on)
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(key)
+
+            while len(self._entries) > self._max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, entity: str, item_id: int) -> None:
+        """
+        Evict an entity dict and the dicts depending on it
+        :param entity: str
+        :param item_id: int
+        """
+        key = (entity, item_id)
+        with self._lock:
+            self._remove(key)
+            for dependent in self._dependents.pop(key, set()):
+                self._remove(dependent)
+
+    def invalidate_entity(self, entity: str) -> None:
+        """
+        Evict every dict of an entity and the dicts depending on them,
+        e.g. after another process wrote to its table
+        :param entity: str
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == entity]:
+                self._remove(key)
+            for dependency in [dependency for dependency in self._dependents
+                               if dependency[0] == entity]:
+                for dependent in self._dependents.pop(dependency, set()):
+                    self._remove(dependent)
+
+    def clear(self) -> None:
+        """
+        Evict everything
+        """
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters
+        :return:
+            hits, misses, evictions, size, max_size, ttl (dict)
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self._entries),
+                    'max_size': self._max_size,
+                    'ttl': self._ttl}
@@ -1,12 +1,39 @@
 """
 JSONDataManager class implemented DataManagerInterface
 for managing data from json file
+
+The parsed file is kept in memory with an id -> item dict,
+and parsed again only when the file changes (another mtime,
+size or inode), so edits made outside the manager are picked up.
+orjson parses the file when it is installed.
 """
 import json
+import mmap
+import os
+import re
+import sys
 from abc import ABC
 from typing import List
 
+try:
+    import orjson
+except ImportError:  # optional, the json module parses the file without it
+    orjson = None
+
 from .data_manager_interface import DataManagerInterface
+from .pagination import FILTER_OPERATORS, encode_cursor, decode_cursor
+
+
+def loads(data) -> list | dict:
+    """
+    Parse JSON bytes, with orjson if it is installed
+    :param data: bytes | memoryview (orjson only)
+    :return:
+        parsed value (list | dict)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class JSONDataManager(DataManagerInterface, ABC):
@@ -14,25 +41,75 @@ class JSONDataManager(DataManagerInterface, ABC):
     A class for managing data
     to and from a JSON file
     """
-    def __init__(self, file_name, id_key):
+    def __init__(self, file_name, id_key, cache: bool = True, use_mmap: bool = False):
         self._file_name = file_name
         self._id_key = id_key
+        self._use_cache = cache
+        self._use_mmap = use_mmap
+        self._cache = None  # (file signature, items, id -> item)
+
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> tuple:
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _set_cache(self, items: List[dict] | None) -> None:
+        """
+        Keep the items of the file as it is now on disk,
+        None forgets them
+        :param items: List[dict] | None
+        """
+        if items is None or not self._use_cache:
+            self._cache = None
+            return
+        try:
+            signature = self._file_signature(os.stat(self._file_name))
+        except OSError:
+            self._cache = None
+            return
+        self._cache = (signature, items, {item[self._id_key]: item for item in items})
+
+    def _load_file(self) -> List[dict]:
+        """
+        Parse the json file, mapped in memory
+        instead of read when use_mmap is set
+        :return:
+            json file content (List[dict])
+        """
+        with open(self._file_name, 'rb') as file:
+            if not self._use_mmap or os.fstat(file.fileno()).st_size == 0:
+                return loads(file.read())
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if orjson is None:
+                    return json.loads(data[:])
+                with memoryview(data) as view:  # no copy of the file
+                    return orjson.loads(view)
 
     def _read_file(self) -> List[dict] | None:
         """
-        Reading a list of dict from a json file
+        Reading a list of dict from a json file,
+        parsed again only when the file changed.
+        The list and its items are shared between callers
+        and must not be modified, except to write them back.
         :return:
             json file content (List[dict]) |
             None
         """
         try:
-            with open(self._file_name, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            signature = self._file_signature(os.stat(self._file_name))
+            cache = self._cache
+            if cache is not None and cache[0] == signature:
+                return cache[1]
+            items = self._load_file()
         except FileNotFoundError:
+            self._cache = None
             return None
         except FileExistsError:
             return None
 
+        if self._use_cache:
+            self._cache = (signature, items, {item[self._id_key]: item for item in items})
+        return items
+
     def _write_file(self, items: List[dict]) -> bool | None:
         """
         Write a list of dict to a json file
@@ -44,11 +121,14 @@ class JSONDataManager(DataManagerInterface, ABC):
         try:
             with open(self._file_name, 'w', encoding='utf-8') as file:
                 json.dump(items, file)
-                return True
         except FileNotFoundError:
+            self._set_cache(None)  # the cached items may have been modified
             return None
         except FileExistsError:
+            self._set_cache(None)
             return None
+        self._set_cache(items)
+        return True
 
     def get_all_data(self) -> List[dict] | None:
         """
@@ -58,6 +138,143 @@ class JSONDataManager(DataManagerInterface, ABC):
         """
         return self._read_file()
 
+    def get_page(self, limit: int, cursor: str | None = None,
+                 filters: list[tuple] | None = None,
+                 sort_by: str | None = None,
+                 descending: bool = False,
+                 use_case: str = 'list') -> tuple[List[dict], str | None] | None:
+        """
+        Return one page of items from json file
+        ordered by sort_by then id key,
+        starting after the item encoded in cursor
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: unused, json items have no relationships
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+        items = self._read_file()
+        if items is None:
+            return None
+
+        sort_by = sort_by or self._id_key
+
+        def sort_key(values: list) -> tuple:
+            # nulls first ascending, last descending, same as SQL manager
+            sort_value, item_id = values
+            return sort_value is not None, sort_value if sort_value is not None else 0, item_id
+
+        for key, operator_name, value in filters or []:
+            items = [item for item in items
+                     if item.get(key) is not None
+                     and FILTER_OPERATORS[operator_name](item[key], value)]
+
+        keyed_items = sorted(((sort_key([item.get(sort_by), item[self._id_key]]), item)
+                              for item in items),
+                             key=lambda keyed_item: keyed_item[0],
+                             reverse=descending)
+
+        if cursor:
+            after = decode_cursor(cursor, sort_by, descending)
+            if after is None:
+                return None
+            after_key = sort_key(after)
+            keyed_items = [(key, item) for key, item in keyed_items
+                           if (key < after_key if descending else key > after_key)]
+
+        items = [item for _key, item in keyed_items]
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(sort_by, descending,
+                                        [items[-1].get(sort_by), items[-1][self._id_key]])
+        return items, next_cursor
+
+    def iter_items(self, filters: list[tuple] | None = None,
+                   sort_by: str | None = None,
+                   descending: bool = False,
+                   batch_size: int = 500):
+        """
+        Iterate over all items from json file
+        ordered by sort_by then id key.
+        The json file is read at once, batch_size is unused.
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param batch_size: int
+        :return:
+            items (Iterator)
+        """
+        page = self.get_page(sys.maxsize, None, filters, sort_by, descending)
+        if page is not None:
+            yield from page[0]
+
+    def search(self, match_query: str, limit: int) -> List[dict] | None:
+        """
+        Return the items whose text values contain all the
+        words of a query built by build_match_query
+        ("word" terms, the last one may end with * for a prefix),
+        in id order: the json file has no ranking
+        :param match_query: str
+        :param limit: int
+        :return:
+            items (List[dict]) |
+            None
+        """
+        items = self._read_file()
+        if items is None:
+            return None
+
+        terms = re.findall(r'"(\w+)"(\*?)', match_query)
+
+        def matches(item: dict) -> bool:
+            words = re.findall(r'\w+', ' '.join(str(value) for value in item.values()
+                                                if isinstance(value, str)).casefold())
+            return all(any(word.startswith(term.casefold()) if prefix
+                           else word == term.casefold() for word in words)
+                       for term, prefix in terms)
+
+        return [item for item in items if matches(item)][:limit]
+
+    def get_unlinked_page(self, link_entity, link_key: str, link_filters: list[tuple],
+                          limit: int, cursor: str | None = None,
+                          filters: list[tuple] | None = None,
+                          sort_by: str | None = None,
+                          descending: bool = False,
+                          use_case: str = 'list') -> tuple[List[dict], str | None] | None:
+        """
+        Return one page of the items that no link item references,
+        e.g. the movies a user has not favourited:
+        get_unlinked_page(users_movies_json, 'movie_id', [('user_id', '==', user_id)], limit)
+        :param link_entity: data manager of the link items
+        :param link_key: link item key referencing this item id
+        :param link_filters: list of (key, operator, value) tuples on the link items
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: unused, json items have no relationships
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+        links = link_entity.get_page(sys.maxsize, filters=link_filters)
+        items = self._read_file()
+        if links is None or items is None:
+            return None
+
+        linked_ids = {link.get(link_key) for link in links[0]}
+        unlinked_ids = {item[self._id_key] for item in items
+                        if item[self._id_key] not in linked_ids}
+        return self.get_page(limit, cursor, [*(filters or []), (self._id_key, 'in', unlinked_ids)],
+                             sort_by, descending, use_case)
+
     def get_item_by_id(self, item_id) -> dict | None:
         """
         Return the specific item
@@ -67,6 +284,9 @@ class JSONDataManager(DataManagerInterface, ABC):
             None
         """
         items = self._read_file()
+        cache = self._cache
+        if cache is not None and cache[1] is items:
+            return cache[2].get(item_id)
         if items:
             for item in items:
                 if item[self._id_key] == item_id:
@@ -100,6 +320,38 @@ class JSONDataManager(DataManagerInterface, ABC):
         self._write_file(items)
         return True
 
+    def add_items(self, new_items: List[dict]) -> list[bool | None]:
+        """
+        Add many items to json file,
+        read and written once
+        :param new_items: List[dict]
+        :return:
+            per item result (list):
+                True for added |
+                None when the file cannot be written
+        """
+        items = self._read_file()
+        new_id = self.generate_new_id(items)
+        for new_item in new_items:
+            new_item.update({self._id_key: new_id})
+            new_id += 1
+        items.extend(new_items)
+        if self._write_file(items) is None:
+            return [None] * len(new_items)
+        return [True] * len(new_items)
+
+    def insert_mappings(self, mappings: List[dict]) -> list[bool | None]:
+        """
+        Add many items given as dicts to json file,
+        the json file has no unique constraints
+        :param mappings: List[dict]
+        :return:
+            per item result (list):
+                True for added |
+                None when the file cannot be written
+        """
+        return self.add_items([dict(mapping) for mapping in mappings])
+
     def update_item(self, updated_item: dict) -> bool | None:
         """
         Update item with updated_item
@@ -132,3 +384,25 @@ class JSONDataManager(DataManagerInterface, ABC):
                     self._write_file(items)
                     return True
         return None
+
+    def delete_items(self, item_ids: list) -> list[bool | None]:
+        """
+        Delete many items based on their ids,
+        the json file is read and written once
+        :param item_ids: list
+        :return:
+            per item result (list):
+                True for deleted |
+                None for item not found
+        """
+        items = self._read_file()
+        if not items:
+            return [None] * len(item_ids)
+
+        existing = {item[self._id_key] for item in items}
+        deleted = set(item_ids) & existing
+        if deleted:
+            items = [item for item in items if item[self._id_key] not in deleted]
+            if self._write_file(items) is None:
+                return [None] * len(item_ids)
+        return [True if item_id in deleted else None for item_id in item_ids]
@@ -0,0 +1,302 @@
+"""
+JSONLogDataManager class, JSONDataManager stored
+as an append-only JSON lines log:
+each line is {"put": item} or {"delete": item id},
+the last line of an id wins. A compacted log starts
+with {"next_id": n}, so deleted ids are not reused.
+
+An in-memory index maps each live id to the offset of its last
+"put" line, so a lookup is one seek and one line parsed,
+a write is one appended line, and the next id is a counter.
+The log is compacted, rewritten with the live items only,
+once it holds more dead lines than live ones.
+
+Crash safety: appended lines are fsync'ed before returning,
+a torn last line is truncated when the log is opened,
+and compaction writes a temporary file, fsyncs it
+and renames it over the log, so the log is always
+either the old one or the new one.
+One process writes a log at a time.
+"""
+import json
+import os
+import threading
+from typing import List
+
+from .json_data_manager import JSONDataManager
+
+COMPACT_MIN_DEAD_LINES = 1000
+
+
+class JSONLogDataManager(JSONDataManager):
+    """
+    A class for managing data
+    in an indexed, append-only JSON lines file
+    """
+
+    def __init__(self, file_name, id_key, fsync: bool = True,
+                 compact_min_dead_lines: int = COMPACT_MIN_DEAD_LINES):
+        super().__init__(file_name, id_key)
+        self._fsync = fsync
+        self._compact_min_dead_lines = compact_min_dead_lines
+        self._lock = threading.RLock()
+        self._index = {}  # item id -> offset of its last "put" line
+        self._next_id = 1
+        self._dead_lines = 0
+        self._open_log()
+
+    def _open_log(self) -> None:
+        """
+        Build the index from the log, converting a
+        JSONDataManager file (a JSON list) to a log first
+        """
+        temporary_file_name = self._file_name + '.tmp'
+        if os.path.exists(temporary_file_name):  # compaction interrupted before its rename
+            os.remove(temporary_file_name)
+        if not os.path.exists(self._file_name):
+            open(self._file_name, 'ab').close()
+
+        with open(self._file_name, 'rb') as file:
+            data = file.read()
+        if data.lstrip().startswith(b'['):
+            items = json.loads(data)
+            next_id = max((item[self._id_key] for item in items if self._id_key in item),
+                          default=0) + 1
+            for item in items:
+                if self._id_key not in item:
+                    item[self._id_key] = next_id
+                    next_id += 1
+            self._rewrite(items)
+            return
+
+        offset = 0
+        while offset < len(data):
+            end = data.find(b'\n', offset)
+            try:
+                if end == -1:
+                    raise ValueError('line without end')
+                self._apply(json.loads(data[offset:end]), offset)
+            except ValueError as err:
+                if end != -1 and data[end + 1:].strip():
+                    raise ValueError(f'{self._file_name}: corrupt line at offset {offset}') \
+                        from err
+                self._truncate(offset)  # torn write of the last line
+                break
+            offset = end + 1
+
+    def _apply(self, record: dict, offset: int) -> None:
+        """
+        Update the index with a log line
+        :param record: {"put": item} | {"delete": item id} | {"next_id": n}
+        :param offset: int
+        """
+        if 'next_id' in record:
+            self._next_id = max(self._next_id, record['next_id'])
+        elif 'put' in record:
+            item_id = record['put'][self._id_key]
+            if item_id in self._index:
+                self._dead_lines += 1
+            self._index[item_id] = offset
+            self._next_id = max(self._next_id, item_id + 1)
+        else:
+            if self._index.pop(record['delete'], None) is not None:
+                self._dead_lines += 1
+            self._dead_lines += 1
+
+    def _truncate(self, size: int) -> None:
+        with open(self._file_name, 'r+b') as file:
+            file.truncate(size)
+            self._sync(file)
+
+    def _sync(self, file) -> None:
+        """
+        Flush a file to the disk
+        """
+        file.flush()
+        if self._fsync:
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        return json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    def _append(self, records: list[dict]) -> bool | None:
+        """
+        Append records to the log in one write and one fsync
+        :param records: list[dict]
+        :return:
+            True for successful append (bool) |
+            None
+        """
+        lines = [self._encode(record) for record in records]
+        try:
+            with open(self._file_name, 'ab') as file:
+                offset = file.tell()
+                try:
+                    file.write(b''.join(lines))
+                    self._sync(file)
+                except OSError:
+                    file.truncate(offset)  # no torn line before the next append
+                    raise
+        except OSError as err:
+            print(err)
+            return None
+
+        for record, line in zip(records, lines):
+            self._apply(record, offset)
+            offset += len(line)
+
+        if self._dead_lines >= max(self._compact_min_dead_lines, len(self._index)):
+            try:
+                self.compact()
+            except OSError as err:  # the appended lines are safe, compact later
+                print(err)
+        return True
+
+    def _rewrite(self, items: List[dict]) -> None:
+        """
+        Replace the log with the next id and put lines of items:
+        write a temporary file, fsync it, rename it over the log
+        and fsync the directory so the rename is durable
+        :param items: List[dict]
+        """
+        temporary_file_name = self._file_name + '.tmp'
+        index = {}
+        next_id = max([self._next_id, *(item[self._id_key] + 1 for item in items)])
+        with open(temporary_file_name, 'wb') as file:
+            file.write(self._encode({'next_id': next_id}))
+            for item in items:
+                index[item[self._id_key]] = file.tell()
+                file.write(self._encode({'put': item}))
+            self._sync(file)
+        os.replace(temporary_file_name, self._file_name)
+        if self._fsync and hasattr(os, 'O_DIRECTORY'):
+            directory = os.open(os.path.dirname(os.path.abspath(self._file_name)),
+                                os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+        self._index = index
+        self._next_id = next_id
+        self._dead_lines = 0
+
+    def compact(self) -> None:
+        """
+        Rewrite the log with the live items only
+        """
+        with self._lock:
+            self._rewrite(self._read_file())
+
+    def _read_file(self) -> List[dict] | None:
+        """
+        Return the live items in id order,
+        reading the log at once and parsing the live lines only
+        :return:
+            items (List[dict]) |
+            None
+        """
+        with self._lock:
+            try:
+                with open(self._file_name, 'rb') as file:
+                    data = file.read()
+            except FileNotFoundError:
+                return None
+            # the live lines parsed as one JSON list, one call to the C parser
+            records = json.loads(b'[' + b','.join(data[offset:data.index(b'\n', offset)]
+                                                  for _item_id, offset
+                                                  in sorted(self._index.items())) + b']')
+            return [record['put'] for record in records]
+
+    def get_item_by_id(self, item_id) -> dict | None:
+        """
+        Return the specific item
+        given item_id, with one seek
+        :return:
+            item (dict) |
+            None
+        """
+        with self._lock:
+            offset = self._index.get(item_id)
+            if offset is None:
+                return None
+            with open(self._file_name, 'rb') as file:
+                file.seek(offset)
+                return json.loads(file.readline())['put']
+
+    def generate_new_id(self, items: list = None, key=None) -> int:
+        """
+        Return the next id, ids are not reused after a delete
+        :return:
+            new item id (int)
+        """
+        return self._next_id
+
+    def add_item(self, new_item: dict) -> bool | None:
+        """
+        Append a new item to the log
+        :param new_item: (dict)
+        :return:
+            Successfully add item, True (bool) |
+            None
+        """
+        return self.add_items([new_item])[0]
+
+    def add_items(self, new_items: List[dict]) -> list[bool | None]:
+        """
+        Append many new items to the log
+        in one write and one fsync
+        :param new_items: List[dict]
+        :return:
+            per item result (list):
+                True for added |
+                None when the log cannot be written
+        """
+        with self._lock:
+            for new_id, new_item in enumerate(new_items, self._next_id):
+                new_item.update({self._id_key: new_id})
+            if self._append([{'put': new_item} for new_item in new_items]) is None:
+                return [None] * len(new_items)
+            return [True] * len(new_items)
+
+    def update_item(self, updated_item: dict) -> bool | None:
+        """
+        Append the updated item to the log
+        :param updated_item: dict
+        :return:
+            True for success update item (bool) |
+            None
+        """
+        with self._lock:
+            item = self.get_item_by_id(updated_item[self._id_key])
+            if item is None:
+                return None
+            item.update(updated_item)
+            return self._append([{'put': item}])
+
+    def delete_item(self, item_id: int) -> bool | None:
+        """
+        Append the delete of an item to the log
+        :param item_id: int
+        :return:
+            True for success delete item (bool) |
+            None
+        """
+        return self.delete_items([item_id])[0]
+
+    def delete_items(self, item_ids: list) -> list[bool | None]:
+        """
+        Append the deletes of many items to the log
+        in one write and one fsync
+        :param item_ids: list
+        :return:
+            per item result (list):
+                True for deleted |
+                None for item not found or other errors
+        """
+        with self._lock:
+            deleted = {item_id for item_id in item_ids if item_id in self._index}
+            if deleted and self._append([{'delete': item_id} for item_id in deleted]) is None:
+                return [None] * len(item_ids)
+            return [True if item_id in deleted else None for item_id in item_ids]
@@ -0,0 +1,30 @@
+"""
+Relationship loading strategies per entity and use case.
+The dict serializers of Users, Movies and MoviesReviews
+walk these relationships, so they are loaded up front
+in a constant number of queries instead of one lazy load per row:
+'list' is used for get_all_data / get_page,
+'detail' for get_item_by_id.
+The 'summary' and 'rows' listings select columns instead (projections.py)
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from .data_models import User, Movie, UserMovie, MovieReview
+
+LOAD_STRATEGIES = {
+    # Users.__user_to_dict: user.movies -> user_movie.movie
+    User: {
+        'list': (selectinload(User.movies).joinedload(UserMovie.movie),),
+        'detail': (selectinload(User.movies).joinedload(UserMovie.movie),)
+    },
+    # Movies.__movie_to_dict: movie.movie_reviews -> review.user
+    Movie: {
+        'list': (selectinload(Movie.movie_reviews).joinedload(MovieReview.user),),
+        'detail': (selectinload(Movie.movie_reviews).joinedload(MovieReview.user),)
+    },
+    # MoviesReviews.__review_to_dict: review.user
+    MovieReview: {
+        'list': (joinedload(MovieReview.user),),
+        'detail': (joinedload(MovieReview.user),)
+    }
+}
@@ -0,0 +1,132 @@
+"""
+Schema migrations for existing database files:
+db.create_all() only creates missing tables,
+so anything added to an existing table is applied here
+"""
+from sqlalchemy import UniqueConstraint, and_, delete, func, inspect, select, text
+
+from .review_aggregates import create_review_aggregates
+from .search_index import create_movies_search_index
+
+
+def add_missing_columns(db) -> None:
+    """
+    Add the columns declared on the models
+    that an existing table does not have yet.
+    New columns must be nullable or have a server default.
+    :param db: SQLAlchemy
+    """
+    inspector = inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} ' \
+                  f'{column.type.compile(db.engine.dialect)}'
+            if column.server_default is not None:
+                ddl += f' DEFAULT {column.server_default.arg}'
+                if not column.nullable:
+                    ddl += ' NOT NULL'
+            with db.engine.begin() as connection:
+                connection.execute(text(ddl))
+            print(f'{table.name}: added column {column.name}')
+
+
+def create_missing_indexes(db) -> None:
+    """
+    Create the indexes declared on the models
+    that an existing database does not have yet
+    :param db: SQLAlchemy
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def delete_duplicate_rows(db, table, columns) -> list[int]:
+    """
+    Delete the rows duplicating the columns values
+    of an older row, keeping the row with the lowest id.
+    Rows with a NULL in the columns are kept,
+    they do not violate a unique index.
+    :param db: SQLAlchemy
+    :param table: Table
+    :param columns: list of Column
+    :return:
+        ids of the deleted rows (list[int])
+    """
+    first_ids = select(func.min(table.c.id)).group_by(*columns)
+    with db.engine.begin() as connection:
+        duplicate_ids = connection.scalars(
+            select(table.c.id)
+            .where(and_(*(column.is_not(None) for column in columns)),
+                   table.c.id.not_in(first_ids))
+            .order_by(table.c.id)).all()
+        if duplicate_ids:
+            connection.execute(delete(table).where(table.c.id.in_(duplicate_ids)))
+    return duplicate_ids
+
+
+def create_unique_index(db, constraint) -> None:
+    """
+    Create a unique index enforcing a unique constraint,
+    without adding the index to the models metadata
+    :param db: SQLAlchemy
+    :param constraint: UniqueConstraint
+    """
+    quote = db.engine.dialect.identifier_preparer.quote
+    columns = ', '.join(quote(column.name) for column in constraint.columns)
+    with db.engine.begin() as connection:
+        connection.execute(text(f'CREATE UNIQUE INDEX {quote(constraint.name)} '
+                                f'ON {quote(constraint.table.name)} ({columns})'))
+
+
+def create_missing_unique_constraints(db) -> None:
+    """
+    Add the unique constraints declared on the models
+    that an existing table does not have yet.
+    Constraints cannot be added to an existing sqlite table,
+    so they are created as unique indexes, after deleting
+    the duplicates that would violate them.
+    :param db: SQLAlchemy
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {tuple(constraint['column_names'])
+                    for constraint in inspector.get_unique_constraints(table.name)}
+        existing |= {tuple(index['column_names'])
+                     for index in inspector.get_indexes(table.name) if index['unique']}
+
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint):
+                continue
+            columns = list(constraint.columns)
+            if tuple(column.name for column in columns) in existing:
+                continue
+
+            deleted_ids = delete_duplicate_rows(db, table, columns)
+            if deleted_ids:
+                print(f'{table.name}: deleted the duplicate rows with ids '
+                      f'{", ".join(map(str, deleted_ids))} before adding {constraint.name}')
+            create_unique_index(db, constraint)
+
+
+def upgrade_schema(db) -> None:
+    """
+    Bring an existing database up to the models
+    :param db: SQLAlchemy
+    """
+    add_missing_columns(db)
+    create_missing_unique_constraints(db)
+    create_missing_indexes(db)
+    create_movies_search_index(db)
+    create_review_aggregates(db)
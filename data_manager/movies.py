@@ -2,10 +2,14 @@
 Movies class
 Managing Movies' CRUD operations
 """
-from typing import List
+from typing import Iterator, List
 
 from .data_manager_interface import DataManagerInterface
-from .data_models import Movie
+from .data_models import Movie, UserMovie
+from .entity_cache import EntityCache
+from .request_metrics import timed
+from .search_index import build_match_query
+from .user_profiles import UserProfiles
 
 
 class Movies:
@@ -14,10 +18,14 @@ class Movies:
     Implementing Movies' CRUD operations
     """
 
-    def __init__(self, data_manager: DataManagerInterface):
+    def __init__(self, data_manager: DataManagerInterface, cache: EntityCache | None = None,
+                 profiles: UserProfiles | None = None):
         self._data_manager = data_manager
+        self._cache = cache
+        self._profiles = profiles
 
     @staticmethod
+    @timed('serialize')
     def __movie_to_dict(movie) -> dict:
         """
         Convert movie from db object to dict format
@@ -42,9 +50,42 @@ class Movies:
                 "rating": movie.rating,
                 "poster": movie.poster,
                 "website": movie.website,
+                "review_count": movie.review_count,
+                "user_rating": movie.user_rating,
                 "movie_reviews": movie_reviews
                 }
 
+    @staticmethod
+    @timed('serialize')
+    def __movie_to_summary_dict(movie) -> dict:
+        """
+        Convert movie from db object to dict format,
+        without its reviews
+        """
+        return {"id": movie.id,
+                "movie_name": movie.movie_name,
+                "director": movie.director,
+                "year": movie.year,
+                "rating": movie.rating,
+                "poster": movie.poster,
+                "website": movie.website,
+                "review_count": movie.review_count,
+                "user_rating": movie.user_rating
+                }
+
+    def __cache_movie(self, movie: dict) -> dict:
+        """
+        Cache a movie dict, it depends on its reviewers
+        :param movie: dict
+        :return:
+            movie (dict)
+        """
+        if self._cache is not None:
+            self._cache.set('movies', movie['id'], movie,
+                            depends_on=[('users', review['user_id'])
+                                        for review in movie['movie_reviews']])
+        return movie
+
     def get_movies(self) -> List[dict] | None:
         """
         Return a list of movies dict
@@ -58,9 +99,138 @@ class Movies:
 
         movies = []
         for movie in movies_query:
-            movies.append(self.__movie_to_dict(movie))
+            movies.append(self.__cache_movie(self.__movie_to_dict(movie)))
         return movies
 
+    def get_movies_page(self, limit: int, cursor: str | None = None,
+                        filters: list[tuple] | None = None,
+                        sort_by: str | None = None,
+                        descending: bool = False) -> tuple[List[dict], str | None] | None:
+        """
+        Return one page of movies dict
+        filtered and sorted by the database
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None
+        :param descending: bool
+        :return:
+            (Movies (List[dict]), next cursor | None) (tuple) |
+            None
+        """
+        page = self._data_manager.get_page(limit, cursor, filters, sort_by, descending,
+                                           use_case='rows')
+        if page is None:
+            return None
+
+        movies_query, next_cursor = page
+        return [self.__cache_movie(self.__movie_to_dict(movie))
+                for movie in movies_query], next_cursor
+
+    def iter_movies(self, filters: list[tuple] | None = None,
+                    sort_by: str | None = None,
+                    descending: bool = False) -> Iterator[dict]:
+        """
+        Iterate over all movies dict filtered and sorted
+        by the database, for streaming responses.
+        Movies are not put in the entity cache.
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None
+        :param descending: bool
+        :return:
+            Movies (Iterator[dict])
+        """
+        for movie in self._data_manager.iter_items(filters, sort_by, descending):
+            yield self.__movie_to_dict(movie)
+
+    def get_unfavourited_movies_page(self, user_id: int, limit: int,
+                                     cursor: str | None = None,
+                                     sort_by: str | None = None,
+                                     descending: bool = False) \
+            -> tuple[List[dict], str | None] | None:
+        """
+        Return one page of the movies
+        a user has not favourited yet
+        :param user_id: int
+        :param limit: int
+        :param cursor: str | None
+        :param sort_by: str | None
+        :param descending: bool
+        :return:
+            (Movies (List[dict]), next cursor | None) (tuple) |
+            None
+        """
+        page = self._data_manager.get_unlinked_page(UserMovie, 'movie_id',
+                                                    [('user_id', '==', user_id)],
+                                                    limit, cursor,
+                                                    sort_by=sort_by, descending=descending,
+                                                    use_case='rows')
+        if page is None:
+            return None
+
+        movies_query, next_cursor = page
+        return [self.__cache_movie(self.__movie_to_dict(movie))
+                for movie in movies_query], next_cursor
+
+    def get_top_movies(self, by: str, limit: int,
+                       min_reviews: int = 0) -> List[dict] | None:
+        """
+        Return the top movies by a column, without their reviews,
+        in one query served by the (column, id) index
+        :param by: 'user_rating' | 'review_count' | 'rating'
+        :param limit: int
+        :param min_reviews: int, movies with fewer reviews are skipped
+        :return:
+            Movies (List[dict]) |
+            None
+        """
+        if by == 'user_rating':
+            min_reviews = max(min_reviews, 1)  # unreviewed movies have no user rating
+        filters = [('review_count', '>=', min_reviews)] if min_reviews else []
+
+        page = self._data_manager.get_page(limit, filters=filters, sort_by=by,
+                                           descending=True, use_case='summary')
+        if page is None:
+            return None
+        return [self.__movie_to_summary_dict(movie) for movie in page[0]]
+
+    def get_existing_movie_ids(self, movie_ids: list) -> set | None:
+        """
+        Return which of the movie ids exist, in one query
+        :param movie_ids: list
+        :return:
+            existing movie ids (set) |
+            None
+        """
+        if not movie_ids:
+            return set()
+
+        page = self._data_manager.get_page(len(movie_ids), filters=[('id', 'in', movie_ids)],
+                                           use_case='summary')
+        if page is None:
+            return None
+        return {movie.id for movie in page[0]}
+
+    def search_movies(self, search_text: str, limit: int) -> List[dict] | None:
+        """
+        Return the movies matching search text in their
+        name, director or reviews, best match first.
+        The last word matches as a prefix.
+        :param search_text: str
+        :param limit: int
+        :return:
+            Movies (List[dict]) |
+            None
+        """
+        match_query = build_match_query(search_text)
+        if match_query is None:
+            return []
+
+        movies_query = self._data_manager.search(match_query, limit)
+        if movies_query is None:
+            return None
+        return [self.__cache_movie(self.__movie_to_dict(movie)) for movie in movies_query]
+
     def get_movie(self, movie_id: int) -> dict | None:
         """
         Return a specific movie given movie_id
@@ -69,10 +239,30 @@ class Movies:
             Movie (dict) |
             None
         """
+        if self._cache is not None:
+            movie = self._cache.get('movies', movie_id)
+            if movie is not None:
+                return movie
+
         movie = self._data_manager.get_item_by_id(movie_id)
         if not movie:
             return None
-        return self.__movie_to_dict(movie)
+        return self.__cache_movie(self.__movie_to_dict(movie))
+
+    def get_movie_summary(self, movie_id: int) -> dict | None:
+        """
+        Return a specific movie without its reviews,
+        one row however many reviews it has
+        :param movie_id: int
+        :return:
+            Movie (dict) |
+            None
+        """
+        page = self._data_manager.get_page(1, filters=[('id', '==', movie_id)],
+                                           use_case='summary')
+        if not page or not page[0]:
+            return None
+        return self.__movie_to_summary_dict(page[0][0])
 
     @staticmethod
     def __instantiate_new_movie(new_movie_info):
@@ -91,10 +281,42 @@ class Movies:
         :param new_movie_info: dict
         :return:
             True for success add (bool) |
+            False for a movie name already in the database (bool) |
             None
         """
         return self._data_manager.add_item(self.__instantiate_new_movie(new_movie_info))
 
+    def add_pending_movie(self, new_movie_info: dict) -> int | bool | None:
+        """
+        Add a new movie whose details
+        are filled in later, returning its id
+        :param new_movie_info: dict
+        :return:
+            New movie id (int) |
+            False for a movie name already in the database (bool) |
+            None
+        """
+        movie = self.__instantiate_new_movie(new_movie_info)
+        added = self._data_manager.add_item(movie)
+        if not added:
+            return added
+        return movie.id
+
+    def add_new_movies(self, new_movies_info: List[dict]) -> List[bool | None]:
+        """
+        Add many new movies in one transaction
+        :param new_movies_info: List[dict]
+        :return:
+            per movie result (List):
+                True for success add |
+                False for a movie name already in the database |
+                None
+        """
+        return self._data_manager.insert_mappings(
+            [{key: new_movie_info[key]
+              for key in ('movie_name', 'director', 'year', 'rating', 'poster', 'website')}
+             for new_movie_info in new_movies_info])
+
     def update_movie(self, updated_movie: dict):
         """
         Update a movie info
@@ -103,7 +325,12 @@ class Movies:
             True for success update movie (bool) |
             None
         """
-        return self._data_manager.update_item(updated_movie)
+        updated = self._data_manager.update_item(updated_movie)
+        if updated and self._profiles is not None:
+            self._profiles.update_movie(updated_movie['id'])
+        if updated and self._cache is not None:
+            self._cache.invalidate('movies', updated_movie['id'])
+        return updated
 
     def delete_movie(self, movie_id: int) -> bool | None:
         """
@@ -113,4 +340,7 @@ class Movies:
             True for success delete movie (bool) |
             None
         """
-        return self._data_manager.delete_item(movie_id)
+        deleted = self._data_manager.delete_item(movie_id)
+        if deleted and self._cache is not None:
+            self._cache.invalidate('movies', movie_id)
+        return deleted
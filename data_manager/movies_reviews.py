@@ -2,8 +2,12 @@
 MoviesReviews class
 Managing MoviesReviews CRUD operations
 """
+from typing import Iterator
+
 from .data_manager_interface import DataManagerInterface
 from .data_models import MovieReview
+from .entity_cache import EntityCache
+from .recommendations import Recommendations
 
 
 class MoviesReviews:
@@ -12,8 +16,11 @@ class MoviesReviews:
     Implementing MoviesReviews' CRUD operations
     """
 
-    def __init__(self, data_manager: DataManagerInterface):
+    def __init__(self, data_manager: DataManagerInterface, cache: EntityCache | None = None,
+                 recommendations: Recommendations | None = None):
         self._data_manager = data_manager
+        self._cache = cache
+        self._recommendations = recommendations
 
     @staticmethod
     def __review_to_dict(review) -> dict:
@@ -47,6 +54,77 @@ class MoviesReviews:
             reviews.append(self.__review_to_dict(review))
         return reviews
 
+    def get_movie_reviews_page(self, movie_id: int, limit: int,
+                               cursor: str | None = None,
+                               sort_by: str | None = None,
+                               descending: bool = False) -> tuple[list[dict], str | None] | None:
+        """
+        Return one page of a movie's reviews
+        :param movie_id: int
+        :param limit: int
+        :param cursor: str | None
+        :param sort_by: 'id' | 'rating' | None
+        :param descending: bool
+        :return:
+            (MovieReviews (list[dict]), next cursor | None) (tuple) |
+            None
+        """
+        page = self._data_manager.get_page(limit, cursor,
+                                           [('movie_id', '==', movie_id)],
+                                           sort_by, descending, use_case='rows')
+        if page is None:
+            return None
+
+        reviews_query, next_cursor = page
+        return [self.__review_to_dict(review) for review in reviews_query], next_cursor
+
+    def iter_movie_reviews(self, movie_id: int,
+                           sort_by: str | None = None,
+                           descending: bool = False) -> Iterator[dict]:
+        """
+        Iterate over all a movie's reviews, for streaming responses
+        :param movie_id: int
+        :param sort_by: 'id' | 'rating' | None
+        :param descending: bool
+        :return:
+            MovieReviews (Iterator[dict])
+        """
+        for review in self._data_manager.iter_items([('movie_id', '==', movie_id)],
+                                                    sort_by, descending):
+            yield self.__review_to_dict(review)
+
+    def has_user_reviewed(self, user_id: int, movie_id: int) -> bool:
+        """
+        Check if a user already reviewed a movie
+        :param user_id: int
+        :param movie_id: int
+        :return:
+            True or False (bool)
+        """
+        page = self._data_manager.get_page(1, filters=[('movie_id', '==', movie_id),
+                                                       ('user_id', '==', user_id)])
+        return bool(page and page[0])
+
+    def get_reviewed_movie_ids(self, user_id: int, movie_ids: list) -> set | None:
+        """
+        Return which of the movies a user already reviewed, in one query
+        :param user_id: int
+        :param movie_ids: list
+        :return:
+            reviewed movie ids (set) |
+            None
+        """
+        if not movie_ids:
+            return set()
+
+        page = self._data_manager.get_page(len(movie_ids),
+                                           filters=[('user_id', '==', user_id),
+                                                    ('movie_id', 'in', movie_ids)],
+                                           use_case='summary')
+        if page is None:
+            return None
+        return {review.movie_id for review in page[0]}
+
     @staticmethod
     def __instantiate_new_movie(new_movie_review):
         return MovieReview(
@@ -62,6 +140,36 @@ class MoviesReviews:
         :param new_movie_review: dict
         :return:
             True for success add (bool) |
+            False for a movie already reviewed by the user (bool) |
             None
         """
-        return self._data_manager.add_item(self.__instantiate_new_movie(new_movie_review))
+        added = self._data_manager.add_item(self.__instantiate_new_movie(new_movie_review))
+        if added and self._cache is not None:
+            # the movie dict embeds its reviews
+            self._cache.invalidate('movies', new_movie_review['movie_id'])
+        if added and self._recommendations is not None:
+            # the rating weighs the user's favourite
+            self._recommendations.update_movie(new_movie_review['movie_id'])
+        return added
+
+    def add_movie_reviews(self, new_movie_reviews: list[dict]) -> list[bool | None]:
+        """
+        Add many movie reviews in one transaction
+        :param new_movie_reviews: list[dict]
+        :return:
+            per review result (list):
+                True for added |
+                False for a movie already reviewed by the user |
+                None for other errors
+        """
+        results = self._data_manager.add_items(
+            [self.__instantiate_new_movie(new_movie_review)
+             for new_movie_review in new_movie_reviews])
+        added = [new_movie_review['movie_id']
+                 for new_movie_review, result in zip(new_movie_reviews, results) if result]
+        if self._cache is not None:
+            for movie_id in set(added):
+                self._cache.invalidate('movies', movie_id)
+        if added and self._recommendations is not None:
+            self._recommendations.update_movies(added)
+        return results
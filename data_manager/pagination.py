@@ -0,0 +1,74 @@
+"""
+Keyset pagination helpers shared by the data managers:
+cursor tokens encoding and filter operators
+"""
+import base64
+import binascii
+import json
+import operator
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def is_in(value, values) -> bool:
+    """
+    value IN values, as SQL for a column
+    and in Python for a json item value
+    """
+    if hasattr(value, 'in_'):
+        return value.in_(values)
+    return value in values
+
+
+FILTER_OPERATORS = {
+    '==': operator.eq,
+    '>=': operator.ge,
+    '<=': operator.le,
+    'in': is_in
+}
+
+
+def encode_cursor(sort_by: str, descending: bool, values: list) -> str:
+    """
+    Encode the sort key of the last item of a page
+    into an opaque url safe cursor token
+    :param sort_by: str
+    :param descending: bool
+    :param values: [sort value, id] (list)
+    :return:
+        cursor token (str)
+    """
+    payload = json.dumps({'s': sort_by, 'd': descending, 'v': values})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool) -> list | None:
+    """
+    Decode a cursor token created by encode_cursor
+    :param cursor: str
+    :param sort_by: str
+    :param descending: bool
+    :return:
+        [sort value, id] (list) |
+        None for an invalid token, a token
+        created for another sort order
+        or values that are not a sort value and an id
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+
+    if not isinstance(payload, dict) \
+            or payload.get('s') != sort_by \
+            or payload.get('d') != descending:
+        return None
+
+    values = payload.get('v')
+    if not isinstance(values, list) or len(values) != 2 \
+            or not isinstance(values[1], (int, str)) \
+            or isinstance(values[0], (list, dict)):
+        return None
+    return values
@@ -0,0 +1,197 @@
+"""
+Read-only projections per entity and use case.
+A projected listing selects only the columns its dict serializer
+reads, as Core rows mapped to __slots__ dataclasses, instead of
+hydrating ORM instances (identity map entries, change tracking,
+relationship proxies) that are only copied into dicts.
+The row classes have the attributes the serializers of Users,
+Movies and MoviesReviews read, so they serialize like the ORM
+instances, and the nested rows (a user's favourites, a movie's
+reviews) are loaded in one IN query per page, like selectinload.
+Rows are snapshots: they are not tracked and do not lazy load.
+'rows' is used for get_page(use_case='rows') listings,
+'summary' replaces the movies summary listing
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from .data_models import User, Movie, UserMovie, MovieReview
+
+
+@dataclass(slots=True, frozen=True)
+class MovieRow:
+    """
+    A movie, with its reviews in the 'rows' listing
+    """
+    id: int
+    movie_name: str | None
+    director: str | None
+    year: int | None
+    rating: float | None
+    poster: str | None
+    website: str | None
+    review_count: int
+    user_rating: float | None
+    movie_reviews: tuple = ()
+
+
+@dataclass(slots=True, frozen=True)
+class ReviewUserRow:
+    """
+    The author of a review
+    """
+    id: int | None
+    user_name: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class ReviewRow:
+    """
+    A movie review and its author
+    """
+    id: int
+    user_id: int | None
+    movie_id: int | None
+    review_text: str | None
+    rating: float | None
+    user: ReviewUserRow
+
+
+@dataclass(slots=True, frozen=True)
+class FavouriteRow:
+    """
+    A users_movies row and its movie
+    """
+    id: int
+    movie: MovieRow
+
+
+@dataclass(slots=True, frozen=True)
+class UserRow:
+    """
+    A user and its favourite movies
+    """
+    id: int
+    user_name: str | None
+    movies: tuple = ()
+
+
+MOVIE_COLUMNS = (Movie.id, Movie.movie_name, Movie.director, Movie.year, Movie.rating,
+                 Movie.poster, Movie.website, Movie.review_count, Movie.user_rating)
+REVIEW_COLUMNS = (MovieReview.id, MovieReview.user_id, MovieReview.movie_id,
+                  MovieReview.review_text, MovieReview.rating, User.user_name)
+
+
+def review_row(row) -> ReviewRow:
+    """
+    Map a row of REVIEW_COLUMNS
+    """
+    review_id, user_id, movie_id, review_text, rating, user_name = row
+    return ReviewRow(review_id, user_id, movie_id, review_text, rating,
+                     ReviewUserRow(user_id, user_name))
+
+
+def group_rows(rows, map_row) -> dict:
+    """
+    Group (parent id, *columns) rows by parent id
+    :return:
+        parent id -> tuple of mapped rows (dict)
+    """
+    groups = {}
+    for parent_id, *columns in rows:
+        groups.setdefault(parent_id, []).append(map_row(columns))
+    return {parent_id: tuple(children) for parent_id, children in groups.items()}
+
+
+class Projection:
+    """
+    The columns selected for a listing
+    and the mapping of its rows
+    """
+
+    def __init__(self, columns: tuple, map_rows, outer_joins: tuple = ()):
+        self._columns = columns
+        self._map_rows = map_rows
+        self._outer_joins = outer_joins
+
+    def query(self, session):
+        """
+        Return a query of the columns,
+        filtered and ordered like an entity query
+        :param session: Session
+        :return:
+            Query
+        """
+        query = session.query(*self._columns)
+        for target, on_clause in self._outer_joins:
+            query = query.outerjoin(target, on_clause)
+        return query
+
+    def rows(self, session, rows: list) -> list:
+        """
+        Map the rows of the query
+        :param session: Session, for the nested rows
+        :param rows: list of Row
+        :return:
+            rows (list of dataclasses)
+        """
+        return self._map_rows(session, rows)
+
+
+def movie_summary_rows(_session, rows: list) -> list[MovieRow]:
+    """
+    Movies without their reviews, no nested query
+    """
+    return [MovieRow(*row) for row in rows]
+
+
+def movie_rows(session, rows: list) -> list[MovieRow]:
+    """
+    Movies with their reviews and the reviews authors
+    """
+    reviews = group_rows(session.execute(
+        select(MovieReview.movie_id, *REVIEW_COLUMNS)
+        .outerjoin(User, MovieReview.user)
+        .where(MovieReview.movie_id.in_([row.id for row in rows]))
+        .order_by(MovieReview.id)), review_row) if rows else {}
+    return [MovieRow(*row, reviews.get(row.id, ())) for row in rows]
+
+
+def user_rows(session, rows: list) -> list[UserRow]:
+    """
+    Users with their favourite movies
+    """
+    favourites = group_rows(session.execute(
+        select(UserMovie.user_id, UserMovie.id, *MOVIE_COLUMNS)
+        .join(Movie, UserMovie.movie)
+        .where(UserMovie.user_id.in_([row.id for row in rows]))
+        .order_by(UserMovie.id)),
+        lambda columns: FavouriteRow(columns[0], MovieRow(*columns[1:]))) if rows else {}
+    return [UserRow(row.id, row.user_name, favourites.get(row.id, ())) for row in rows]
+
+
+def review_rows(_session, rows: list) -> list[ReviewRow]:
+    """
+    Reviews with their authors, joined in the listing query
+    """
+    return [review_row(row) for row in rows]
+
+
+PROJECTIONS = {
+    # Users.__user_to_dict: user.movies -> user_movie.movie
+    User: {
+        'rows': Projection((User.id, User.user_name), user_rows)
+    },
+    # Movies.__movie_to_dict: movie.movie_reviews -> review.user
+    Movie: {
+        'rows': Projection(MOVIE_COLUMNS, movie_rows),
+        # Movies.__movie_to_summary_dict: no relationship
+        'summary': Projection(MOVIE_COLUMNS, movie_summary_rows)
+    },
+    # MoviesReviews.__review_to_dict: review.user
+    MovieReview: {
+        'rows': Projection(REVIEW_COLUMNS, review_rows,
+                           outer_joins=((User, MovieReview.user),))
+    }
+}
@@ -0,0 +1,55 @@
+"""
+QueryCounter: counts the SQL statements executed on an engine,
+used to assert that a code path runs a bounded number of queries
+"""
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    Context manager recording every statement
+    executed on the engine while it is active
+
+    with QueryCounter(db.engine) as counter:
+        users_data_manager.get_all_users()
+    assert counter.count == 2, counter.statements
+    """
+
+    def __init__(self, engine):
+        self._engine = engine
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        """
+        Number of executed statements
+        """
+        return len(self.statements)
+
+    def _before_cursor_execute(self, _conn, _cursor, statement, *_args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self._engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *_exc_info):
+        event.remove(self._engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+def assert_max_queries(engine, max_count: int, func, *args, **kwargs):
+    """
+    Call func and fail when it executes
+    more than max_count statements
+    :param engine: Engine
+    :param max_count: int
+    :param func: callable
+    :return:
+        func result
+    """
+    with QueryCounter(engine) as counter:
+        result = func(*args, **kwargs)
+    assert counter.count <= max_count, \
+        f'{counter.count} queries executed, expected at most {max_count}:\n' + \
+        '\n'.join(counter.statements)
+    return result
@@ -0,0 +1,323 @@
+"""
+Recommendations class
+Item-item collaborative filtering over users' favourites:
+each user is a sparse vector of the movies they favourited,
+weighted by their review rating when they reviewed the movie.
+The cosine similarity of every pair of movies sharing a user
+is computed from the sparse users -> movies index,
+one movie row at a time, and only the top K neighbours
+of each movie are stored in movie_neighbours.
+Serving a user's recommendations is then one indexed query.
+
+Adding or deleting a favourite changes one movie's vector only,
+so update_movie recomputes that movie's row exactly and fixes its
+score in the neighbour lists of the movies sharing a user with it.
+A neighbour list may miss a candidate that was below its top K
+until the next rebuild (flask rebuild-recommendations).
+Both bump the movie_neighbours version, part of the
+recommendations ETag.
+"""
+import math
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .data_models import MovieNeighbour
+
+# a favourite weighs 1, scaled from 0.5 to 1.5 by the user's review rating (0 - 10)
+WEIGHT_SQL = "CASE WHEN r.rating IS NULL THEN 1.0 ELSE 0.5 + r.rating / 10.0 END"
+
+WEIGHTS_SQL = f"SELECT um.user_id, um.movie_id, {WEIGHT_SQL} AS weight " \
+              "FROM users_movies um LEFT JOIN movies_reviews r " \
+              "ON r.user_id = um.user_id AND r.movie_id = um.movie_id"
+
+MOVIE_SUMMARY_COLUMNS = ('id', 'movie_name', 'director', 'year', 'rating',
+                         'poster', 'website', 'review_count', 'user_rating')
+
+IN_CHUNK_SIZE = 500  # bound parameters per IN (...) list
+
+
+def chunks(values: list, size: int = IN_CHUNK_SIZE):
+    """
+    Split values in lists of at most size values
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Recommendations:
+    """
+    A class computing and serving
+    movie recommendations
+    """
+
+    def __init__(self, db, top_k: int = 20, max_user_movies: int = 1000, versions=None):
+        self._db = db
+        self._top_k = top_k
+        # users with more favourites are left out of the similarities:
+        # their pairs cost the most and say the least
+        self._max_user_movies = max_user_movies
+        self._versions = versions
+
+    def _commit(self) -> None:
+        """
+        Commit the session and bump the movie_neighbours version
+        """
+        self._db.session.commit()
+        if self._versions is not None:
+            self._versions.bump(MovieNeighbour.__tablename__)
+
+    def _top_neighbours(self, movie_id: int, dots: dict, norms: dict) -> list[dict]:
+        """
+        Return the top K neighbours of a movie
+        given its dot products with the other movies
+        :return:
+            movie_neighbours rows (list[dict])
+        """
+        scores = [(dot / math.sqrt(norms[movie_id] * norms[neighbour_id]), neighbour_id)
+                  for neighbour_id, dot in dots.items()]
+        scores.sort(key=lambda score: (-score[0], score[1]))
+        return [{'movie_id': movie_id, 'neighbour_id': neighbour_id, 'score': score}
+                for score, neighbour_id in scores[:self._top_k]]
+
+    def _load_weights(self, where: str = '', params: dict | None = None):
+        """
+        Return the favourites weights as
+        user -> {movie: weight} and movie -> {user: weight}
+        :return:
+            (user movies (dict), movie users (dict)) (tuple)
+        """
+        user_movies = defaultdict(dict)
+        movie_users = defaultdict(dict)
+        for user_id, movie_id, weight in self._db.session.execute(text(WEIGHTS_SQL + where),
+                                                                  params or {}):
+            user_movies[user_id][movie_id] = weight
+            movie_users[movie_id][user_id] = weight
+        return user_movies, movie_users
+
+    def _dot_products(self, movie_id: int, user_movies: dict, movie_users: dict) -> dict:
+        """
+        Return the dot products of a movie
+        with the movies sharing a user with it
+        :return:
+            neighbour id -> dot product (dict)
+        """
+        dots = defaultdict(float)
+        for user_id, weight in movie_users[movie_id].items():
+            movies = user_movies[user_id]
+            if len(movies) > self._max_user_movies:
+                continue
+            for neighbour_id, neighbour_weight in movies.items():
+                if neighbour_id != movie_id:
+                    dots[neighbour_id] += weight * neighbour_weight
+        return dots
+
+    def rebuild(self) -> int | None:
+        """
+        Recompute the neighbours of every movie
+        :return:
+            number of stored neighbours (int) |
+            None
+        """
+        try:
+            user_movies, movie_users = self._load_weights()
+            norms = {movie_id: sum(weight * weight for weight in users.values())
+                     for movie_id, users in movie_users.items()}
+
+            self._db.session.execute(text('DELETE FROM movie_neighbours'))
+            count = 0
+            batch = []
+            for movie_id in movie_users:
+                batch.extend(self._top_neighbours(
+                    movie_id, self._dot_products(movie_id, user_movies, movie_users), norms))
+                if len(batch) >= 5000:
+                    self._insert(batch)
+                    count += len(batch)
+                    batch = []
+            self._insert(batch)
+            count += len(batch)
+            self._commit()
+            return count
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def ensure_built(self) -> None:
+        """
+        Build the neighbours of an existing database
+        that has favourites but no neighbours yet
+        """
+        has_neighbours = self._db.session.execute(
+            text('SELECT 1 FROM movie_neighbours LIMIT 1')).first() is not None
+        has_favourites = self._db.session.execute(
+            text('SELECT 1 FROM users_movies LIMIT 1')).first() is not None
+        if has_favourites and not has_neighbours:
+            self.rebuild()
+
+    def _insert(self, rows: list[dict]) -> None:
+        if rows:
+            self._db.session.execute(
+                text('INSERT INTO movie_neighbours (movie_id, neighbour_id, score) '
+                     'VALUES (:movie_id, :neighbour_id, :score)'), rows)
+
+    def _norms(self, movie_ids: list) -> dict:
+        """
+        Return the squared norms of the movies vectors
+        :return:
+            movie id -> squared norm (dict)
+        """
+        norms = {}
+        for chunk in chunks(movie_ids):
+            params = {f'm{index}': movie_id for index, movie_id in enumerate(chunk)}
+            placeholders = ', '.join(f':{name}' for name in params)
+            norms.update(self._db.session.execute(text(
+                f'SELECT um.movie_id, SUM(({WEIGHT_SQL}) * ({WEIGHT_SQL})) '
+                'FROM users_movies um LEFT JOIN movies_reviews r '
+                'ON r.user_id = um.user_id AND r.movie_id = um.movie_id '
+                f'WHERE um.movie_id IN ({placeholders}) GROUP BY um.movie_id'), params).all())
+        return norms
+
+    def _update_neighbour_lists(self, movie_id: int, scores: dict) -> None:
+        """
+        Set the score of movie_id in the neighbour lists
+        of the movies sharing a user with it, keeping
+        each list to its top K
+        :param movie_id: int
+        :param scores: neighbour id -> new similarity (dict)
+        """
+        self._db.session.execute(text('DELETE FROM movie_neighbours WHERE neighbour_id = :m'),
+                                 {'m': movie_id})
+
+        inserts, full_lists = [], []
+        for chunk in chunks(list(scores)):
+            params = {f'm{index}': neighbour_id for index, neighbour_id in enumerate(chunk)}
+            placeholders = ', '.join(f':{name}' for name in params)
+            lists = {row[0]: row[1:] for row in self._db.session.execute(text(
+                'SELECT movie_id, COUNT(*), MIN(score) FROM movie_neighbours '
+                f'WHERE movie_id IN ({placeholders}) GROUP BY movie_id'), params)}
+            for neighbour_id in chunk:
+                count, lowest = lists.get(neighbour_id, (0, None))
+                if count < self._top_k or scores[neighbour_id] > lowest:
+                    inserts.append({'movie_id': neighbour_id, 'neighbour_id': movie_id,
+                                    'score': scores[neighbour_id]})
+                    if count >= self._top_k:
+                        full_lists.append({'j': neighbour_id})
+
+        self._insert(inserts)
+        if full_lists:
+            self._db.session.execute(text(
+                'DELETE FROM movie_neighbours WHERE movie_id = :j AND neighbour_id = '
+                '(SELECT neighbour_id FROM movie_neighbours WHERE movie_id = :j '
+                'ORDER BY score, neighbour_id DESC LIMIT 1)'), full_lists)
+
+    def _update_movie(self, movie_id: int) -> None:
+        """
+        Recompute the neighbours of a movie
+        and its score in the other movies' lists
+        :param movie_id: int
+        """
+        user_movies, movie_users = self._load_weights(
+            ' WHERE um.user_id IN (SELECT user_id FROM users_movies WHERE movie_id = :m)',
+            {'m': movie_id})
+        dots = self._dot_products(movie_id, user_movies, movie_users)
+        norms = self._norms(list(dots))
+        norms[movie_id] = sum(weight * weight
+                              for weight in movie_users[movie_id].values())
+
+        self._db.session.execute(text('DELETE FROM movie_neighbours WHERE movie_id = :m'),
+                                 {'m': movie_id})
+        self._insert(self._top_neighbours(movie_id, dots, norms))
+        self._update_neighbour_lists(
+            movie_id, {neighbour_id: dot / math.sqrt(norms[movie_id] * norms[neighbour_id])
+                       for neighbour_id, dot in dots.items()})
+
+    def update_movie(self, movie_id: int) -> bool | None:
+        """
+        Update the neighbours after a favourite
+        or a review of a movie was added or deleted
+        :param movie_id: int
+        :return:
+            True for success update (bool) |
+            None
+        """
+        return self.update_movies([movie_id])
+
+    def update_movies(self, movie_ids: list) -> bool | None:
+        """
+        Update the neighbours of many movies in one transaction,
+        after a batch of favourites or reviews
+        :param movie_ids: list
+        :return:
+            True for success update (bool) |
+            None
+        """
+        try:
+            for movie_id in dict.fromkeys(movie_ids):
+                self._update_movie(movie_id)
+            self._commit()
+            return True
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def get_user_recommendations(self, user_id: int, limit: int) -> list[dict] | None:
+        """
+        Return the movies most similar to a user's favourites
+        that the user has not favourited, in one query
+        :param user_id: int
+        :param limit: int
+        :return:
+            Movies with their score (list[dict]) |
+            None
+        """
+        columns = ', '.join(f'm.{column}' for column in MOVIE_SUMMARY_COLUMNS)
+        try:
+            rows = self._db.session.execute(text(
+                f'SELECT {columns}, SUM(n.score) AS score '
+                'FROM users_movies um '
+                'JOIN movie_neighbours n ON n.movie_id = um.movie_id '
+                'JOIN movies m ON m.id = n.neighbour_id '
+                'WHERE um.user_id = :user_id AND NOT EXISTS ('
+                'SELECT 1 FROM users_movies f '
+                'WHERE f.user_id = :user_id AND f.movie_id = n.neighbour_id) '
+                f'GROUP BY {columns} ORDER BY score DESC, m.id LIMIT :limit'),
+                {'user_id': user_id, 'limit': limit}).mappings().all()
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+        return [dict(row) for row in rows]
+
+    def get_similar_movies(self, movie_ids: list, limit: int) -> dict | None:
+        """
+        Return the most similar movies of each movie
+        ("users who favourited this also favourited")
+        :param movie_ids: list
+        :param limit: similar movies per movie (int)
+        :return:
+            movie id -> list of {"id", "movie_name", "score"} (dict) |
+            None
+        """
+        similar = defaultdict(list)
+        try:
+            for chunk in chunks(movie_ids):
+                params = {f'm{index}': movie_id for index, movie_id in enumerate(chunk)}
+                placeholders = ', '.join(f':{name}' for name in params)
+                rows = self._db.session.execute(text(
+                    'SELECT n.movie_id, m.id, m.movie_name, n.score '
+                    'FROM movie_neighbours n JOIN movies m ON m.id = n.neighbour_id '
+                    f'WHERE n.movie_id IN ({placeholders}) '
+                    'ORDER BY n.movie_id, n.score DESC, m.id'), params)
+                for movie_id, neighbour_id, movie_name, score in rows:
+                    if len(similar[movie_id]) < limit:
+                        similar[movie_id].append({'id': neighbour_id,
+                                                  'movie_name': movie_name,
+                                                  'score': score})
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+        return dict(similar)
@@ -0,0 +1,144 @@
+"""
+ReplicaRouter class
+Read/write splitting: SQLiteDataManager reads go to a replica
+engine (a read-only copy of the SQLite file or a replica DSN)
+and writes go to the primary, db.session.
+
+Replicas lag behind the primary, so reads go to the primary
+while a write may not have reached the replicas yet:
+- in this process for DATABASE_REPLICA_LAG seconds after any write,
+  its own or, with DatabaseResourceVersions, another process's,
+  so the entity and page caches are not filled from stale rows;
+- for the client that wrote, for the same time, through a cookie,
+  so the redirect after a form post shows the new row
+  whichever worker serves it.
+"""
+import random
+import threading
+import time
+
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from .sqlite_pragmas import set_sqlite_pragmas
+
+STICKY_COOKIE = 'read_primary_until'
+
+# writer settings, left to the primary
+PRIMARY_ONLY_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+class ReplicaRouter:
+    """
+    A class choosing the session
+    that serves the reads
+    """
+
+    def __init__(self, db, replica_lag: float = 5.0):
+        self._db = db
+        self._replica_lag = replica_lag
+        self._sessionmakers = []
+        self.engines = []
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Create the replica engines of DATABASE_REPLICA_URLS
+        and register the request hooks
+        :param app: Flask
+        """
+        self._replica_lag = app.config.get('DATABASE_REPLICA_LAG', self._replica_lag)
+        # replicas are pooled like the primary
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        pragmas = {name: value for name, value in app.config.get('SQLITE_PRAGMAS', {}).items()
+                   if name not in PRIMARY_ONLY_PRAGMAS}
+        for url in app.config.get('DATABASE_REPLICA_URLS', []):
+            engine = create_engine(url, **engine_options)
+            set_sqlite_pragmas(engine, pragmas)
+            self.engines.append(engine)
+            self._sessionmakers.append(sessionmaker(bind=engine))
+
+        app.before_request(self._read_sticky_cookie)
+        app.after_request(self._set_sticky_cookie)
+        app.teardown_appcontext(self._close_session)
+
+    def mark_written(self) -> None:
+        """
+        Send the reads to the primary until
+        the write has reached the replicas
+        """
+        now = time.time()
+        with self._lock:
+            self._last_write = now
+        if has_request_context():
+            g.read_primary_until = now + self._replica_lag
+            g.wrote = True
+
+    def mark_written_at(self, written_at: float) -> None:
+        """
+        Send the reads to the primary until the write
+        of another process has reached the replicas
+        :param written_at: unix time of the write
+        """
+        with self._lock:
+            self._last_write = max(self._last_write, written_at)
+
+    def reads_primary(self) -> bool:
+        """
+        Check if the reads of the current
+        context must go to the primary
+        :return:
+            True or False (bool)
+        """
+        if not self._sessionmakers or not has_app_context():
+            return True
+
+        now = time.time()
+        with self._lock:
+            if now < self._last_write + self._replica_lag:
+                return True
+        return now < g.get('read_primary_until', 0.0)
+
+    def read_session(self):
+        """
+        Return the session serving the reads,
+        one replica per app context
+        :return:
+            Session
+        """
+        if self.reads_primary():
+            return self._db.session
+
+        if '_replica_session' not in g:
+            g._replica_session = random.choice(self._sessionmakers)()
+        return g._replica_session
+
+    def _read_sticky_cookie(self) -> None:
+        """
+        Read the stickiness of the client,
+        a time beyond the replica lag is ignored
+        """
+        try:
+            until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return
+        if until <= time.time() + self._replica_lag:
+            g.read_primary_until = until
+
+    def _set_sticky_cookie(self, response):
+        """
+        Keep the client that wrote on the primary
+        """
+        if g.get('wrote'):
+            response.set_cookie(STICKY_COOKIE, f'{g.read_primary_until:.3f}',
+                                max_age=int(self._replica_lag) + 1,
+                                httponly=True, samesite='Lax')
+        return response
+
+    @staticmethod
+    def _close_session(_error=None) -> None:
+        session = g.pop('_replica_session', None)
+        if session is not None:
+            session.close()
@@ -0,0 +1,285 @@
+"""
+RequestMetrics class
+Opt-in per-request instrumentation: the SQL statements
+executed (count, total time, slowest), the time spent
+serializing entities to dicts and rendering templates.
+
+Each request gets a Server-Timing header and a JSON log line,
+the totals are served at /metrics in Prometheus text format,
+and statements slower than SLOW_QUERY_MS are logged.
+The timings of a request are collected in a context variable,
+so nothing is recorded outside an instrumented request
+but the slow statements.
+"""
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import Response, before_render_template, g, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger('movieflix.metrics')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Timings of one request
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+        self.render_started_at = None
+
+    def add_query(self, seconds: float, statement: str) -> None:
+        """
+        Record an executed statement
+        """
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        """
+        Add time spent in a phase, e.g. 'serialize'
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def timed(phase: str):
+    """
+    Decorate a function to add its run time to a phase
+    of the current request timings, a plain call without them
+    :param phase: str
+    :return:
+        decorator
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            timings = current_timings.get()
+            if timings is None:
+                return function(*args, **kwargs)
+
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.add_phase(phase, time.perf_counter() - started_at)
+
+        return wrapper
+
+    return decorator
+
+
+def escape_label(value: str) -> str:
+    """
+    Escape a Prometheus label value
+    """
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class RequestMetrics:
+    """
+    A class instrumenting the requests
+    of a Flask app and its engines
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0):
+        self._slow_query_seconds = slow_query_ms / 1000
+        self._lock = threading.Lock()
+        self._requests = {}  # (method, endpoint, status) -> count
+        self._endpoints = {}  # endpoint -> totals and duration buckets
+        self._slow_queries = 0
+
+    def init_app(self, app, engines: list) -> None:
+        """
+        Listen to the statements of engines,
+        register the request hooks and the /metrics endpoint
+        :param app: Flask
+        :param engines: list of Engine, the primary and the replicas
+        """
+        self._slow_query_seconds = app.config.get('SLOW_QUERY_MS',
+                                                  self._slow_query_seconds * 1000) / 1000
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._stop)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_response)
+
+        if not logger.hasHandlers():
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def _before_cursor_execute(conn, _cursor, _statement, *_args):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, _cursor, statement, *_args):
+        seconds = time.perf_counter() - conn.info['query_started_at'].pop()
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_query(seconds, statement)
+
+        if 0 < self._slow_query_seconds <= seconds:
+            with self._lock:
+                self._slow_queries += 1
+            logger.warning(json.dumps({'event': 'slow_query',
+                                       'duration_ms': round(seconds * 1000, 3),
+                                       'statement': statement,
+                                       'path': request.path if timings is not None else None}))
+
+    @staticmethod
+    def _start() -> None:
+        g._request_timings_token = current_timings.set(RequestTimings())
+
+    @staticmethod
+    def _stop(_error=None) -> None:
+        token = g.pop('_request_timings_token', None)
+        if token is not None:
+            current_timings.reset(token)
+
+    @staticmethod
+    def _before_render(_app, **_extra) -> None:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.render_started_at = time.perf_counter()
+
+    @staticmethod
+    def _after_render(_app, **_extra) -> None:
+        timings = current_timings.get()
+        if timings is not None and timings.render_started_at is not None:
+            timings.add_phase('render', time.perf_counter() - timings.render_started_at)
+            timings.render_started_at = None
+
+    def _finish(self, response):
+        """
+        Add the Server-Timing header, log the request
+        and add it to the totals
+        """
+        timings = current_timings.get()
+        if timings is None:
+            return response
+
+        seconds = time.perf_counter() - timings.started_at
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;desc="{timings.queries} queries";dur={timings.db_seconds * 1000:.2f}',
+            f'db-slowest;dur={timings.slowest_seconds * 1000:.2f}',
+            *(f'{phase};dur={phase_seconds * 1000:.2f}'
+              for phase, phase_seconds in timings.phases.items()),
+            f'total;dur={seconds * 1000:.2f}'])
+
+        endpoint = request.endpoint or 'unknown'
+        logger.info(json.dumps({'event': 'request',
+                                'method': request.method,
+                                'path': request.path,
+                                'endpoint': endpoint,
+                                'status': response.status_code,
+                                'duration_ms': round(seconds * 1000, 3),
+                                'queries': timings.queries,
+                                'db_ms': round(timings.db_seconds * 1000, 3),
+                                'slowest_query_ms': round(timings.slowest_seconds * 1000, 3),
+                                'slowest_query': timings.slowest_statement,
+                                **{f'{phase}_ms': round(phase_seconds * 1000, 3)
+                                   for phase, phase_seconds in timings.phases.items()}}))
+        self._add(request.method, endpoint, response.status_code, seconds, timings)
+        return response
+
+    def _add(self, method: str, endpoint: str, status: int, seconds: float,
+             timings: RequestTimings) -> None:
+        """
+        Add a request to the totals
+        """
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            totals = self._endpoints.setdefault(endpoint, {
+                'buckets': [0] * (len(DURATION_BUCKETS) + 1),
+                'seconds': 0.0, 'count': 0, 'queries': 0, 'db_seconds': 0.0,
+                'phases': {}})
+            bucket = next((index for index, bound in enumerate(DURATION_BUCKETS)
+                           if seconds <= bound), len(DURATION_BUCKETS))
+            totals['buckets'][bucket] += 1
+            totals['seconds'] += seconds
+            totals['count'] += 1
+            totals['queries'] += timings.queries
+            totals['db_seconds'] += timings.db_seconds
+            for phase, phase_seconds in timings.phases.items():
+                totals['phases'][phase] = totals['phases'].get(phase, 0.0) + phase_seconds
+
+    def metrics_text(self) -> str:
+        """
+        Return the totals in Prometheus text format
+        :return:
+            metrics (str)
+        """
+        lines = []
+
+        def metric(name: str, metric_type: str, description: str, samples: list) -> None:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{label}="{escape_label(label_value)}"'
+                                      for label, label_value in labels.items())
+                lines.append(f'{name}{suffix}{{{label_text}}} {value}' if label_text
+                             else f'{name}{suffix} {value}')
+
+        with self._lock:
+            metric('movieflix_requests_total', 'counter', 'Requests served.',
+                   [('', {'method': method, 'endpoint': endpoint, 'status': status}, count)
+                    for (method, endpoint, status), count in sorted(self._requests.items())])
+
+            durations = []
+            for endpoint, totals in sorted(self._endpoints.items()):
+                count = 0
+                for bound, bucket_count in zip([*map(str, DURATION_BUCKETS), '+Inf'],
+                                               totals['buckets']):
+                    count += bucket_count
+                    durations.append(('_bucket', {'endpoint': endpoint, 'le': bound}, count))
+                durations.append(('_sum', {'endpoint': endpoint}, totals['seconds']))
+                durations.append(('_count', {'endpoint': endpoint}, totals['count']))
+            metric('movieflix_request_duration_seconds', 'histogram',
+                   'Request duration.', durations)
+
+            metric('movieflix_request_db_queries_total', 'counter', 'SQL statements executed.',
+                   [('', {'endpoint': endpoint}, totals['queries'])
+                    for endpoint, totals in sorted(self._endpoints.items())])
+            metric('movieflix_request_db_seconds_total', 'counter', 'Time spent in SQL.',
+                   [('', {'endpoint': endpoint}, totals['db_seconds'])
+                    for endpoint, totals in sorted(self._endpoints.items())])
+            metric('movieflix_request_phase_seconds_total', 'counter',
+                   'Time spent serializing entities and rendering templates.',
+                   [('', {'endpoint': endpoint, 'phase': phase}, phase_seconds)
+                    for endpoint, totals in sorted(self._endpoints.items())
+                    for phase, phase_seconds in sorted(totals['phases'].items())])
+            metric('movieflix_slow_queries_total', 'counter',
+                   'SQL statements slower than SLOW_QUERY_MS.', [('', {}, self._slow_queries)])
+        return '\n'.join(lines) + '\n'
+
+    def metrics_response(self):
+        """
+        GET /metrics
+        :return:
+            metrics (Prometheus text format)
+        """
+        return Response(self.metrics_text(), mimetype='text/plain; version=0.0.4')
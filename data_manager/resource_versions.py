@@ -0,0 +1,180 @@
+"""
+ResourceVersions class
+Per-table version counters bumped by the data managers on write,
+used to validate cached HTTP responses without querying the tables.
+
+DatabaseResourceVersions keeps the counters in the resource_versions
+table, so the worker processes serving the app issue the same ETags,
+and polls it at most every poll_interval seconds to learn about the
+writes of the other processes, e.g. to evict their rows from an
+in-process cache.
+"""
+import threading
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from .data_models import ResourceVersion
+
+
+class ResourceVersions:
+    """
+    Version counter and last modified time of each table.
+
+    Counters live in this process: the token generated at start up
+    is part of every ETag, so ETags issued before a restart never match.
+    """
+
+    def __init__(self):
+        self._token = uuid.uuid4().hex[:8]
+        self._started_at = time.time()
+        self._versions = {}  # table -> (version, modified at)
+        self._lock = threading.Lock()
+
+    def bump(self, table: str) -> None:
+        """
+        Record a write to a table
+        :param table: table name
+        """
+        with self._lock:
+            version, _modified_at = self._versions.get(table, (0, self._started_at))
+            self._versions[table] = (version + 1, time.time())
+
+    def validators(self, tables) -> tuple[str, float]:
+        """
+        Return the validators of a response
+        built from the given tables
+        :param tables: iterable of table names
+        :return:
+            (strong ETag (str), last modified unix time (float)) (tuple)
+        """
+        with self._lock:
+            versions = [self._versions.get(table, (0, self._started_at)) for table in tables]
+
+        etag = '-'.join([self._token, *(str(version) for version, _ in versions)])
+        return etag, max((modified_at for _, modified_at in versions),
+                         default=self._started_at)
+
+
+class DatabaseResourceVersions(ResourceVersions):
+    """
+    Version counters shared by the processes
+    through the resource_versions table.
+
+    A write is seen by the other processes on their next poll,
+    within poll_interval seconds; a failed bump is only seen
+    by this process.
+    """
+
+    def __init__(self, db, poll_interval: float = 1.0):
+        super().__init__()
+        self._db = db
+        self._engine = None
+        self._poll_interval = poll_interval
+        self._polled_at = 0.0
+        self._listeners = []
+
+    def init_app(self, app) -> None:
+        """
+        Add the missing rows of the tables, read the counters
+        and poll them before each request.
+        Must be called in an app context.
+        :param app: Flask
+        """
+        self._poll_interval = app.config.get('VERSIONS_POLL_INTERVAL', self._poll_interval)
+        self._engine = self._db.engine
+        now = time.time()
+        with self._engine.connect() as connection:
+            existing = set(connection.scalars(select(ResourceVersion.table_name)))
+            for table in self._db.metadata.sorted_tables:
+                if table.name in existing:
+                    continue
+                try:
+                    connection.execute(insert(ResourceVersion).values(
+                        table_name=table.name, version=0, modified_at=now, created_at=now))
+                    connection.commit()
+                except IntegrityError:  # added by another process
+                    connection.rollback()
+
+            rows = connection.execute(select(ResourceVersion.table_name, ResourceVersion.version,
+                                             ResourceVersion.modified_at,
+                                             ResourceVersion.created_at)).all()
+        # ETags survive restarts, not a new database
+        self._token = format(int(min((row.created_at for row in rows), default=now) * 1000),
+                             'x')[-8:]
+        with self._lock:
+            self._versions = {row.table_name: (row.version, row.modified_at) for row in rows}
+        self._polled_at = time.monotonic()
+        app.before_request(self.refresh)
+
+    def subscribe(self, listener: Callable[[str, float], None]) -> None:
+        """
+        Call listener(table, modified at) for each
+        write of another process to a table
+        :param listener: Callable
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, changes: list) -> None:
+        for table, modified_at in changes:
+            for listener in self._listeners:
+                listener(table, modified_at)
+
+    def bump(self, table: str) -> None:
+        """
+        Record a write to a table
+        in the resource_versions table
+        :param table: table name
+        """
+        now = time.time()
+        try:
+            with self._engine.begin() as connection:
+                version = connection.scalar(
+                    update(ResourceVersion).where(ResourceVersion.table_name == table)
+                    .values(version=ResourceVersion.version + 1, modified_at=now)
+                    .returning(ResourceVersion.version))
+        except SQLAlchemyError as err:
+            print(err)
+            super().bump(table)
+            return
+        if version is None:  # a table created after start up
+            super().bump(table)
+            return
+
+        with self._lock:
+            previous, _modified_at = self._versions.get(table, (0, self._started_at))
+            self._versions[table] = (version, now)
+        if version > previous + 1:  # written by another process since the last poll
+            self._notify([(table, now)])
+
+    def refresh(self) -> None:
+        """
+        Read the counters written by the other processes,
+        at most once per poll_interval
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._polled_at + self._poll_interval:
+                return
+            self._polled_at = now
+
+        try:
+            with self._engine.connect() as connection:
+                rows = connection.execute(select(ResourceVersion.table_name,
+                                                 ResourceVersion.version,
+                                                 ResourceVersion.modified_at)).all()
+        except SQLAlchemyError as err:
+            print(err)
+            return
+
+        changes = []
+        with self._lock:
+            for table, version, modified_at in rows:
+                # a bump of this process may be newer than the rows read
+                if version > self._versions.get(table, (0,))[0]:
+                    self._versions[table] = (version, modified_at)
+                    changes.append((table, modified_at))
+        self._notify(changes)
@@ -0,0 +1,117 @@
+"""
+Per-movie review aggregates, SQLite and PostgreSQL:
+movies.review_count, review_rating_sum and user_rating (average)
+are updated incrementally by triggers on movies_reviews,
+in the same transaction as the review write, whichever
+code path adds, updates or deletes a review
+(including the reviews deleted with their user)
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+ADD_REVIEW = "UPDATE movies SET " \
+             "review_count = review_count + 1, " \
+             "review_rating_sum = review_rating_sum + COALESCE({review}.rating, 0), " \
+             "user_rating = (review_rating_sum + COALESCE({review}.rating, 0)) " \
+             "/ (review_count + 1) " \
+             "WHERE id = {review}.movie_id;"
+
+REMOVE_REVIEW = "UPDATE movies SET " \
+                "review_count = review_count - 1, " \
+                "review_rating_sum = review_rating_sum - COALESCE({review}.rating, 0), " \
+                "user_rating = CASE WHEN review_count > 1 " \
+                "THEN (review_rating_sum - COALESCE({review}.rating, 0)) " \
+                "/ (review_count - 1) END " \
+                "WHERE id = {review}.movie_id;"
+
+REVIEW_AGGREGATES_TRIGGERS = {
+    'movies_reviews_aggregates_insert':
+        "CREATE TRIGGER movies_reviews_aggregates_insert "
+        "AFTER INSERT ON movies_reviews BEGIN " +
+        ADD_REVIEW.format(review='new') + " END",
+
+    'movies_reviews_aggregates_update':
+        "CREATE TRIGGER movies_reviews_aggregates_update "
+        "AFTER UPDATE OF rating, movie_id ON movies_reviews BEGIN " +
+        REMOVE_REVIEW.format(review='old') + " " +
+        ADD_REVIEW.format(review='new') + " END",
+
+    'movies_reviews_aggregates_delete':
+        "CREATE TRIGGER movies_reviews_aggregates_delete "
+        "AFTER DELETE ON movies_reviews BEGIN " +
+        REMOVE_REVIEW.format(review='old') + " END",
+}
+
+# one PL/pgSQL trigger function for the three operations
+POSTGRESQL_REVIEW_AGGREGATES_FUNCTION = \
+    "CREATE OR REPLACE FUNCTION movies_reviews_aggregates() RETURNS trigger AS $$ BEGIN " \
+    "IF TG_OP IN ('UPDATE', 'DELETE') THEN " + REMOVE_REVIEW.format(review='OLD') + " END IF; " \
+    "IF TG_OP IN ('INSERT', 'UPDATE') THEN " + ADD_REVIEW.format(review='NEW') + " END IF; " \
+    "RETURN NULL; END $$ LANGUAGE plpgsql"
+
+POSTGRESQL_REVIEW_AGGREGATES_TRIGGER = \
+    "CREATE TRIGGER movies_reviews_aggregates " \
+    "AFTER INSERT OR UPDATE OF rating, movie_id OR DELETE ON movies_reviews " \
+    "FOR EACH ROW EXECUTE FUNCTION movies_reviews_aggregates()"
+
+REVIEW_AGGREGATES_BACKFILL = \
+    "UPDATE movies SET " \
+    "review_count = (SELECT COUNT(*) FROM movies_reviews " \
+    "WHERE movie_id = movies.id), " \
+    "review_rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM movies_reviews " \
+    "WHERE movie_id = movies.id), " \
+    "user_rating = (SELECT AVG(COALESCE(rating, 0)) FROM movies_reviews " \
+    "WHERE movie_id = movies.id)"
+
+
+def create_review_aggregates(db) -> bool:
+    """
+    Create the missing review aggregates triggers.
+    The aggregates are recomputed from movies_reviews
+    when a trigger was missing, as they may be out of date.
+    :param db: SQLAlchemy
+    :return:
+        True when the aggregates are maintained (bool)
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return create_postgresql_review_aggregates(db)
+    if dialect != 'sqlite':
+        return False
+
+    try:
+        with db.engine.begin() as connection:
+            existing = set(connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+            missing = [name for name in REVIEW_AGGREGATES_TRIGGERS if name not in existing]
+            for name in missing:
+                connection.execute(text(REVIEW_AGGREGATES_TRIGGERS[name]))
+            if missing:
+                connection.execute(text(REVIEW_AGGREGATES_BACKFILL))
+    except OperationalError as err:
+        print(err)
+        return False
+    return True
+
+
+def create_postgresql_review_aggregates(db) -> bool:
+    """
+    Create the review aggregates trigger of a PostgreSQL database,
+    recomputing the aggregates when it was missing
+    :param db: SQLAlchemy
+    :return:
+        True when the aggregates are maintained (bool)
+    """
+    try:
+        with db.engine.begin() as connection:
+            exists = connection.execute(text(
+                "SELECT 1 FROM pg_trigger WHERE tgname = 'movies_reviews_aggregates' "
+                "AND tgrelid = 'movies_reviews'::regclass")).first() is not None
+            if not exists:
+                connection.execute(text(POSTGRESQL_REVIEW_AGGREGATES_FUNCTION))
+                connection.execute(text(POSTGRESQL_REVIEW_AGGREGATES_TRIGGER))
+                connection.execute(text(REVIEW_AGGREGATES_BACKFILL))
+    except DBAPIError as err:
+        print(err)
+        return False
+    return True
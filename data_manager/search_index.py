@@ -0,0 +1,116 @@
+"""
+Full-text search indexes, SQLite FTS5 only.
+movies_fts indexes movie_name, director and the text of
+the movie's reviews, with rowid = movies.id. It is kept in sync
+by triggers, so every writer (ORM, bulk insert, raw SQL) updates it.
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.exc import OperationalError
+
+from .data_models import Movie
+
+# entity -> FTS5 table searched by SQLiteDataManager.search
+SEARCH_INDEXES = {
+    Movie: 'movies_fts',
+}
+
+# column weights of bm25: a name match ranks above a director match,
+# which ranks above a match in the reviews
+MOVIES_FTS_RANK = 'bm25(10.0, 5.0, 1.0)'
+
+MOVIE_REVIEWS_TEXT = "(SELECT group_concat(review_text, ' ') FROM movies_reviews " \
+                     "WHERE movie_id = {movie_id})"
+
+MOVIES_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5("
+    "movie_name, director, reviews, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_movies_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts (rowid, movie_name, director, reviews) "
+    "VALUES (new.id, new.movie_name, new.director, ''); END",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_movies_update "
+    "AFTER UPDATE OF movie_name, director ON movies BEGIN "
+    "UPDATE movies_fts SET movie_name = new.movie_name, director = new.director "
+    "WHERE rowid = new.id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_movies_delete AFTER DELETE ON movies BEGIN "
+    "DELETE FROM movies_fts WHERE rowid = old.id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_reviews_insert "
+    "AFTER INSERT ON movies_reviews BEGIN "
+    "UPDATE movies_fts SET reviews = " + MOVIE_REVIEWS_TEXT.format(movie_id='new.movie_id') +
+    " WHERE rowid = new.movie_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_reviews_update "
+    "AFTER UPDATE OF review_text, movie_id ON movies_reviews BEGIN "
+    "UPDATE movies_fts SET reviews = " + MOVIE_REVIEWS_TEXT.format(movie_id='old.movie_id') +
+    " WHERE rowid = old.movie_id; "
+    "UPDATE movies_fts SET reviews = " + MOVIE_REVIEWS_TEXT.format(movie_id='new.movie_id') +
+    " WHERE rowid = new.movie_id; END",
+
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_reviews_delete "
+    "AFTER DELETE ON movies_reviews BEGIN "
+    "UPDATE movies_fts SET reviews = " + MOVIE_REVIEWS_TEXT.format(movie_id='old.movie_id') +
+    " WHERE rowid = old.movie_id; END",
+]
+
+# metadata.drop_all() drops the index with its table, so it cannot go stale
+event.listen(Movie.__table__, 'after_drop',
+             DDL('DROP TABLE IF EXISTS movies_fts').execute_if(dialect='sqlite'))
+
+MOVIES_FTS_BACKFILL = "INSERT INTO movies_fts (rowid, movie_name, director, reviews) " \
+                      "SELECT id, movie_name, director, " + \
+                      MOVIE_REVIEWS_TEXT.format(movie_id='movies.id') + " FROM movies"
+
+
+def create_movies_search_index(db) -> bool:
+    """
+    Create movies_fts and its triggers, filling it
+    from the existing movies when it is new
+    :param db: SQLAlchemy
+    :return:
+        True when the index is available (bool)
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with db.engine.begin() as connection:
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'"
+            )).first() is not None
+            for statement in MOVIES_FTS_DDL:
+                connection.execute(text(statement))
+            if not exists:
+                connection.execute(text(MOVIES_FTS_BACKFILL))
+                connection.execute(text("INSERT INTO movies_fts (movies_fts, rank) "
+                                        "VALUES ('rank', :rank)"),
+                                   {'rank': MOVIES_FTS_RANK})
+    except OperationalError as err:  # sqlite built without FTS5
+        print(err)
+        return False
+    return True
+
+
+def build_match_query(search_text: str) -> str | None:
+    """
+    Turn user input into an FTS5 query matching
+    all its words, the last one as a prefix (autocomplete).
+    Words are quoted, so FTS5 operators in the input are plain text.
+    :param search_text: str
+    :return:
+        FTS5 MATCH query (str) |
+        None when there is no word to search
+    """
+    words = re.findall(r'\w+', search_text)
+    if not words:
+        return None
+
+    terms = [f'"{word}"' for word in words]
+    if not search_text[-1].isspace():
+        terms[-1] += '*'
+    return ' '.join(terms)
@@ -4,9 +4,32 @@ for managing data from sqlite database
 """
 from abc import ABC
 
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import and_, exists, insert, inspect, or_, text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from .data_manager_interface import DataManagerInterface
+from .load_strategies import LOAD_STRATEGIES
+from .pagination import FILTER_OPERATORS, encode_cursor, decode_cursor
+from .projections import PROJECTIONS
+from .replicas import ReplicaRouter
+from .resource_versions import ResourceVersions
+from .search_index import SEARCH_INDEXES
+
+UNIQUE_VIOLATION_SQLSTATE = '23505'
+
+
+def is_unique_violation(err: IntegrityError) -> bool:
+    """
+    Check if an IntegrityError is a unique constraint violation,
+    not e.g. a foreign key or not null one
+    :param err: IntegrityError
+    :return:
+        True or False (bool)
+    """
+    sqlstate = getattr(err.orig, 'pgcode', None) or getattr(err.orig, 'sqlstate', None)
+    if sqlstate is not None:
+        return sqlstate == UNIQUE_VIOLATION_SQLSTATE
+    return 'UNIQUE constraint failed' in str(err.orig)
 
 
 class SQLiteDataManager(DataManagerInterface, ABC):
@@ -15,10 +38,52 @@ class SQLiteDataManager(DataManagerInterface, ABC):
     from sqlite database
     """
 
-    def __init__(self, id_key, entity, db):
+    def __init__(self, id_key, entity, db, versions: ResourceVersions | None = None,
+                 router: ReplicaRouter | None = None):
         self.db = db
         self._id_key = id_key
         self._entity = entity
+        self._load_strategies = LOAD_STRATEGIES.get(entity, {})
+        self._projections = PROJECTIONS.get(entity, {})
+        self._versions = versions
+        self._router = router
+
+    def _commit(self) -> None:
+        """
+        Commit the session and bump the table version
+        """
+        self.db.session.commit()
+        if self._versions is not None:
+            self._versions.bump(self._entity.__tablename__)
+        if self._router is not None:
+            self._router.mark_written()
+
+    def _read_session(self):
+        """
+        Return the session serving the reads,
+        a replica session when the router allows it
+        :return:
+            Session
+        """
+        if self._router is None:
+            return self.db.session
+        return self._router.read_session()
+
+    def _query(self, use_case: str, session=None):
+        """
+        Return a query of the entity
+        eager loading the relationships declared for use_case,
+        or of the columns of its projection
+        :param use_case: 'list' | 'detail' | 'summary' | 'rows'
+        :param session: Session, the read session by default
+        :return:
+            Query
+        """
+        session = session or self._read_session()
+        projection = self._projections.get(use_case)
+        if projection is not None:
+            return projection.query(session)
+        return session.query(self._entity).options(*self._load_strategies.get(use_case, ()))
 
     def get_all_data(self):
         """
@@ -27,13 +92,228 @@ class SQLiteDataManager(DataManagerInterface, ABC):
             A query object representing all the data
             None
         """
+        session = self._read_session()
         try:
-            return self._entity.query.all()
+            return self._query('list', session).all()
         except SQLAlchemyError as err:
             print(err)
-            self.db.session.rollback()
+            session.rollback()
+            return None
+
+    def _filtered_query(self, filters: list[tuple] | None, use_case: str = 'list',
+                        session=None):
+        """
+        Return a query of the entity
+        with the given (key, operator, value) filters applied
+        :param filters: list[tuple] | None
+        :param use_case: 'list' | 'summary' | 'rows'
+        :param session: Session, the read session by default
+        :return:
+            Query
+        """
+        query = self._query(use_case, session)
+        for key, operator_name, value in filters or []:
+            column = getattr(self._entity, key)
+            query = query.filter(FILTER_OPERATORS[operator_name](column, value))
+        return query
+
+    @staticmethod
+    def _after_clause(sort_column, id_column, after: list, descending: bool):
+        """
+        Keyset condition selecting the rows
+        that come after (sort value, id) in the page order.
+        Null sort values come first ascending and last descending.
+        :return:
+            SQL expression
+        """
+        sort_value, last_id = after
+        if sort_column is id_column:
+            return id_column < last_id if descending else id_column > last_id
+
+        if descending:
+            if sort_value is None:
+                return and_(sort_column.is_(None), id_column < last_id)
+            return or_(sort_column < sort_value,
+                       and_(sort_column == sort_value, id_column < last_id),
+                       sort_column.is_(None))
+
+        if sort_value is None:
+            return or_(and_(sort_column.is_(None), id_column > last_id),
+                       sort_column.isnot(None))
+        return or_(sort_column > sort_value,
+                   and_(sort_column == sort_value, id_column > last_id))
+
+    def _order_by(self, query, sort_by: str, descending: bool):
+        """
+        Order the query by sort_by then id,
+        null sort values first ascending and last descending
+        :return:
+            Query
+        """
+        id_column = getattr(self._entity, self._id_key)
+        sort_column = getattr(self._entity, sort_by)
+        if sort_column is id_column:
+            return query.order_by(id_column.desc() if descending else id_column.asc())
+
+        if descending:
+            return query.order_by(sort_column.desc().nulls_last(), id_column.desc())
+        return query.order_by(sort_column.asc().nulls_first(), id_column.asc())
+
+    def _get_page(self, query, limit: int, cursor: str | None,
+                  sort_by: str | None, descending: bool, use_case: str = 'list'):
+        """
+        Return one page of the query results
+        ordered by sort_by then id and
+        seeking past the cursor instead of using OFFSET,
+        mapped to the rows of the use_case projection if any
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+        sort_by = sort_by or self._id_key
+        try:
+            id_column = getattr(self._entity, self._id_key)
+            sort_column = getattr(self._entity, sort_by)
+
+            if cursor:
+                after = decode_cursor(cursor, sort_by, descending)
+                if after is None:
+                    return None
+                query = query.filter(self._after_clause(sort_column, id_column,
+                                                        after, descending))
+
+            items = self._order_by(query, sort_by, descending).limit(limit + 1).all()
+            has_next_page = len(items) > limit
+            items = items[:limit]
+            projection = self._projections.get(use_case)
+            if projection is not None:
+                items = projection.rows(query.session, items)
+        except SQLAlchemyError as err:
+            print(err)
+            query.session.rollback()
             return None
 
+        next_cursor = None
+        if has_next_page:
+            last = items[-1]
+            next_cursor = encode_cursor(sort_by, descending,
+                                        [getattr(last, sort_by),
+                                         getattr(last, self._id_key)])
+        return items, next_cursor
+
+    def get_page(self, limit: int, cursor: str | None = None,
+                 filters: list[tuple] | None = None,
+                 sort_by: str | None = None,
+                 descending: bool = False,
+                 use_case: str = 'list'):
+        """
+        Return one page of items from sqlite DB,
+        filtered and ordered in SQL
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: 'list' | 'summary' | 'rows', the relationships eager loaded,
+            or the read-only rows of a projection (projections.py)
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+        return self._get_page(self._filtered_query(filters, use_case),
+                              limit, cursor, sort_by, descending, use_case)
+
+    def iter_items(self, filters: list[tuple] | None = None,
+                   sort_by: str | None = None,
+                   descending: bool = False,
+                   batch_size: int = 500):
+        """
+        Iterate over all items from sqlite DB, filtered
+        and ordered in SQL, fetching batch_size rows at a time
+        so memory does not grow with the table size.
+        A database error is printed and ends the iteration.
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param batch_size: int
+        :return:
+            items (Iterator)
+        """
+        session = self._read_session()
+        query = self._order_by(self._filtered_query(filters, session=session),
+                               sort_by or self._id_key, descending)
+        try:
+            # 2.0 style execution: the legacy Query refuses yield_per with joinedload
+            yield from session.scalars(query.statement,
+                                       execution_options={'yield_per': batch_size})
+        except SQLAlchemyError as err:
+            print(err)
+            session.rollback()
+
+    def search(self, match_query: str, limit: int):
+        """
+        Return the items matching a full-text query,
+        best bm25 rank first
+        :param match_query: FTS5 MATCH query
+        :param limit: int
+        :return:
+            items (list) |
+            None
+        """
+        fts_table = SEARCH_INDEXES.get(self._entity)
+        if fts_table is None or self.db.engine.dialect.name != 'sqlite':  # FTS5 tables
+            return None
+
+        session = self._read_session()
+        try:
+            ids = session.execute(
+                text(f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :query '
+                     f'ORDER BY rank LIMIT :limit'),
+                {'query': match_query, 'limit': limit}).scalars().all()
+            if not ids:
+                return []
+
+            id_column = getattr(self._entity, self._id_key)
+            items = {getattr(item, self._id_key): item
+                     for item in self._query('list', session).filter(id_column.in_(ids))}
+        except SQLAlchemyError as err:
+            print(err)
+            session.rollback()
+            return None
+        return [items[item_id] for item_id in ids if item_id in items]
+
+    def get_unlinked_page(self, link_entity, link_key: str, link_filters: list[tuple],
+                          limit: int, cursor: str | None = None,
+                          filters: list[tuple] | None = None,
+                          sort_by: str | None = None,
+                          descending: bool = False,
+                          use_case: str = 'list'):
+        """
+        Return one page of the items that have no
+        matching row in a link table, as a NOT EXISTS anti-join,
+        e.g. the movies a user has not favourited:
+        get_unlinked_page(UserMovie, 'movie_id', [('user_id', '==', user_id)], limit)
+        :param link_entity: link table model
+        :param link_key: link table column referencing this entity id
+        :param link_filters: list of (key, operator, value) tuples on the link table
+        :param limit: int
+        :param cursor: str | None
+        :param filters: list of (key, operator, value) tuples
+        :param sort_by: str | None, defaults to the id key
+        :param descending: bool
+        :param use_case: 'list' | 'summary' | 'rows'
+        :return:
+            (items, next cursor | None) (tuple) |
+            None
+        """
+        link_criteria = [getattr(link_entity, link_key) == getattr(self._entity, self._id_key)]
+        for key, operator_name, value in link_filters:
+            link_criteria.append(FILTER_OPERATORS[operator_name](getattr(link_entity, key),
+                                                                 value))
+
+        query = self._filtered_query(filters, use_case).filter(~exists().where(*link_criteria))
+        return self._get_page(query, limit, cursor, sort_by, descending, use_case)
+
     def get_item_by_id(self, item_id):
         """
         Return the specific item
@@ -42,12 +322,13 @@ class SQLiteDataManager(DataManagerInterface, ABC):
             item |
             None
         """
+        session = self._read_session()
         try:
-            return self._entity.query. \
+            return self._query('detail', session). \
                 filter(getattr(self._entity, self._id_key) == item_id). \
                 one()
         except SQLAlchemyError:
-            self.db.session.rollback()
+            session.rollback()
             return None
 
     def add_item(self, new_item) -> bool | None:
@@ -55,16 +336,85 @@ class SQLiteDataManager(DataManagerInterface, ABC):
         Add new item to sqlite DB
         :param new_item
         :return:
-            Successfully add item, True (bool)
+            Successfully add item, True (bool) |
+            Unique constraint violated, False (bool) |
+            None
         """
         try:
             self.db.session.add(new_item)
-            self.db.session.commit()
+            self._commit()
             return True
+        except IntegrityError as err:
+            self.db.session.rollback()
+            if is_unique_violation(err):
+                return False
+            print(err)
+            return None
         except SQLAlchemyError:
             self.db.session.rollback()
             return None
 
+    def add_items(self, new_items: list) -> list[bool | None]:
+        """
+        Add many items to sqlite DB in one transaction,
+        as a bulk insert of the column values set on them
+        (the items do not get their new ids)
+        :param new_items: list
+        :return:
+            per item result (list):
+                True for added |
+                False for unique constraint violated |
+                None for other errors
+        """
+        if not new_items:
+            return []
+
+        column_keys = {column.key for column in inspect(self._entity).column_attrs}
+        return self.insert_mappings([{key: value for key, value in inspect(item).dict.items()
+                                      if key in column_keys}
+                                     for item in new_items])
+
+    def insert_mappings(self, mappings: list[dict]) -> list[bool | None]:
+        """
+        Insert many rows given as column dicts in one transaction.
+        When a row violates a constraint the batch is
+        retried row by row in savepoints, so the other rows are kept.
+        :param mappings: list[dict]
+        :return:
+            per row result (list):
+                True for inserted |
+                False for unique constraint violated |
+                None for other errors
+        """
+        try:
+            self.db.session.execute(insert(self._entity), mappings)
+            self._commit()
+            return [True] * len(mappings)
+        except IntegrityError:
+            self.db.session.rollback()
+        except SQLAlchemyError as err:
+            print(err)
+            self.db.session.rollback()
+            return [None] * len(mappings)
+
+        results = []
+        for mapping in mappings:
+            try:
+                with self.db.session.begin_nested():
+                    self.db.session.execute(insert(self._entity), [mapping])
+                results.append(True)
+            except IntegrityError as err:
+                results.append(False if is_unique_violation(err) else None)
+            except SQLAlchemyError:
+                results.append(None)
+
+        try:
+            self._commit()
+        except SQLAlchemyError:
+            self.db.session.rollback()
+            return [None] * len(mappings)
+        return results
+
     def update_item(self, updated_item: dict) -> bool | None:
         """
         Update item with updated_item
@@ -75,12 +425,14 @@ class SQLiteDataManager(DataManagerInterface, ABC):
         """
         try:
             item = self._entity.query.get(updated_item['id'])
+            if item is None:
+                return None
             for key, value in updated_item.items():
                 # skip id
                 if key == 'id':
                     continue
                 setattr(item, key, value)
-            self.db.session.commit()
+            self._commit()
             return True
         except SQLAlchemyError:
             self.db.session.rollback()
@@ -98,8 +450,33 @@ class SQLiteDataManager(DataManagerInterface, ABC):
         try:
             item = self._entity.query.get(item_id)
             self.db.session.delete(item)
-            self.db.session.commit()
+            self._commit()
             return True
         except SQLAlchemyError:
             self.db.session.rollback()
             return None
+
+    def delete_items(self, item_ids: list) -> list[bool | None]:
+        """
+        Delete many items based on their ids in one transaction
+        :param item_ids: list
+        :return:
+            per item result (list):
+                True for deleted |
+                None for item not found or other errors
+        """
+        if not item_ids:
+            return []
+
+        try:
+            id_column = getattr(self._entity, self._id_key)
+            items = {getattr(item, self._id_key): item
+                     for item in self._entity.query.filter(id_column.in_(item_ids))}
+            for item in items.values():
+                self.db.session.delete(item)
+            self._commit()
+        except SQLAlchemyError as err:
+            print(err)
+            self.db.session.rollback()
+            return [None] * len(item_ids)
+        return [True if item_id in items else None for item_id in item_ids]
@@ -0,0 +1,168 @@
+"""
+SQLiteEntityCache class
+EntityCache kept in a local sqlite file, shared by the
+worker processes of a host: an entry cached by one worker
+is a hit for the others, and a write served by one worker
+evicts the entry in all of them.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteEntityCache:
+    """
+    Cache with TTL of entity dicts keyed by (entity, id),
+    with the interface of EntityCache.
+
+    Entries are evicted oldest stored first rather than least
+    recently used, so a hit does not write to the file.
+    Values are stored as JSON: dicts with string keys, lists and scalars.
+    """
+
+    def __init__(self, path: str, name: str = 'entity_cache',
+                 max_size: int = 1024, ttl: float = 300.0):
+        self._path = path
+        self._table = name
+        self._max_size = max_size
+        self._ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return this thread's connection, creating the cache
+        tables on first use. A forked worker opens its own.
+        :return:
+            Connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # a cache survives a power loss empty at worst
+            connection.execute('PRAGMA synchronous=OFF')
+            with connection:
+                connection.execute(f'CREATE TABLE IF NOT EXISTS {self._table} ('
+                                   'key TEXT PRIMARY KEY, '
+                                   'value TEXT NOT NULL, '
+                                   'expires_at REAL NOT NULL)')
+                connection.execute(f'CREATE TABLE IF NOT EXISTS {self._table}_dependencies ('
+                                   'dependency TEXT NOT NULL, '
+                                   'key TEXT NOT NULL, '
+                                   'PRIMARY KEY (dependency, key)) WITHOUT ROWID')
+                connection.execute(f'CREATE INDEX IF NOT EXISTS ix_{self._table}_dependencies_key '
+                                   f'ON {self._table}_dependencies (key)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(entity: str, item_id) -> str:
+        return json.dumps([entity, item_id])
+
+    def _count(self, counter: str, count: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def _remove(self, connection: sqlite3.Connection, keys: list) -> None:
+        """
+        Remove entries and their dependency links,
+        in the transaction of connection
+        :param keys: list of str
+        """
+        rows = [(key,) for key in keys]
+        connection.executemany(f'DELETE FROM {self._table} WHERE key = ?', rows)
+        connection.executemany(f'DELETE FROM {self._table}_dependencies WHERE key = ?', rows)
+
+    def get(self, entity: str, item_id) -> dict | None:
+        """
+        Return the cached dict of an entity
+        :param entity: str
+        :param item_id: int
+        :return:
+            cached dict |
+            None if missing or expired
+        """
+        row = self._connection().execute(
+            f'SELECT value, expires_at FROM {self._table} WHERE key = ?',
+            (self._key(entity, item_id),)).fetchone()
+        if row is None or row[1] < time.time():
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return json.loads(row[0])
+
+    def set(self, entity: str, item_id, value, depends_on=()) -> None:
+        """
+        Cache the dict of an entity
+        :param entity: str
+        :param item_id: int
+        :param value: dict
+        :param depends_on: iterable of (entity, id) embedded in value
+        """
+        key = self._key(entity, item_id)
+        connection = self._connection()
+        with connection:
+            self._remove(connection, [key])
+            connection.execute(f'INSERT INTO {self._table} (key, value, expires_at) '
+                               'VALUES (?, ?, ?)',
+                               (key, json.dumps(value), time.time() + self._ttl))
+            connection.executemany(f'INSERT OR IGNORE INTO {self._table}_dependencies '
+                                   '(dependency, key) VALUES (?, ?)',
+                                   [(self._key(*dependency), key) for dependency in depends_on])
+
+            size = connection.execute(f'SELECT COUNT(*) FROM {self._table}').fetchone()[0]
+            if size > self._max_size:
+                oldest = [row[0] for row in connection.execute(
+                    f'SELECT key FROM {self._table} ORDER BY rowid LIMIT ?',
+                    (size - self._max_size,))]
+                self._remove(connection, oldest)
+                self._count('evictions', len(oldest))
+
+    def invalidate(self, entity: str, item_id) -> None:
+        """
+        Evict an entity dict and the dicts depending on it,
+        in every process
+        :param entity: str
+        :param item_id: int
+        """
+        key = self._key(entity, item_id)
+        connection = self._connection()
+        with connection:
+            dependents = [row[0] for row in connection.execute(
+                f'SELECT key FROM {self._table}_dependencies WHERE dependency = ?', (key,))]
+            self._remove(connection, [key, *dependents])
+            connection.execute(f'DELETE FROM {self._table}_dependencies WHERE dependency = ?',
+                               (key,))
+
+    def clear(self) -> None:
+        """
+        Evict everything
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute(f'DELETE FROM {self._table}')
+            connection.execute(f'DELETE FROM {self._table}_dependencies')
+
+    def stats(self) -> dict:
+        """
+        Return the counters of this process
+        and the size of the shared cache
+        :return:
+            hits, misses, evictions, size, max_size, ttl (dict)
+        """
+        size = self._connection().execute(f'SELECT COUNT(*) FROM {self._table}').fetchone()[0]
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': size,
+                    'max_size': self._max_size,
+                    'ttl': self._ttl}
@@ -0,0 +1,32 @@
+"""
+Pragmas of the SQLite connections:
+they are per connection (except journal_mode, stored in the file),
+so they are set by a connect event listener on each new pooled connection
+"""
+from sqlalchemy import event
+
+
+def set_sqlite_pragmas(engine, pragmas: dict) -> bool:
+    """
+    Set the pragmas on every new connection of a SQLite engine.
+    In-memory databases keep their default journal.
+    :param engine: Engine
+    :param pragmas: pragma name -> value (dict)
+    :return:
+        True when the pragmas are set (bool)
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return False
+
+    if engine.url.database in (None, '', ':memory:'):
+        pragmas = {name: value for name, value in pragmas.items()
+                   if name not in ('journal_mode', 'mmap_size')}
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    return True
@@ -0,0 +1,111 @@
+"""
+Test adding and deleting many items in one transaction
+"""
+import json
+import os
+import tempfile
+
+import pytest
+
+from data_manager.data_models import db, User, Movie, UserMovie
+from data_manager.json_data_manager import JSONDataManager
+from data_manager.query_counter import QueryCounter
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.users_movies import UsersMovies
+
+users_movies_data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db))
+
+
+def create_test_data(movies_count: int):
+    """
+    One user, movies_count movies, the first one favourited
+    """
+    db.session.add_all([User(user_name='Alice')] +
+                       [Movie(movie_name=f'Movie {number}') for number in range(movies_count)])
+    db.session.add(UserMovie(user_id=1, movie_id=1))
+    db.session.commit()
+
+
+@pytest.mark.usefixtures('app')
+def test_add_and_delete_many_favourites():
+    """
+    Test a duplicate favourite fails alone,
+    and deletes report the movies that were not favourites
+    """
+    create_test_data(4)
+    assert users_movies_data_manager.add_user_movies(1, [2, 1, 3]) == [True, False, True]
+    assert users_movies_data_manager.get_favourite_ids(1, [1, 2, 3, 4]).keys() == {1, 2, 3}
+
+    assert users_movies_data_manager.delete_user_movies(1, [3, 4, 1]) == [True, None, True]
+    assert users_movies_data_manager.get_favourite_ids(1, [1, 2, 3, 4]).keys() == {2}
+
+
+@pytest.mark.usefixtures('app')
+def test_only_unique_violations_are_duplicates():
+    """
+    Test a unique violation is reported as False,
+    other constraint violations as None
+    """
+    create_test_data(2)
+    data_manager = SQLiteDataManager('id', UserMovie, db)
+    assert data_manager.add_item(UserMovie(user_id=1, movie_id=1)) is False
+    assert data_manager.add_item(UserMovie(user_id=1, movie_id=None)) is None
+    assert data_manager.insert_mappings([{'user_id': 1, 'movie_id': 2},
+                                         {'user_id': 1, 'movie_id': 1},
+                                         {'user_id': None, 'movie_id': 2}]) == [True, False, None]
+
+
+@pytest.mark.usefixtures('app')
+def test_batch_queries_do_not_grow_with_items():
+    """
+    Test a batch is validated and written in a fixed number of queries
+    """
+    create_test_data(200)
+    with QueryCounter(db.engine) as counter:
+        users_movies_data_manager.get_favourite_ids(1, list(range(2, 201)))
+        users_movies_data_manager.add_user_movies(1, list(range(2, 201)))
+    # one SELECT ... IN and one executemany INSERT
+    assert counter.count == 2, counter.statements
+
+
+def test_json_add_and_delete_many_items():
+    """
+    Test JSONDataManager numbers the new items
+    and deletes the existing ones
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.json')
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump([{'id': 1, 'movie_name': 'Movie 1'}], file)
+        movies = JSONDataManager(file_name, 'id')
+
+        assert movies.add_items([{'movie_name': 'Movie 2'}, {'movie_name': 'Movie 3'}]) == \
+            [True, True]
+        assert movies.delete_items([1, 4, 3]) == [True, None, True]
+        assert movies.get_all_data() == [{'movie_name': 'Movie 2', 'id': 2}]
+
+
+def test_json_implements_the_interface_used_by_movies():
+    """
+    Test JSONDataManager inserts mappings and pages
+    the items no link item references
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        movies = JSONDataManager(os.path.join(directory, 'movies.json'), 'id')
+        users_movies = JSONDataManager(os.path.join(directory, 'users_movies.json'), 'id')
+        for data_manager in (movies, users_movies):
+            with open(data_manager._file_name, 'w', encoding='utf-8') as file:
+                json.dump([], file)
+
+        mappings = [{'movie_name': f'Movie {number}'} for number in range(1, 5)]
+        assert movies.insert_mappings(mappings) == [True] * 4
+        assert 'id' not in mappings[0]
+        users_movies.add_items([{'user_id': 1, 'movie_id': 2}, {'user_id': 1, 'movie_id': 3},
+                                {'user_id': 2, 'movie_id': 1}])
+
+        page, cursor = movies.get_unlinked_page(users_movies, 'movie_id',
+                                                [('user_id', '==', 1)], 1)
+        assert [movie['id'] for movie in page] == [1]
+        page, cursor = movies.get_unlinked_page(users_movies, 'movie_id',
+                                                [('user_id', '==', 1)], 1, cursor)
+        assert ([movie['id'] for movie in page], cursor) == ([4], None)
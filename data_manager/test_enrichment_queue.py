@@ -0,0 +1,129 @@
+"""
+Test the persistent OMDb enrichment queue
+"""
+import time
+
+import requests
+
+from data_manager.data_models import db, Movie, EnrichmentJob
+from data_manager.movies import Movies
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from enrichment_queue import EnrichmentQueue, PENDING, RUNNING, DONE, FAILED
+
+MOVIE_INFO = {'movie_name': 'Movie 1', 'director': 'Director 1', 'year': 2001,
+              'rating': 8.5, 'poster': 'poster.jpg', 'website': 'website'}
+
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
+
+
+class FakeOMDb:
+    """
+    fetch_movie_info raising the queued errors, then returning MOVIE_INFO
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, _movie_name: str) -> dict:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return MOVIE_INFO
+
+
+def create_queue(app, fetch_movie_info, **options) -> EnrichmentQueue:
+    """
+    A queue of one job due now, enriching Movie 1
+    """
+    db.session.add(Movie(movie_name='Movie 1'))
+    db.session.commit()
+    queue = EnrichmentQueue(app, db, movies_data_manager, fetch_movie_info,
+                            workers=0, base_delay=0, **options)
+    queue.enqueue(1, 'Movie 1')
+    return queue
+
+
+def test_claim_is_exclusive(app):
+    """
+    Test a due job is claimed once and counts the attempt
+    """
+    queue = create_queue(app, FakeOMDb())
+    job = queue._claim_next_job()
+    assert (job.status, job.attempts) == (RUNNING, 1)
+    assert queue._claim_next_job() is None
+
+
+def test_request_errors_are_retried(app):
+    """
+    Test a request error requeues the job until it succeeds
+    """
+    fetch_movie_info = FakeOMDb(requests.exceptions.Timeout('timed out'),
+                                requests.exceptions.HTTPError('503 Server Error'))
+    queue = create_queue(app, fetch_movie_info)
+    for status in (PENDING, PENDING, DONE):
+        queue._run_job(queue._claim_next_job())
+        assert queue.get_job(1)['status'] == status
+
+    assert queue.get_job(1)['attempts'] == 3
+    assert movies_data_manager.get_movie(1)['director'] == 'Director 1'
+
+
+def test_job_fails_after_max_attempts(app):
+    """
+    Test the last failed attempt marks the job failed
+    """
+    fetch_movie_info = FakeOMDb(*[requests.exceptions.ConnectionError('refused')] * 2)
+    queue = create_queue(app, fetch_movie_info, max_attempts=2)
+    queue._run_job(queue._claim_next_job())
+    queue._run_job(queue._claim_next_job())
+    assert queue.get_job(1)['status'] == FAILED
+    assert queue.get_job(1)['last_error'] == 'refused'
+    assert queue._claim_next_job() is None
+
+
+def test_invalid_response_fails_at_once(app):
+    """
+    Test an OMDb response that cannot be formatted is not retried
+    """
+    fetch_movie_info = FakeOMDb(ValueError("invalid literal for int() with base 10: 'N/A'"))
+    queue = create_queue(app, fetch_movie_info)
+    queue._run_job(queue._claim_next_job())
+    assert queue.get_job(1)['status'] == FAILED
+    assert queue.get_job(1)['attempts'] == 1
+    assert fetch_movie_info.calls == 1
+
+
+def test_start_resumes_the_jobs_of_a_stopped_process(app):
+    """
+    Test a job left running past the lease by a stopped
+    process is requeued and enriched by the started workers
+    """
+    create_queue(app, FakeOMDb())
+    db.session.get(EnrichmentJob, 1).status = RUNNING
+    db.session.get(EnrichmentJob, 1).updated_at = time.time() - 120
+    db.session.commit()
+
+    queue = EnrichmentQueue(app, db, movies_data_manager, FakeOMDb(),
+                            workers=1, poll_interval=0.01, lease=60)
+    queue.start()
+    try:
+        deadline = time.time() + 5
+        while queue.get_job(1)['status'] != DONE and time.time() < deadline:
+            db.session.rollback()  # see the workers' commits
+            time.sleep(0.01)
+    finally:
+        queue.stop()
+    assert queue.get_job(1)['status'] == DONE
+
+
+def test_running_jobs_within_the_lease_are_kept(app):
+    """
+    Test start leaves the jobs another process is running
+    """
+    create_queue(app, FakeOMDb())
+    db.session.get(EnrichmentJob, 1).status = RUNNING
+    db.session.commit()
+    EnrichmentQueue(app, db, movies_data_manager, FakeOMDb(), workers=0).start()
+    db.session.rollback()
+    assert db.session.get(EnrichmentJob, 1).status == RUNNING
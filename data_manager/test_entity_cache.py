@@ -0,0 +1,56 @@
+"""
+Test EntityCache LRU, TTL and dependent invalidation
+"""
+import time
+
+from data_manager.entity_cache import EntityCache
+
+
+def test_get_cached_item():
+    """
+    Test successful get a cached dict and count hits and misses
+    """
+    cache = EntityCache()
+    assert cache.get('users', 1) is None
+    cache.set('users', 1, {'id': 1})
+    assert cache.get('users', 1) == {'id': 1}
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_least_recently_used_item_is_evicted():
+    """
+    Test the cache stays within max_size
+    """
+    cache = EntityCache(max_size=2)
+    cache.set('users', 1, {'id': 1})
+    cache.set('users', 2, {'id': 2})
+    cache.get('users', 1)
+    cache.set('users', 3, {'id': 3})
+    assert cache.get('users', 2) is None
+    assert cache.get('users', 1)
+    assert cache.stats()['size'] == 2
+
+
+def test_expired_item_is_a_miss():
+    """
+    Test fail to get an item older than ttl
+    """
+    cache = EntityCache(ttl=0.01)
+    cache.set('movies', 1, {'id': 1})
+    time.sleep(0.02)
+    assert cache.get('movies', 1) is None
+
+
+def test_invalidate_evicts_dependents():
+    """
+    Test invalidating a movie evicts the users embedding it
+    """
+    cache = EntityCache()
+    cache.set('users', 1, {'id': 1}, depends_on=[('movies', 7)])
+    cache.set('users', 2, {'id': 2}, depends_on=[('movies', 8)])
+    cache.set('movies', 7, {'id': 7})
+    cache.invalidate('movies', 7)
+    assert cache.get('movies', 7) is None
+    assert cache.get('users', 1) is None
+    assert cache.get('users', 2)
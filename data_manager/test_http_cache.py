@@ -0,0 +1,106 @@
+"""
+Test the conditional GET decorator
+"""
+from flask import Flask, g, render_template_string
+from werkzeug.http import http_date
+
+from data_manager.entity_cache import EntityCache
+from data_manager.resource_versions import ResourceVersions
+from http_cache import conditional_get
+from json_stream import stream_items
+
+app = Flask(__name__)
+resource_versions = ResourceVersions()
+page_cache = EntityCache()
+views_run = []
+
+
+@app.before_request
+def before_request():
+    g.resource_versions = resource_versions
+    g.page_cache = page_cache
+
+
+@app.route('/movies')
+@conditional_get('movies')
+def movies():
+    views_run.append('movies')
+    return stream_items([{'id': 1}, {'id': 2}], 'movies')
+
+
+@app.route('/users')
+@conditional_get('users', cache_page=True)
+def users():
+    views_run.append('users')
+    return render_template_string('{{ count }} users', count=len(views_run))
+
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+
+def test_json_and_ndjson_have_their_own_etags():
+    """
+    Test the JSON and NDJSON representations of a URL
+    have different ETags and vary on Accept
+    """
+    client = app.test_client()
+    json_response = client.get('/movies')
+    ndjson_response = client.get('/movies', headers=NDJSON)
+    assert ndjson_response.data == b'{"id": 1}\n{"id": 2}\n'
+    assert json_response.headers['ETag'] != ndjson_response.headers['ETag']
+    assert json_response.headers['Vary'] == ndjson_response.headers['Vary'] == 'Accept'
+
+    headers = {'If-None-Match': json_response.headers['ETag']}
+    assert client.get('/movies', headers={**NDJSON, **headers}).status_code == 200
+    assert client.get('/movies', headers=headers).status_code == 304
+
+
+def test_matching_etag_is_not_modified_until_a_write():
+    """
+    Test a matching If-None-Match is answered with 304
+    without running the view, and with 200 after a write
+    """
+    client = app.test_client()
+    etag = client.get('/movies').headers['ETag']
+    views_run.clear()
+    response = client.get('/movies', headers={'If-None-Match': etag})
+    assert (response.status_code, response.headers['ETag'], views_run) == (304, etag, [])
+
+    resource_versions.bump('movies_reviews')
+    response = client.get('/movies', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_if_modified_since_sees_a_write_in_the_same_second():
+    """
+    Test If-Modified-Since is compared with the time of the last write,
+    not with the Last-Modified header rounded down to the second
+    """
+    client = app.test_client()
+    resource_versions.bump('movies')
+    last_modified = client.get('/movies').headers['Last-Modified']
+    resource_versions.bump('movies')
+    assert client.get('/movies', headers={'If-Modified-Since': last_modified}) \
+        .status_code == 200
+
+    _etag, modified_at = resource_versions.validators(['movies'])
+    since = http_date(int(modified_at) + 1)
+    assert client.get('/movies', headers={'If-Modified-Since': since}).status_code == 304
+
+
+def test_page_cache_serves_the_rendered_page():
+    """
+    Test a cached page is served without running the view
+    until a write changes its ETag
+    """
+    client = app.test_client()
+    views_run.clear()
+    first = client.get('/users')
+    second = client.get('/users')
+    assert views_run == ['users']
+    assert second.data == first.data == b'1 users'
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    resource_versions.bump('users_movies')
+    assert client.get('/users').data == b'2 users'
@@ -0,0 +1,69 @@
+"""
+Test the append-only JSON lines storage of JSONLogDataManager
+"""
+import json
+import os
+import tempfile
+
+from data_manager.json_log_data_manager import JSONLogDataManager
+
+
+def test_log_is_replayed_when_reopened():
+    """
+    Test adds, updates and deletes survive a restart,
+    a torn last line is dropped and deleted ids are not reused
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.jsonl')
+        movies = JSONLogDataManager(file_name, 'id')
+        movies.add_items([{'movie_name': 'Movie 1'}, {'movie_name': 'Movie 2'},
+                          {'movie_name': 'Movie 3'}])
+        assert movies.update_item({'id': 2, 'year': 2001})
+        assert movies.delete_item(3)
+        with open(file_name, 'ab') as file:
+            file.write(b'{"put": {"id": 4, "movie_na')  # crash during a write
+
+        movies = JSONLogDataManager(file_name, 'id')
+        assert movies.get_all_data() == [{'movie_name': 'Movie 1', 'id': 1},
+                                         {'movie_name': 'Movie 2', 'id': 2, 'year': 2001}]
+        assert movies.get_item_by_id(3) is None
+        assert movies.add_item({'movie_name': 'Movie 4'})
+        assert movies.get_item_by_id(4) == {'movie_name': 'Movie 4', 'id': 4}
+
+
+def test_compaction_keeps_the_live_items():
+    """
+    Test a JSON list file is converted, and the log is rewritten
+    with the live items once most of its lines are dead
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.json')
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump([{'id': 1, 'rating': 0}, {'id': 2, 'rating': 0}], file)
+
+        movies = JSONLogDataManager(file_name, 'id', compact_min_dead_lines=3)
+        for rating in range(1, 4):
+            movies.update_item({'id': 1, 'rating': rating})
+
+        with open(file_name, 'rb') as file:
+            assert file.read().count(b'\n') == 3  # the next id and the two items
+        assert movies.get_page(10)[0] == [{'id': 1, 'rating': 3}, {'id': 2, 'rating': 0}]
+        assert os.listdir(directory) == ['movies.json']
+
+
+def test_compaction_keeps_the_next_id():
+    """
+    Test the ids deleted before a compaction are not reused after a restart
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.jsonl')
+        movies = JSONLogDataManager(file_name, 'id')
+        movies.add_items([{'movie_name': 'Movie 1'}, {'movie_name': 'Movie 2'},
+                          {'movie_name': 'Movie 3'}])
+        assert movies.delete_item(3)
+        movies.compact()
+
+        movies = JSONLogDataManager(file_name, 'id')
+        assert movies.generate_new_id() == 4
+        assert movies.get_all_data() == [{'movie_name': 'Movie 1', 'id': 1},
+                                         {'movie_name': 'Movie 2', 'id': 2}]
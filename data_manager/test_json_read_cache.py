@@ -0,0 +1,56 @@
+"""
+Test the in-memory copy of the json file of JSONDataManager
+"""
+import json
+import os
+import tempfile
+
+from data_manager.json_data_manager import JSONDataManager
+
+
+def write_movies(file_name: str, movies: list[dict]) -> None:
+    """
+    Replace the json file like an editor would,
+    a new file renamed over the old one
+    """
+    with open(file_name + '.new', 'w', encoding='utf-8') as file:
+        json.dump(movies, file)
+    os.replace(file_name + '.new', file_name)
+
+
+def test_file_is_parsed_again_only_when_changed():
+    """
+    Test reads share one parsed list, writes of the manager
+    keep it, and an edit of the file is picked up
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.json')
+        write_movies(file_name, [{'id': 1, 'movie_name': 'Movie 1'}])
+        movies = JSONDataManager(file_name, 'id')
+
+        assert movies.get_all_data() is movies.get_all_data()
+        assert movies.add_item({'movie_name': 'Movie 2'})
+        assert movies.get_item_by_id(2) == {'movie_name': 'Movie 2', 'id': 2}
+
+        write_movies(file_name, [{'id': 1, 'movie_name': 'Edited'}])
+        assert movies.get_item_by_id(1) == {'id': 1, 'movie_name': 'Edited'}
+        assert movies.get_item_by_id(2) is None
+
+
+def test_mmap_loader_reads_the_same_items():
+    """
+    Test the file mapped in memory parses like the file read,
+    and an in-place edit of the same size is picked up
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'movies.json')
+        write_movies(file_name, [{'id': 1, 'movie_name': 'Movie 1'}])
+        movies = JSONDataManager(file_name, 'id', use_mmap=True)
+        assert movies.get_all_data() == [{'id': 1, 'movie_name': 'Movie 1'}]
+
+        with open(file_name, 'r+b') as file:
+            file.seek(file.read().index(b'1"'))
+            file.write(b'9')
+        stat = os.stat(file_name)
+        os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert movies.get_all_data() == [{'id': 1, 'movie_name': 'Movie 9'}]
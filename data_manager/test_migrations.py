@@ -0,0 +1,37 @@
+"""
+Test the schema migrations of existing databases
+"""
+from sqlalchemy import Column, Integer, MetaData, Table, insert, select
+
+from data_manager.data_models import db
+from data_manager.migrations import delete_duplicate_rows
+
+
+def test_delete_duplicate_rows_keeps_the_oldest_and_the_nulls(app):
+    """
+    Test only the newer rows of a duplicated pair are deleted,
+    rows with a NULL in the columns are not duplicates
+    """
+    metadata = MetaData()
+    table = Table('favourites', metadata,
+                  Column('id', Integer, primary_key=True),
+                  Column('user_id', Integer),
+                  Column('movie_id', Integer))
+    metadata.create_all(db.engine)
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(insert(table), [
+                {'id': 1, 'user_id': 1, 'movie_id': 1},
+                {'id': 2, 'user_id': 1, 'movie_id': 1},
+                {'id': 3, 'user_id': 1, 'movie_id': None},
+                {'id': 4, 'user_id': 1, 'movie_id': None},
+                {'id': 5, 'user_id': 1, 'movie_id': 1},
+                {'id': 6, 'user_id': 2, 'movie_id': 1},
+            ])
+
+        assert delete_duplicate_rows(db, table, [table.c.user_id, table.c.movie_id]) == [2, 5]
+        with db.engine.connect() as connection:
+            assert connection.scalars(select(table.c.id).order_by(table.c.id)).all() == \
+                [1, 3, 4, 6]
+    finally:
+        metadata.drop_all(db.engine)
@@ -0,0 +1,97 @@
+"""
+Test the persistent cache of the OMDb responses
+"""
+import pytest
+import requests
+
+import omdb_cache
+from omdb_cache import OMDbCache, OMDbCacheMiss
+from omdb_stub_server import stub_movie
+
+NOT_FOUND = {'Response': 'False', 'Error': 'Movie not found!'}
+
+
+class FakeOMDb:
+    """
+    fetch_response counting its calls, answering
+    with the stub server responses or raising error
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def __call__(self, title: str) -> dict:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return stub_movie(title)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    The time of the cache, moved by the tests
+    """
+    now = [1000.0]
+    monkeypatch.setattr(omdb_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_found_movies_expire_after_the_ttl(tmp_path, clock):
+    """
+    Test a cached movie is served until its TTL,
+    then fetched again, or served stale when OMDb fails
+    """
+    cache = OMDbCache(str(tmp_path / 'omdb_cache.sqlite'), ttl=60, negative_ttl=10)
+    fetch = FakeOMDb()
+    assert cache.fetch('Heat', fetch)['Title'] == 'Heat'
+    clock[0] += 60
+    assert cache.fetch('  HEAT ', fetch)['Title'] == 'Heat'
+    assert fetch.calls == 1
+
+    clock[0] += 1
+    assert cache.fetch('Heat', fetch)['Title'] == 'Heat'
+    assert fetch.calls == 2
+
+    clock[0] += 61
+    fetch.error = requests.exceptions.Timeout('timed out')
+    assert cache.fetch('Heat', fetch)['Title'] == 'Heat'
+    assert cache.stats()['stale_served'] == 1
+
+
+def test_not_found_is_cached_for_the_negative_ttl(tmp_path, clock):
+    """
+    Test "Movie not found!" is kept for the negative TTL,
+    other OMDb errors are not cached
+    """
+    cache = OMDbCache(str(tmp_path / 'omdb_cache.sqlite'), ttl=60, negative_ttl=10)
+    fetch = FakeOMDb()
+    assert cache.fetch('Unknown Movie', fetch) == NOT_FOUND
+    clock[0] += 10
+    assert cache.fetch('Unknown Movie', fetch) == NOT_FOUND
+    assert fetch.calls == 1
+    clock[0] += 1
+    cache.fetch('Unknown Movie', fetch)
+    assert fetch.calls == 2
+    assert cache.stats()['negative_hits'] == 1
+
+    assert not cache.set('Heat', {'Response': 'False', 'Error': 'Request limit reached!'})
+    assert cache.get('Heat') is None
+
+
+def test_cache_only_never_calls_omdb(tmp_path, clock):
+    """
+    Test offline mode serves cached responses, even expired,
+    and raises OMDbCacheMiss for the others
+    """
+    path = str(tmp_path / 'omdb_cache.sqlite')
+    fetch = FakeOMDb()
+    OMDbCache(path, ttl=60).fetch('Heat', fetch)
+    cache = OMDbCache(path, ttl=60, cache_only=True)
+    clock[0] += 120
+    assert cache.fetch('Heat', fetch)['Title'] == 'Heat'
+    with pytest.raises(OMDbCacheMiss):
+        cache.fetch('Ronin', fetch)
+    assert fetch.calls == 1
+    assert cache.stats()['offline_misses'] == 1
@@ -0,0 +1,153 @@
+"""
+Test the OMDb client retries, concurrency
+and rate limits against a stubbed transport
+"""
+import json
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import omdb_client
+from omdb_client import OMDbClient, RateLimiter
+from omdb_stub_server import stub_movie
+
+
+class StubAdapter(BaseAdapter):
+    """
+    Transport answering each request with the next
+    scripted status code or raising the next scripted exception,
+    200 with a stub movie once the script is over
+    """
+
+    def __init__(self, *script, on_send=None):
+        super().__init__()
+        self.script = list(script)
+        self.on_send = on_send
+        self.requests = 0
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        self.requests += 1
+        if self.on_send is not None:
+            self.on_send()
+        step = self.script.pop(0) if self.script else 200
+        if isinstance(step, Exception):
+            raise step
+
+        response = requests.Response()
+        response.status_code = step
+        response._content = json.dumps(stub_movie('Heat')).encode('utf-8')
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def create_client(adapter: StubAdapter, **options) -> OMDbClient:
+    """
+    A client without backoff sending its requests to adapter
+    """
+    client = OMDbClient(base_url='http://omdb.test/', backoff=0, **options)
+    client._session.mount('http://', adapter)
+    return client
+
+
+@pytest.mark.parametrize('error', [429, 503, requests.exceptions.Timeout('timed out'),
+                                   requests.exceptions.ConnectionError('refused')])
+def test_transient_errors_are_retried(error):
+    """
+    Test 429, 5xx, timeouts and connection errors are retried
+    """
+    adapter = StubAdapter(error, error)
+    client = create_client(adapter, max_retries=2)
+    assert client.request_movie('Heat')['Title'] == 'Heat'
+    assert adapter.requests == 3
+    assert client.stats()['retries'] == 2
+
+
+def test_retries_are_bounded():
+    """
+    Test the last attempt's error is raised
+    """
+    adapter = StubAdapter(503, 503, 503)
+    with pytest.raises(requests.exceptions.HTTPError):
+        create_client(adapter, max_retries=2).request_movie('Heat')
+    assert adapter.requests == 3
+
+    adapter = StubAdapter(*[requests.exceptions.Timeout('timed out')] * 2)
+    with pytest.raises(requests.exceptions.Timeout):
+        create_client(adapter, max_retries=1).request_movie('Heat')
+
+
+def test_client_errors_are_not_retried():
+    """
+    Test a 4xx other than 429 fails at once
+    """
+    adapter = StubAdapter(401)
+    client = create_client(adapter)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.request_movie('Heat')
+    assert adapter.requests == 1
+    assert client.stats()['errors'] == 1
+
+
+def test_concurrency_is_limited():
+    """
+    Test no more than max_concurrency requests are in flight
+    """
+    lock = threading.Lock()
+    release = threading.Event()
+    in_flight = [0, 0]  # current, max
+
+    def wait_for_release():
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        release.wait(5)
+        with lock:
+            in_flight[0] -= 1
+
+    client = create_client(StubAdapter(on_send=wait_for_release), max_concurrency=2)
+    threads = [threading.Thread(target=client.request_movie, args=('Heat',))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    threading.Timer(0.1, release.set).start()
+    for thread in threads:
+        thread.join()
+    assert in_flight[1] == 2
+
+
+class FakeClock:
+    """
+    monotonic and sleep of a clock only moved by sleep
+    """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate(monkeypatch):
+    """
+    Test the token bucket lets burst requests through at once,
+    then one request every 1 / rate seconds
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(omdb_client.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(omdb_client.time, 'sleep', clock.sleep)
+    limiter = RateLimiter(rate=4.0, burst=2)
+
+    acquired_at = []
+    for _ in range(5):
+        limiter.acquire()
+        acquired_at.append(clock.now - 100.0)
+    assert acquired_at == pytest.approx([0.0, 0.0, 0.25, 0.5, 0.75])
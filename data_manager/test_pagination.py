@@ -0,0 +1,133 @@
+"""
+Test the keyset pagination cursors
+and the validation of the listing arguments
+"""
+import base64
+import json
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from data_manager.data_models import db, Movie
+from data_manager.movies import Movies
+from data_manager.pagination import encode_cursor, decode_cursor
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from request_args import get_page_args, get_search_args, get_top_movies_args, \
+    get_recommendations_args, get_movie_filters, get_limit_errors, MOVIES_SORT_FIELDS
+
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
+
+
+def raw_cursor(payload) -> str:
+    """
+    A cursor token for any payload, as a client could forge it
+    """
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    """
+    Test a cursor decodes to its values for its own sort order only
+    """
+    cursor = encode_cursor('year', True, [1999, 7])
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 'year', True) == [1999, 7]
+    assert decode_cursor(cursor, 'year', False) is None
+    assert decode_cursor(cursor, 'rating', True) is None
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor!', '%%%', 'é', 'AAAA',
+                                    raw_cursor([1999, 7]),
+                                    raw_cursor({'s': 'id', 'd': False, 'v': 7}),
+                                    raw_cursor({'s': 'id', 'd': False, 'v': [1, 2, 3]}),
+                                    raw_cursor({'s': 'id', 'd': False, 'v': [[1], 1]}),
+                                    raw_cursor({'s': 'id', 'd': False, 'v': [1, None]})])
+def test_invalid_cursors_are_rejected(cursor):
+    """
+    Test garbage and tampered tokens decode to None
+    """
+    assert decode_cursor(cursor, 'id', False) is None
+
+
+@pytest.mark.parametrize('limit', ['²', '١٢', '１２', '-1', '0', '501', '1.5', ' 12', ''])
+def test_invalid_limits_are_errors(limit):
+    """
+    Test a limit that is not a number in range
+    is an error message, never an exception
+    """
+    args = MultiDict({'limit': limit, 'min_reviews': limit})
+    assert isinstance(get_page_args(args, MOVIES_SORT_FIELDS), list)
+    assert isinstance(get_search_args(MultiDict({'q': 'heat', 'limit': limit})), list)
+    assert isinstance(get_top_movies_args(args), list)
+    assert isinstance(get_recommendations_args(args), list)
+
+
+def test_valid_limits_are_ascii_numbers_in_range():
+    """
+    Test the limits 1 - MAX_PAGE_SIZE written with ASCII digits are valid
+    """
+    assert get_limit_errors('1') == get_limit_errors('500') == []
+    assert get_recommendations_args(MultiDict({'limit': '12'})) == {'limit': 12}
+
+
+def test_year_filters_must_be_ascii_digits():
+    """
+    Test superscript and non-ASCII decimal digits are rejected
+    """
+    assert get_movie_filters(MultiDict({'min_year': '199²'})) == \
+        ([], ['Year must be 4 digits'])
+    assert get_movie_filters(MultiDict({'min_year': '١٩٩٩'})) == \
+        ([], ['Year must be 4 digits'])
+    assert get_movie_filters(MultiDict({'max_year': '1999'})) == ([('year', '<=', 1999)], [])
+
+
+def test_page_args_reject_a_tampered_cursor():
+    """
+    Test a cursor of another sort order or a forged one is an error message
+    """
+    cursor = encode_cursor('year', False, [1999, 7])
+    assert get_page_args(MultiDict({'sort': 'year', 'cursor': cursor}),
+                         MOVIES_SORT_FIELDS)['cursor'] == cursor
+    assert get_page_args(MultiDict({'sort': 'year', 'order': 'desc', 'cursor': cursor}),
+                         MOVIES_SORT_FIELDS) == ['Invalid cursor']
+    assert get_page_args(MultiDict({'cursor': raw_cursor({'s': 'id', 'd': False})}),
+                         MOVIES_SORT_FIELDS) == ['Invalid cursor']
+
+
+@pytest.mark.usefixtures('app')
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_cover_every_movie_once(descending):
+    """
+    Test following the next cursors returns every movie once,
+    in order, when many movies share the sort value
+    """
+    db.session.add_all([Movie(movie_name=f'Movie {number}', year=2000 + number % 3)
+                        for number in range(10)])
+    db.session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        movies, cursor = movies_data_manager.get_movies_page(3, cursor, sort_by='year',
+                                                             descending=descending)
+        assert len(movies) <= 3
+        seen.extend((movie['year'], movie['id']) for movie in movies)
+        if cursor is None:
+            break
+    assert seen == sorted(seen, reverse=descending)
+    assert len(seen) == 10 and len(set(seen)) == 10
+
+
+@pytest.mark.usefixtures('app')
+def test_page_with_an_invalid_cursor_is_none():
+    """
+    Test the data manager returns None for a cursor
+    of another sort order or forged values
+    """
+    db.session.add(Movie(movie_name='Movie 1', year=2000))
+    db.session.commit()
+    assert movies_data_manager.get_movies_page(3, encode_cursor('year', False, [2000, 1])) \
+        is None
+    assert movies_data_manager.get_movies_page(3, 'garbage') is None
+    assert movies_data_manager.get_movies_page(
+        3, raw_cursor({'s': 'id', 'd': False, 'v': [{'id': 1}, 1]})) is None
@@ -0,0 +1,117 @@
+"""
+Test that the listing and detail data managers
+run a constant number of queries,
+whatever the number of users, favourites and reviews
+"""
+import pytest
+
+from data_manager.data_models import db, User, Movie, UserMovie, MovieReview
+from data_manager.movies import Movies
+from data_manager.query_counter import QueryCounter, assert_max_queries
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.users import Users
+
+users_data_manager = Users(SQLiteDataManager('id', User, db))
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
+
+
+def create_test_data(users_count: int, movies_count: int):
+    """
+    Add users and movies, every new user
+    favourites and reviews every new movie
+    """
+    users = [User(user_name=f'User {users_count}-{number}') for number in range(users_count)]
+    movies = [Movie(movie_name=f'Movie {movies_count}-{number}', year=2000 + number)
+              for number in range(movies_count)]
+    db.session.add_all(users + movies)
+    db.session.flush()
+    for user in users:
+        for movie in movies:
+            db.session.add(UserMovie(user_id=user.id, movie_id=movie.id))
+            db.session.add(MovieReview(user_id=user.id, movie_id=movie.id,
+                                       rating=5.0, review_text='ok'))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def count_queries(func, *args, **kwargs) -> int:
+    """
+    Number of queries func executes
+    """
+    db.session.expunge_all()
+    with QueryCounter(db.engine) as counter:
+        func(*args, **kwargs)
+    return counter.count
+
+
+@pytest.mark.usefixtures('app')
+def test_get_all_users_queries_do_not_grow_with_favourites():
+    """
+    Test users listing is not N+1
+    """
+    create_test_data(2, 2)
+    small = count_queries(users_data_manager.get_all_users)
+    create_test_data(10, 10)  # 12 users, 12 movies
+    large = count_queries(users_data_manager.get_all_users)
+    assert small == large
+
+
+@pytest.mark.usefixtures('app')
+def test_get_movies_page_queries_do_not_grow_with_reviews():
+    """
+    Test movies listing is not N+1
+    """
+    create_test_data(2, 2)
+    small = count_queries(movies_data_manager.get_movies_page, 50)
+    create_test_data(10, 10)  # 12 users, 12 movies
+    large = count_queries(movies_data_manager.get_movies_page, 50)
+    assert small == large
+
+
+@pytest.mark.usefixtures('app')
+def test_listing_and_detail_query_budget():
+    """
+    Test listing and detail reads stay in their query budget
+    """
+    create_test_data(5, 5)
+    db.session.expunge_all()
+    assert len(assert_max_queries(db.engine, 2, users_data_manager.get_all_users)) == 5
+    db.session.expunge_all()
+    assert assert_max_queries(db.engine, 2, users_data_manager.get_users_page, 3)
+    db.session.expunge_all()
+    assert assert_max_queries(db.engine, 2, movies_data_manager.get_movies)
+    db.session.expunge_all()
+    assert assert_max_queries(db.engine, 2, users_data_manager.get_user, 1)
+    db.session.expunge_all()
+    assert assert_max_queries(db.engine, 2, movies_data_manager.get_movie, 1)
+
+
+@pytest.mark.usefixtures('app')
+def test_listing_pages_are_read_as_rows():
+    """
+    Test listing pages serialize like the entities
+    without loading any entity in the session
+    """
+    create_test_data(3, 3)
+    users_page, users_cursor = users_data_manager.get_users_page(2)
+    movies_page, _cursor = movies_data_manager.get_movies_page(2, sort_by='year',
+                                                                descending=True)
+    assert len(db.session.identity_map) == 0
+    assert users_data_manager.get_users_page(2, users_cursor)[0][0]['id'] == 3
+
+    assert users_page == [users_data_manager.get_user(1), users_data_manager.get_user(2)]
+    assert movies_page == [movies_data_manager.get_movie(3), movies_data_manager.get_movie(2)]
+
+
+@pytest.mark.usefixtures('app')
+def test_movie_summary_does_not_load_the_reviews():
+    """
+    Test the existence check of the reviews pages
+    reads one row however many reviews the movie has
+    """
+    create_test_data(10, 1)
+    assert count_queries(movies_data_manager.get_movie_summary, 1) == 1
+    assert len(db.session.identity_map) == 0
+    movie = movies_data_manager.get_movie(1)
+    assert movies_data_manager.get_movie_summary(1).items() <= movie.items()
+    assert movies_data_manager.get_movie_summary(2) is None
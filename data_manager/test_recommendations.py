@@ -0,0 +1,104 @@
+"""
+Test item-item recommendations from users' favourites
+"""
+import pytest
+from sqlalchemy import text
+
+from data_manager.data_models import db, User, Movie, UserMovie
+from data_manager.recommendations import Recommendations
+from data_manager.resource_versions import ResourceVersions
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.users import Users
+from data_manager.users_movies import UsersMovies
+from http_cache import RESOURCE_TABLES
+
+recommendations = Recommendations(db, top_k=2)
+users_movies_data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db),
+                                        recommendations=recommendations)
+users_data_manager = Users(SQLiteDataManager('id', User, db), recommendations=recommendations)
+
+
+def create_test_data():
+    """
+    Alice favourites movies 1, 2, Bob 1, 2, 3, Carol 3, 4
+    """
+    db.session.add_all([User(user_name=name) for name in ('Alice', 'Bob', 'Carol')] +
+                       [Movie(movie_name=f'Movie {number}') for number in range(1, 5)])
+    db.session.flush()
+    for user_id, movie_id in ((1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 3), (3, 4)):
+        db.session.add(UserMovie(user_id=user_id, movie_id=movie_id))
+    db.session.commit()
+
+
+def neighbours() -> list:
+    """
+    All stored neighbours
+    """
+    return db.session.execute(text('SELECT movie_id, neighbour_id, ROUND(CAST(score AS NUMERIC), 6) '
+                                   'FROM movie_neighbours ORDER BY 1, 2')).all()
+
+
+@pytest.mark.usefixtures('app')
+def test_recommend_movies_favourited_by_similar_users():
+    """
+    Test Alice gets movie 3, favourited along with her movies by Bob
+    """
+    create_test_data()
+    recommendations.rebuild()
+
+    movies = recommendations.get_user_recommendations(1, 10)
+    assert [movie['id'] for movie in movies] == [3]
+    similar = recommendations.get_similar_movies([1], 1)
+    assert similar[1][0]['id'] == 2  # favourited by the same two users
+
+
+@pytest.mark.usefixtures('app')
+def test_favourite_updates_match_a_rebuild():
+    """
+    Test adding and deleting favourites keeps the neighbours a rebuild would store
+    """
+    create_test_data()
+    recommendations.rebuild()
+
+    users_movies_data_manager.add_user_movie({'user_id': 3, 'movie_id': 1})
+    updated = neighbours()
+    recommendations.rebuild()
+    assert updated == neighbours()
+
+    users_movies_data_manager.delete_user_movie(1)
+    updated = neighbours()
+    recommendations.rebuild()
+    assert updated == neighbours()
+
+
+@pytest.mark.usefixtures('app')
+def test_user_delete_matches_a_rebuild():
+    """
+    Test deleting a user drops their favourites from the neighbours,
+    Bob's deletion leaves Alice's movies 1 and 2 without movie 3
+    """
+    create_test_data()
+    recommendations.rebuild()
+
+    assert users_data_manager.delete_user(2)
+    updated = neighbours()
+    recommendations.rebuild()
+    assert updated == neighbours()
+    assert [movie['id'] for movie in recommendations.get_user_recommendations(1, 10)] == []
+
+
+@pytest.mark.usefixtures('app')
+def test_neighbour_updates_change_the_etag():
+    """
+    Test a rebuild and a favourite's update of the neighbours
+    each give the recommendations a new ETag
+    """
+    create_test_data()
+    versions = ResourceVersions()
+    versioned = Recommendations(db, top_k=2, versions=versions)
+    etags = [versions.validators(RESOURCE_TABLES['recommendations'])[0]]
+    versioned.rebuild()
+    etags.append(versions.validators(RESOURCE_TABLES['recommendations'])[0])
+    versioned.update_movies([1])
+    etags.append(versions.validators(RESOURCE_TABLES['recommendations'])[0])
+    assert len(set(etags)) == 3
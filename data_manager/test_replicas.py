@@ -0,0 +1,90 @@
+"""
+Test the reads routed to a replica
+and the read-your-writes stickiness
+"""
+import os
+import sqlite3
+import tempfile
+
+from flask import Flask, jsonify
+
+from data_manager.data_models import db, Movie
+from data_manager.replicas import ReplicaRouter, STICKY_COOKIE
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+directory = tempfile.mkdtemp()
+PRIMARY = os.path.join(directory, 'primary.sqlite')
+REPLICA = os.path.join(directory, 'replica.sqlite')
+
+
+def create_worker():
+    """
+    A Flask app with its own router, like one server process,
+    listing and adding movies
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + PRIMARY
+    app.config['DATABASE_REPLICA_URLS'] = ['sqlite:///' + REPLICA]
+    app.config['DATABASE_REPLICA_LAG'] = 60.0
+    db.init_app(app)
+    router = ReplicaRouter(db)
+    router.init_app(app)
+    movies = SQLiteDataManager('id', Movie, db, router=router)
+
+    @app.route('/movies', methods=['POST'])
+    def movies_list():
+        movies.add_item(Movie(movie_name='Written'))
+        return jsonify([movie.movie_name for movie in movies.get_page(10)[0]])
+
+    @app.route('/movies/list')
+    def movies_read_only():
+        return jsonify([movie.movie_name for movie in movies.get_page(10)[0]])
+
+    return app
+
+
+writer = create_worker()
+other_worker = create_worker()
+
+
+def create_test_data():
+    """
+    The replica is a copy of the primary
+    that misses the last movie
+    """
+    with writer.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        db.session.add(Movie(movie_name='Copied'))
+        db.session.commit()
+    with sqlite3.connect(PRIMARY) as primary, sqlite3.connect(REPLICA) as replica:
+        primary.backup(replica)
+    with writer.app_context():
+        db.session.add(Movie(movie_name='Not copied yet'))
+        db.session.commit()
+
+
+def test_reads_go_to_the_replica():
+    """
+    Test a worker that did not write reads the replica
+    """
+    create_test_data()
+    assert other_worker.test_client().get('/movies/list').json == ['Copied']
+
+
+def test_writer_reads_its_writes():
+    """
+    Test the request that wrote, and the next requests of the same client
+    on another worker, read the primary
+    """
+    create_test_data()
+    client = writer.test_client()
+    response = client.post('/movies')
+    assert response.json == ['Copied', 'Not copied yet', 'Written']
+
+    other_client = other_worker.test_client()
+    assert other_client.get('/movies/list').json == ['Copied']
+
+    other_client.set_cookie(STICKY_COOKIE, client.get_cookie(STICKY_COOKIE).value)
+    assert other_client.get('/movies/list').json == ['Copied', 'Not copied yet', 'Written']
@@ -0,0 +1,81 @@
+"""
+Test the per-request SQL and timing instrumentation
+"""
+import json
+import logging
+
+import pytest
+from flask import jsonify, render_template_string
+
+from data_manager.data_models import db, User
+from data_manager.request_metrics import RequestMetrics
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.users import Users
+
+users_data_manager = Users(SQLiteDataManager('id', User, db))
+
+
+def users_list():
+    return jsonify(users_data_manager.get_all_users())
+
+
+def users_page():
+    return render_template_string('{{ users|length }} users',
+                                  users=users_data_manager.get_all_users())
+
+
+@pytest.fixture
+def client(app):
+    """
+    An instrumented app listing two users without favourites
+    """
+    app.config['SLOW_QUERY_MS'] = 1e-6  # every statement is slow
+    RequestMetrics().init_app(app, [db.engine])
+    app.add_url_rule('/users', 'users_list', users_list)
+    app.add_url_rule('/users/page', 'users_page', users_page)
+    db.session.add_all([User(user_name='Alice'), User(user_name='Bob')])
+    db.session.commit()
+    return app.test_client()
+
+
+def test_request_timings_header_and_log(client, caplog):
+    """
+    Test a request reports its queries, serialization
+    and render time, and logs its slow statements
+    """
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger='movieflix.metrics'):
+        response = client.get('/users/page')
+
+    assert response.get_data(as_text=True) == '2 users'
+    timings = dict(metric.split(';', 1) for metric in response.headers['Server-Timing'].split(', '))
+    assert timings.keys() == {'db', 'db-slowest', 'serialize', 'render', 'total'}
+    # users and their favourites, eager loaded
+    assert timings['db'].startswith('desc="2 queries"')
+
+    events = [json.loads(record.getMessage()) for record in caplog.records]
+    assert [event['event'] for event in events] == ['slow_query', 'slow_query', 'request']
+    assert events[2]['endpoint'] == 'users_page'
+    assert events[2]['queries'] == 2
+    assert events[2]['slowest_query'].startswith('SELECT')
+
+
+def test_metrics_endpoint_counts_requests(client):
+    """
+    Test /metrics reports the requests
+    and their statements in Prometheus text format
+    """
+    before = client.get('/metrics').get_data(as_text=True)
+    client.get('/users')
+    client.get('/users')
+    metrics = client.get('/metrics').get_data(as_text=True)
+
+    def sample(text: str, line_start: str) -> float:
+        return next((float(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+                     if line.startswith(line_start)), 0.0)
+
+    requests_line = 'movieflix_requests_total{method="GET",endpoint="users_list",status="200"}'
+    assert sample(metrics, requests_line) - sample(before, requests_line) == 2
+    queries_line = 'movieflix_request_db_queries_total{endpoint="users_list"}'
+    assert sample(metrics, queries_line) - sample(before, queries_line) == 4
+    assert '# TYPE movieflix_request_duration_seconds histogram' in metrics
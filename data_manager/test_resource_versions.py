@@ -0,0 +1,25 @@
+"""
+Test ResourceVersions validators
+"""
+from data_manager.resource_versions import ResourceVersions
+
+
+def test_write_changes_etag_of_dependent_tables():
+    """
+    Test a write changes the ETag of the responses reading that table only
+    """
+    versions = ResourceVersions()
+    users_etag, _ = versions.validators(['users', 'users_movies'])
+    movies_etag, movies_modified = versions.validators(['movies'])
+
+    versions.bump('users_movies')
+    assert versions.validators(['users', 'users_movies'])[0] != users_etag
+    assert versions.validators(['movies']) == (movies_etag, movies_modified)
+
+
+def test_etags_differ_between_processes():
+    """
+    Test ETags issued before a restart never match
+    """
+    assert ResourceVersions().validators(['users'])[0] != \
+        ResourceVersions().validators(['users'])[0]
@@ -0,0 +1,65 @@
+"""
+Test the per-movie review aggregates
+kept up to date by the movies_reviews triggers
+"""
+import pytest
+
+from data_manager.data_models import db, User, Movie, MovieReview
+from data_manager.migrations import upgrade_schema
+from data_manager.movies import Movies
+from data_manager.movies_reviews import MoviesReviews
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.users import Users
+
+users_data_manager = Users(SQLiteDataManager('id', User, db))
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
+movies_reviews_data_manager = MoviesReviews(SQLiteDataManager('id', MovieReview, db))
+
+
+def create_test_data():
+    """
+    Two users and three movies, no reviews
+    """
+    upgrade_schema(db)
+    db.session.add_all([User(user_name='Alice'), User(user_name='Bob')] +
+                       [Movie(movie_name=f'Movie {number}') for number in range(3)])
+    db.session.commit()
+
+
+def add_review(user_id: int, movie_id: int, rating: float):
+    """
+    Add a review through MoviesReviews
+    """
+    assert movies_reviews_data_manager.add_movie_review(
+        {'user_id': user_id, 'movie_id': movie_id, 'rating': rating, 'review_text': ''})
+
+
+@pytest.mark.usefixtures('app')
+def test_reviews_update_movie_aggregates():
+    """
+    Test review count and average follow added and deleted reviews
+    """
+    create_test_data()
+    add_review(1, 1, 8.0)
+    add_review(2, 1, 6.0)
+
+    movie = movies_data_manager.get_movie(1)
+    assert (movie['review_count'], movie['user_rating']) == (2, 7.0)
+
+    users_data_manager.delete_user(2)  # deletes the user's reviews
+    movie = movies_data_manager.get_movie(1)
+    assert (movie['review_count'], movie['user_rating']) == (1, 8.0)
+
+
+@pytest.mark.usefixtures('app')
+def test_top_movies_by_user_rating_skip_unreviewed_movies():
+    """
+    Test top movies are ordered by average rating, without unreviewed movies
+    """
+    create_test_data()
+    add_review(1, 1, 5.0)
+    add_review(1, 2, 9.0)
+
+    top = movies_data_manager.get_top_movies('user_rating', 10)
+    assert [movie['id'] for movie in top] == [2, 1]
+    assert 'movie_reviews' not in top[0]
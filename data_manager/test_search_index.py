@@ -0,0 +1,81 @@
+"""
+Test the FTS5 query built from the search box text
+and the index kept in sync by the triggers
+"""
+import pytest
+
+from data_manager.data_models import db, User, Movie, MovieReview
+from data_manager.movies import Movies
+from data_manager.movies_reviews import MoviesReviews
+from data_manager.search_index import build_match_query, create_movies_search_index
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db))
+reviews_data_manager = SQLiteDataManager('id', MovieReview, db)
+movies_reviews_data_manager = MoviesReviews(reviews_data_manager)
+
+
+def test_last_word_is_a_prefix():
+    """
+    Test every word is required and the last one matches as a prefix
+    """
+    assert build_match_query('star wa') == '"star" "wa"*'
+    assert build_match_query('star wars ') == '"star" "wars"'
+
+
+def test_fts_operators_are_plain_text():
+    """
+    Test quotes, parentheses and operators cannot break the FTS5 query
+    """
+    assert build_match_query('"OR (NEAR') == '"OR" "NEAR"*'
+    assert build_match_query('  *" ') is None
+
+
+def search_names(search_text: str) -> list:
+    return [movie['movie_name'] for movie in movies_data_manager.search_movies(search_text, 10)]
+
+
+@pytest.mark.usefixtures('app')
+def test_index_follows_the_movie_writes():
+    """
+    Test the triggers index an added movie,
+    reindex a renamed one and drop a deleted one
+    """
+    if not create_movies_search_index(db):
+        pytest.skip('FTS5 needs SQLite built with it')
+    assert movies_data_manager.add_new_movie({'movie_name': 'Star Wars', 'director': 'Lucas',
+                                              'year': 1977, 'rating': 8.6, 'poster': '',
+                                              'website': ''})
+    assert search_names('star wa') == ['Star Wars']
+    assert search_names('lucas ') == ['Star Wars']
+
+    assert movies_data_manager.update_movie({'id': 1, 'movie_name': 'A New Hope'})
+    assert search_names('star') == []
+    assert search_names('new hope') == ['A New Hope']
+
+    assert movies_data_manager.delete_movie(1)
+    assert search_names('hope') == []
+
+
+@pytest.mark.usefixtures('app')
+def test_index_follows_the_review_writes():
+    """
+    Test the triggers index the text of an added review,
+    reindex an edited one and drop a deleted one
+    """
+    if not create_movies_search_index(db):
+        pytest.skip('FTS5 needs SQLite built with it')
+    db.session.add_all([User(user_name='Alice'), Movie(movie_name='Movie 1')])
+    db.session.commit()
+    assert movies_reviews_data_manager.add_movie_review({'user_id': 1, 'movie_id': 1,
+                                                         'rating': 9.0,
+                                                         'review_text': 'a masterpiece'})
+    assert search_names('masterpiece') == ['Movie 1']
+
+    assert reviews_data_manager.update_item({'id': 1, 'review_text': 'a classic'})
+    assert search_names('masterpiece') == []
+    assert search_names('classic') == ['Movie 1']
+
+    assert reviews_data_manager.delete_item(1)
+    assert search_names('classic') == []
+    assert search_names('movie') == ['Movie 1']
@@ -0,0 +1,64 @@
+"""
+Test the caches and table versions
+shared by the worker processes
+"""
+import os
+import tempfile
+
+from data_manager.data_models import db
+from data_manager.entity_cache import EntityCache
+from data_manager.resource_versions import DatabaseResourceVersions
+from data_manager.sqlite_entity_cache import SQLiteEntityCache
+
+def test_sqlite_cache_is_shared():
+    """
+    Test an entry cached through one instance is a hit for another one
+    on the same file, and an invalidation evicts its dependents for both
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.sqlite')
+        worker_1 = SQLiteEntityCache(path, max_size=2)
+        worker_2 = SQLiteEntityCache(path, max_size=2)
+
+        worker_1.set('users', 1, {'id': 1, 'movies': [{'id': 3}]}, depends_on=[('movies', 3)])
+        worker_1.set('movies', 4, {'id': 4})
+        assert worker_2.get('users', 1) == {'id': 1, 'movies': [{'id': 3}]}
+
+        worker_2.invalidate('movies', 3)
+        assert worker_1.get('users', 1) is None
+        worker_2.set('movies', 5, {'id': 5})
+        worker_2.set('movies', 6, {'id': 6})  # evicts movie 4, the oldest
+        assert worker_1.get('movies', 4) is None
+        assert worker_1.stats()['size'] == 2
+
+
+def test_versions_are_shared_through_the_database(app):
+    """
+    Test a write recorded by one process gives the same ETag
+    in another one, which evicts the table's entities from its cache
+    """
+    worker_1 = DatabaseResourceVersions(db, poll_interval=0)
+    worker_2 = DatabaseResourceVersions(db, poll_interval=0)
+    worker_1.init_app(app)
+    worker_2.init_app(app)
+    cache = EntityCache()
+    cache.set('movies', 3, {'id': 3})
+    cache.set('users', 1, {'id': 1, 'movies': [{'id': 3}]}, depends_on=[('movies', 3)])
+    cache.set('users', 2, {'id': 2, 'movies': []})
+    written = []
+    worker_2.subscribe(lambda table, _written_at: written.append(table))
+    worker_2.subscribe(lambda table, _written_at: cache.invalidate_entity(table))
+
+    worker_1.bump('movies')
+    assert worker_1.validators(['movies'])[0] != worker_2.validators(['movies'])[0]
+    worker_2.refresh()
+    assert written == ['movies']
+    assert worker_1.validators(['movies', 'users']) == worker_2.validators(['movies', 'users'])
+    assert cache.get('movies', 3) is None
+    assert cache.get('users', 1) is None
+    assert cache.get('users', 2) is not None
+
+    worker_2.bump('movies')
+    worker_1.refresh()
+    assert worker_1.validators(['movies']) == worker_2.validators(['movies'])
+    assert written == ['movies']  # its own write
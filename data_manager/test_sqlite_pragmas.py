@@ -0,0 +1,42 @@
+"""
+Test the pragmas set on new SQLite connections
+"""
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+
+from data_manager.sqlite_pragmas import set_sqlite_pragmas
+
+PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+           'busy_timeout': 3000, 'mmap_size': 1048576}
+
+
+def test_every_pooled_connection_gets_the_pragmas():
+    """
+    Test a file database is switched to WAL
+    and each new connection gets the per connection pragmas
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine('sqlite:///' + os.path.join(directory, 'test.sqlite'),
+                               pool_size=2)
+        assert set_sqlite_pragmas(engine, PRAGMAS)
+
+        with engine.connect() as first, engine.connect() as second:
+            for connection in (first, second):
+                assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+                assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 3000
+                assert connection.execute(text('PRAGMA mmap_size')).scalar() == 1048576
+        engine.dispose()
+
+
+def test_memory_database_keeps_its_journal():
+    """
+    Test an in-memory database only gets the pragmas that apply to it
+    """
+    engine = create_engine('sqlite://')
+    assert set_sqlite_pragmas(engine, PRAGMAS)
+    with engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'memory'
+        assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 3000
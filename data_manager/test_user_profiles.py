@@ -0,0 +1,105 @@
+"""
+Test the materialized user profiles
+"""
+import pytest
+
+from data_manager.data_models import db, User, Movie, UserMovie, UserProfile
+from data_manager.movies import Movies
+from data_manager.query_counter import QueryCounter
+from data_manager.resource_versions import ResourceVersions
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.user_profiles import UserProfiles
+from data_manager.users import Users
+from data_manager.users_movies import UsersMovies
+from http_cache import RESOURCE_TABLES
+
+user_profiles = UserProfiles(db)
+users_data_manager = Users(SQLiteDataManager('id', User, db), profiles=user_profiles)
+movies_data_manager = Movies(SQLiteDataManager('id', Movie, db), profiles=user_profiles)
+users_movies_data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db),
+                                        profiles=user_profiles)
+
+
+def create_test_data():
+    """
+    Alice and Bob, Alice favourites movie 1
+    """
+    db.session.add_all([User(user_name='Alice'), User(user_name='Bob'),
+                        Movie(movie_name='Movie 1'), Movie(movie_name='Movie 2')])
+    db.session.flush()
+    db.session.add(UserMovie(user_id=1, movie_id=1))
+    db.session.commit()
+    user_profiles.rebuild()
+
+
+def favourite_names(user_id: int) -> list:
+    return [movie['movie_name'] for movie in users_data_manager.get_user(user_id)['movies']]
+
+
+@pytest.mark.usefixtures('app')
+def test_profiles_follow_the_writes():
+    """
+    Test a profile is rebuilt when a favourite is added or deleted
+    and when a favourite movie is updated, and get_user reads one row
+    """
+    create_test_data()
+    assert users_movies_data_manager.add_user_movie({'user_id': 1, 'movie_id': 2})
+    assert movies_data_manager.update_movie({'id': 1, 'movie_name': 'Movie One'})
+    assert favourite_names(1) == ['Movie One', 'Movie 2']
+
+    user_movie_id = users_movies_data_manager.get_favourite_ids(1, [1])[1]
+    assert users_movies_data_manager.delete_user_movie(user_movie_id)
+    db.session.expunge_all()
+    with QueryCounter(db.engine) as counter:
+        assert favourite_names(1) == ['Movie 2']
+    assert counter.count == 1
+
+    assert users_data_manager.delete_user(1)
+    assert db.session.get(UserProfile, 1) is None
+    assert user_profiles.check() == {'users': 1, 'missing': 0, 'stale': 0,
+                                     'orphaned': 0, 'repaired': 0}
+
+
+@pytest.mark.usefixtures('app')
+def test_check_repairs_the_profiles():
+    """
+    Test check finds missing, stale and orphaned profiles
+    and repair rebuilds them
+    """
+    create_test_data()
+    db.session.add(UserMovie(user_id=2, movie_id=2))  # written behind the profiles
+    db.session.delete(db.session.get(UserProfile, 1))
+    orphaned = int(db.engine.dialect.name == 'sqlite')  # foreign keys not enforced
+    if orphaned:
+        db.session.add(UserProfile(user_id=3, document={'id': 3}))
+    db.session.commit()
+
+    assert user_profiles.check() == {'users': 2, 'missing': 1, 'stale': 1,
+                                     'orphaned': orphaned, 'repaired': 0}
+    assert user_profiles.check(repair=True)['repaired'] == 2 + orphaned
+    assert user_profiles.check() == {'users': 2, 'missing': 0, 'stale': 0,
+                                     'orphaned': 0, 'repaired': 0}
+    assert favourite_names(2) == ['Movie 2']
+
+
+@pytest.mark.usefixtures('app')
+def test_profile_rebuild_changes_the_etag(monkeypatch):
+    """
+    Test a user read between a favourite write and the
+    rebuild of the profile is not served under the final ETag
+    """
+    create_test_data()
+    versions = ResourceVersions()
+    profiles = UserProfiles(db, versions=versions)
+    data_manager = UsersMovies(SQLiteDataManager('id', UserMovie, db, versions),
+                               profiles=profiles)
+    etags_before_rebuild = []
+    update_users = profiles.update_users
+
+    def read_then_update_users(user_ids: list):
+        etags_before_rebuild.append(versions.validators(RESOURCE_TABLES['users'])[0])
+        return update_users(user_ids)
+
+    monkeypatch.setattr(profiles, 'update_users', read_then_update_users)
+    assert data_manager.add_user_movie({'user_id': 1, 'movie_id': 2})
+    assert versions.validators(RESOURCE_TABLES['users'])[0] not in etags_before_rebuild
@@ -0,0 +1,233 @@
+"""
+UserProfiles class
+Materialized user documents: each user with its favourite
+movies, as Users.get_user returns them, stored in user_profiles
+so get_user is a single-row read instead of a user query,
+a favourites query and a dict built per call.
+
+A document is rebuilt after a write that changes it:
+a favourite added or deleted, the user renamed, one of its
+favourite movies updated. Like the movie neighbours, it is
+rebuilt in its own transaction after the write is committed,
+so check() finds and repairs the documents a failed rebuild left
+out of date. The rebuild bumps the user_profiles version: a response
+read between the write and the rebuild gets a new ETag afterwards.
+"""
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from .data_models import User, UserMovie, UserProfile
+from .projections import user_rows
+from .recommendations import chunks
+
+
+def user_document(user) -> dict:
+    """
+    Convert a user, entity or projection row,
+    and its favourite movies to dict format
+    :param user: User | UserRow
+    :return:
+        user (dict)
+    """
+    movies = []
+    if user.movies:
+        for user_movie in user.movies:
+            movies.append(
+                {
+                    "user_movie_id": user_movie.id,
+                    "id": user_movie.movie.id,
+                    "movie_name": user_movie.movie.movie_name,
+                    "director": user_movie.movie.director,
+                    "year": user_movie.movie.year,
+                    "rating": user_movie.movie.rating,
+                    "poster": user_movie.movie.poster,
+                    "website": user_movie.movie.website
+                }
+            )
+    return {"id": user.id,
+            "user_name": user.user_name,
+            "movies": movies}
+
+
+class UserProfiles:
+    """
+    A class maintaining the user_profiles table
+    """
+
+    def __init__(self, db, router=None, versions=None):
+        self._db = db
+        self._router = router
+        self._versions = versions
+
+    def _commit(self) -> None:
+        """
+        Commit the session and bump the user_profiles version
+        """
+        self._db.session.commit()
+        if self._versions is not None:
+            self._versions.bump(UserProfile.__tablename__)
+
+    def _build(self, user_ids: list) -> dict:
+        """
+        Build the documents of users from their rows
+        :param user_ids: list, at most IN_CHUNK_SIZE ids
+        :return:
+            user id -> document (dict)
+        """
+        session = self._db.session
+        rows = session.query(User.id, User.user_name).filter(User.id.in_(user_ids)).all()
+        return {user.id: user_document(user) for user in user_rows(session, rows)}
+
+    def _store(self, user_ids: list) -> None:
+        """
+        Replace the documents of users,
+        removing the documents of deleted users
+        :param user_ids: list
+        """
+        for chunk in chunks(list(dict.fromkeys(user_ids))):
+            documents = self._build(chunk)
+            self._db.session.execute(delete(UserProfile).where(UserProfile.user_id.in_(chunk)))
+            if documents:
+                self._db.session.execute(insert(UserProfile),
+                                         [{'user_id': user_id, 'document': document}
+                                          for user_id, document in documents.items()])
+
+    def update_users(self, user_ids: list) -> bool | None:
+        """
+        Rebuild the documents of users
+        after their favourites or names changed
+        :param user_ids: list
+        :return:
+            True for success update (bool) |
+            None
+        """
+        try:
+            self._store(user_ids)
+            self._commit()
+            return True
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def update_movie(self, movie_id: int) -> bool | None:
+        """
+        Rebuild the documents of the users
+        who favourited a movie that was updated
+        :param movie_id: int
+        :return:
+            True for success update (bool) |
+            None
+        """
+        return self.update_movies([movie_id])
+
+    def update_movies(self, movie_ids: list) -> bool | None:
+        """
+        Rebuild the documents of the users
+        who favourited movies that were updated
+        :param movie_ids: list
+        :return:
+            True for success update (bool) |
+            None
+        """
+        try:
+            user_ids = []
+            for chunk in chunks(list(movie_ids)):
+                user_ids.extend(self._db.session.scalars(
+                    select(UserMovie.user_id).distinct().where(UserMovie.movie_id.in_(chunk))))
+            self._store(user_ids)
+            self._commit()
+            return True
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def get_profile(self, user_id: int) -> dict | None:
+        """
+        Return the document of a user, in one single-row query
+        :param user_id: int
+        :return:
+            User (dict) |
+            None for a user without document
+        """
+        session = self._router.read_session() if self._router is not None else self._db.session
+        try:
+            return session.scalar(select(UserProfile.document)
+                                  .where(UserProfile.user_id == user_id))
+        except SQLAlchemyError as err:
+            print(err)
+            session.rollback()
+            return None
+
+    def check(self, repair: bool = False) -> dict | None:
+        """
+        Compare every document with a fresh build,
+        rebuilding the missing and out of date ones
+        and removing the ones of deleted users when repair is set
+        :param repair: bool
+        :return:
+            users, missing, stale, orphaned and repaired counts (dict) |
+            None
+        """
+        report = {'users': 0, 'missing': 0, 'stale': 0, 'orphaned': 0, 'repaired': 0}
+        try:
+            user_ids = self._db.session.scalars(select(User.id).order_by(User.id)).all()
+            for chunk in chunks(user_ids):
+                documents = self._build(chunk)
+                stored = dict(self._db.session.execute(
+                    select(UserProfile.user_id, UserProfile.document)
+                    .where(UserProfile.user_id.in_(chunk))).all())
+                wrong = [user_id for user_id in chunk if stored.get(user_id) != documents[user_id]]
+                report['users'] += len(chunk)
+                report['missing'] += sum(user_id not in stored for user_id in wrong)
+                report['stale'] += sum(user_id in stored for user_id in wrong)
+                if repair and wrong:
+                    self._store(wrong)
+                    report['repaired'] += len(wrong)
+
+            orphaned = self._db.session.scalars(
+                select(UserProfile.user_id).where(UserProfile.user_id.not_in(select(User.id)))
+            ).all()
+            report['orphaned'] = len(orphaned)
+            if repair and orphaned:
+                self._db.session.execute(delete(UserProfile)
+                                         .where(UserProfile.user_id.in_(orphaned)))
+                report['repaired'] += len(orphaned)
+            if report['repaired']:
+                self._commit()
+            else:
+                self._db.session.commit()
+            return report
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def rebuild(self) -> int | None:
+        """
+        Rebuild the documents of every user
+        :return:
+            number of stored documents (int) |
+            None
+        """
+        try:
+            self._db.session.execute(delete(UserProfile))
+            user_ids = self._db.session.scalars(select(User.id).order_by(User.id)).all()
+            self._store(user_ids)
+            self._commit()
+            return len(user_ids)
+        except SQLAlchemyError as err:
+            print(err)
+            self._db.session.rollback()
+            return None
+
+    def ensure_built(self) -> None:
+        """
+        Build the documents of an existing database
+        that has users but no documents yet
+        """
+        has_profiles = self._db.session.execute(select(UserProfile.user_id).limit(1)).first()
+        has_users = self._db.session.execute(select(User.id).limit(1)).first()
+        if has_users is not None and has_profiles is None:
+            self.rebuild()
@@ -2,10 +2,14 @@
 Users class
 Managing Users' CRUD operations
 """
-from typing import List
+from typing import Iterator, List
 
 from .data_manager_interface import DataManagerInterface
 from .data_models import User
+from .entity_cache import EntityCache
+from .recommendations import Recommendations
+from .request_metrics import timed
+from .user_profiles import UserProfiles, user_document
 
 
 class Users:
@@ -14,32 +18,33 @@ class Users:
     Implementing Users' CRUD operations
     """
 
-    def __init__(self, data_manager: DataManagerInterface):
+    def __init__(self, data_manager: DataManagerInterface, cache: EntityCache | None = None,
+                 recommendations: Recommendations | None = None,
+                 profiles: UserProfiles | None = None):
         self._data_manager = data_manager
+        self._cache = cache
+        self._recommendations = recommendations
+        self._profiles = profiles
 
     @staticmethod
+    @timed('serialize')
     def __user_to_dict(user) -> dict:
         """
         Convert user from db object to dict format
         """
-        movies = []
-        if user.movies:
-            for user_movie in user.movies:
-                movies.append(
-                    {
-                        "user_movie_id": user_movie.id,
-                        "id": user_movie.movie.id,
-                        "movie_name": user_movie.movie.movie_name,
-                        "director": user_movie.movie.director,
-                        "year": user_movie.movie.year,
-                        "rating": user_movie.movie.rating,
-                        "poster": user_movie.movie.poster,
-                        "website": user_movie.movie.website
-                    }
-                )
-        return {"id": user.id,
-                "user_name": user.user_name,
-                "movies": movies}
+        return user_document(user)
+
+    def __cache_user(self, user: dict) -> dict:
+        """
+        Cache a user dict, it depends on its favourite movies
+        :param user: dict
+        :return:
+            user (dict)
+        """
+        if self._cache is not None:
+            self._cache.set('users', user['id'], user,
+                            depends_on=[('movies', movie['id']) for movie in user['movies']])
+        return user
 
     def get_all_users(self) -> List[dict] | None:
         """
@@ -53,9 +58,44 @@ class Users:
 
         users = []
         for user in users_query:
-            users.append(self.__user_to_dict(user))
+            users.append(self.__cache_user(self.__user_to_dict(user)))
         return users
 
+    def get_users_page(self, limit: int, cursor: str | None = None,
+                       sort_by: str | None = None,
+                       descending: bool = False) -> tuple[List[dict], str | None] | None:
+        """
+        Return one page of users
+        :param limit: int
+        :param cursor: str | None
+        :param sort_by: str | None
+        :param descending: bool
+        :return:
+            (Users (List[dict]), next cursor | None) (tuple) |
+            None
+        """
+        page = self._data_manager.get_page(limit, cursor, sort_by=sort_by, descending=descending,
+                                           use_case='rows')
+        if page is None:
+            return None
+
+        users_query, next_cursor = page
+        return [self.__cache_user(self.__user_to_dict(user))
+                for user in users_query], next_cursor
+
+    def iter_users(self, sort_by: str | None = None,
+                   descending: bool = False) -> Iterator[dict]:
+        """
+        Iterate over all users dict, for streaming
+        responses. Users are not put in the entity cache.
+        :param sort_by: str | None
+        :param descending: bool
+        :return:
+            Users (Iterator[dict])
+        """
+        for user in self._data_manager.iter_items(sort_by=sort_by, descending=descending):
+            yield self.__user_to_dict(user)
+
     def get_user(self, user_id: int) -> dict | None:
         """
         Return a specific user given user_id
@@ -64,10 +104,20 @@ class Users:
             User (dict) |
             None
         """
+        if self._cache is not None:
+            user = self._cache.get('users', user_id)
+            if user is not None:
+                return user
+
+        if self._profiles is not None:
+            user = self._profiles.get_profile(user_id)
+            if user is not None:
+                return self.__cache_user(user)
+
         user = self._data_manager.get_item_by_id(user_id)
         if user is None:
             return None
-        return self.__user_to_dict(user)
+        return self.__cache_user(self.__user_to_dict(user))
 
     @staticmethod
     def __validate_user_data(new_user: dict) -> bool:
@@ -97,8 +147,11 @@ class Users:
             Invalid new user data, None
         """
         if self.__validate_user_data(new_user):
-            return self._data_manager.\
-                    add_item(self.__instantiate_new_user(new_user['user_name']))
+            user = self.__instantiate_new_user(new_user['user_name'])
+            added = self._data_manager.add_item(user)
+            if added and self._profiles is not None:
+                self._profiles.update_users([user.id])
+            return added
         return None
 
     def update_user(self, updated_user: dict):
@@ -109,14 +162,31 @@ class Users:
             True for success update user (bool) |
             None
         """
-        return self._data_manager.update_item(updated_user)
+        updated = self._data_manager.update_item(updated_user)
+        if updated and self._profiles is not None:
+            self._profiles.update_users([updated_user['id']])
+        if updated and self._cache is not None:
+            self._cache.invalidate('users', updated_user['id'])
+        return updated
 
     def delete_user(self, user_id: int) -> bool | None:
         """
-        Delete a user
+        Delete a user, with their favourites and reviews
         :param user_id: int
         :return:
             True for success delete user (bool) |
             None
         """
-        return self._data_manager.delete_item(user_id)
+        movie_ids = []
+        if self._recommendations is not None:
+            user = self._data_manager.get_item_by_id(user_id)
+            if user is None:
+                return None
+            movie_ids = [user_movie.movie_id for user_movie in user.movies]
+
+        deleted = self._data_manager.delete_item(user_id)
+        if deleted and self._cache is not None:
+            self._cache.invalidate('users', user_id)
+        if deleted and movie_ids:
+            self._recommendations.update_movies(movie_ids)
+        return deleted
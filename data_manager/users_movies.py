@@ -6,6 +6,9 @@ from typing import List
 
 from .data_manager_interface import DataManagerInterface
 from .data_models import UserMovie
+from .entity_cache import EntityCache
+from .recommendations import Recommendations
+from .user_profiles import UserProfiles
 
 
 class UsersMovies:
@@ -14,8 +17,13 @@ class UsersMovies:
     Implementing UsersMovies' CRUD operations
     """
 
-    def __init__(self, data_manager: DataManagerInterface):
+    def __init__(self, data_manager: DataManagerInterface, cache: EntityCache | None = None,
+                 recommendations: Recommendations | None = None,
+                 profiles: UserProfiles | None = None):
         self._data_manager = data_manager
+        self._cache = cache
+        self._recommendations = recommendations
+        self._profiles = profiles
 
     @staticmethod
     def __user_to_dict(user) -> dict:
@@ -64,6 +72,39 @@ class UsersMovies:
         """
         return self._data_manager.get_item_by_id(user_movie_id)
 
+    def is_favourite(self, user_id: int, movie_id: int) -> bool:
+        """
+        Check if a user favourited a movie,
+        an index lookup on (user_id, movie_id)
+        :param user_id: int
+        :param movie_id: int
+        :return:
+            True or False (bool)
+        """
+        page = self._data_manager.get_page(1, filters=[('user_id', '==', user_id),
+                                                       ('movie_id', '==', movie_id)])
+        return bool(page and page[0])
+
+    def get_favourite_ids(self, user_id: int, movie_ids: list) -> dict | None:
+        """
+        Return which of the movies a user favourited, in one query
+        :param user_id: int
+        :param movie_ids: list
+        :return:
+            movie id -> user movie id (dict) |
+            None
+        """
+        if not movie_ids:
+            return {}
+
+        page = self._data_manager.get_page(len(movie_ids),
+                                           filters=[('user_id', '==', user_id),
+                                                    ('movie_id', 'in', movie_ids)],
+                                           use_case='summary')
+        if page is None:
+            return None
+        return {user_movie.movie_id: user_movie.id for user_movie in page[0]}
+
     @staticmethod
     def __instantiate_user_movie(fav_movie_info):
         return UserMovie(
@@ -77,9 +118,40 @@ class UsersMovies:
         :param fav_movie_info: dict
         :return:
             True for success add (bool) |
+            False for a movie already favourited by the user (bool) |
             None
         """
-        return self._data_manager.add_item(self.__instantiate_user_movie(fav_movie_info))
+        added = self._data_manager.add_item(self.__instantiate_user_movie(fav_movie_info))
+        if added and self._profiles is not None:
+            self._profiles.update_users([fav_movie_info['user_id']])
+        if added and self._cache is not None:
+            self._cache.invalidate('users', fav_movie_info['user_id'])
+        if added and self._recommendations is not None:
+            self._recommendations.update_movie(fav_movie_info['movie_id'])
+        return added
+
+    def add_user_movies(self, user_id: int, movie_ids: list) -> list[bool | None]:
+        """
+        Add many movies to a user in one transaction
+        :param user_id: int
+        :param movie_ids: list
+        :return:
+            per movie result (list):
+                True for added |
+                False for a movie already favourited by the user |
+                None for other errors
+        """
+        results = self._data_manager.add_items(
+            [self.__instantiate_user_movie({'user_id': user_id, 'movie_id': movie_id})
+             for movie_id in movie_ids])
+        added = [movie_id for movie_id, result in zip(movie_ids, results) if result]
+        if added and self._profiles is not None:
+            self._profiles.update_users([user_id])
+        if added and self._cache is not None:
+            self._cache.invalidate('users', user_id)
+        if added and self._recommendations is not None:
+            self._recommendations.update_movies(added)
+        return results
 
     def delete_user_movie(self, user_movie_id: int) -> bool | None:
         """
@@ -89,4 +161,46 @@ class UsersMovies:
             True for success delete movie (bool) |
             None
         """
-        return self._data_manager.delete_item(user_movie_id)
+        if self._cache is None and self._recommendations is None and self._profiles is None:
+            return self._data_manager.delete_item(user_movie_id)
+
+        user_movie = self._data_manager.get_item_by_id(user_movie_id)
+        if user_movie is None:
+            return None
+        user_id, movie_id = user_movie.user_id, user_movie.movie_id
+
+        deleted = self._data_manager.delete_item(user_movie_id)
+        if deleted and self._profiles is not None:
+            self._profiles.update_users([user_id])
+        if deleted and self._cache is not None:
+            self._cache.invalidate('users', user_id)
+        if deleted and self._recommendations is not None:
+            self._recommendations.update_movie(movie_id)
+        return deleted
+
+    def delete_user_movies(self, user_id: int, movie_ids: list) -> list[bool | None] | None:
+        """
+        Delete many of a user's fav movies in one transaction
+        :param user_id: int
+        :param movie_ids: list
+        :return:
+            per movie result (list):
+                True for deleted |
+                None for not a favourite or other errors |
+            None
+        """
+        favourite_ids = self.get_favourite_ids(user_id, movie_ids)
+        if favourite_ids is None:
+            return None
+
+        favourites = [movie_id for movie_id in movie_ids if movie_id in favourite_ids]
+        deleted = dict(zip(favourites, self._data_manager.delete_items(
+            [favourite_ids[movie_id] for movie_id in favourites])))
+        deleted_movies = [movie_id for movie_id, result in deleted.items() if result]
+        if deleted_movies and self._profiles is not None:
+            self._profiles.update_users([user_id])
+        if deleted_movies and self._cache is not None:
+            self._cache.invalidate('users', user_id)
+        if deleted_movies and self._recommendations is not None:
+            self._recommendations.update_movies(deleted_movies)
+        return [deleted.get(movie_id) for movie_id in movie_ids]
@@ -0,0 +1,248 @@
+"""
+EnrichmentQueue class
+Asynchronous OMDb enrichment of added movies:
+the movie row is inserted right away with empty details,
+a job in the enrichment_jobs table is processed by
+a pool of background threads filling in
+director, year, rating, poster and website,
+retried with exponential backoff on OMDb errors
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable
+
+import requests
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_manager.data_models import EnrichmentJob
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class EnrichmentQueue:
+    """
+    A class queuing and running
+    movie enrichment jobs
+    """
+
+    def __init__(self, app, db, movies_data_manager,
+                 fetch_movie_info: Callable[[str], dict],
+                 workers: int = 2,
+                 max_attempts: int = 5,
+                 base_delay: float = 2.0,
+                 max_delay: float = 300.0,
+                 poll_interval: float = 1.0,
+                 lease: float = 60.0):
+        self._app = app
+        self._db = db
+        self._movies_data_manager = movies_data_manager
+        self._fetch_movie_info = fetch_movie_info
+        self._workers = workers
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._poll_interval = poll_interval
+        self._lease = lease
+        self._wake_up = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    @staticmethod
+    def job_to_dict(job) -> dict:
+        """
+        Convert job from db object to dict format
+        """
+        return {"id": job.id,
+                "movie_id": job.movie_id,
+                "movie_name": job.movie_name,
+                "status": job.status,
+                "attempts": job.attempts,
+                "next_attempt_at": job.next_attempt_at,
+                "last_error": job.last_error}
+
+    def enqueue(self, movie_id: int, movie_name: str) -> dict | None:
+        """
+        Queue the enrichment of a movie
+        and start the workers if needed
+        :param movie_id: int
+        :param movie_name: str
+        :return:
+            Job (dict) |
+            None
+        """
+        now = time.time()
+        job = EnrichmentJob(movie_id=movie_id, movie_name=movie_name,
+                            status=PENDING, attempts=0,
+                            next_attempt_at=now, updated_at=now)
+        try:
+            self._db.session.add(job)
+            self._db.session.commit()
+        except SQLAlchemyError:
+            self._db.session.rollback()
+            return None
+
+        self.start()
+        self._wake_up.set()
+        return self.job_to_dict(job)
+
+    def get_job(self, job_id: int) -> dict | None:
+        """
+        Return a job given job_id
+        :param job_id: int
+        :return:
+            Job (dict) |
+            None
+        """
+        job = self._db.session.get(EnrichmentJob, job_id)
+        if job is None:
+            return None
+        return self.job_to_dict(job)
+
+    def start(self) -> None:
+        """
+        Start the worker threads once per process,
+        requeueing the jobs left running
+        by a stopped process.
+        A forked worker process starts its own threads.
+        """
+        with self._start_lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._threads = []
+            self._pid = os.getpid()
+            with self._app.app_context():
+                self._db.session.execute(
+                    update(EnrichmentJob)
+                    .where(EnrichmentJob.status == RUNNING,
+                           EnrichmentJob.updated_at < time.time() - self._lease)
+                    .values(status=PENDING))
+                self._db.session.commit()
+
+            for number in range(self._workers):
+                thread = threading.Thread(target=self._work,
+                                          name=f'enrichment-worker-{number}',
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stop the worker threads
+        """
+        self._stopped.set()
+        self._wake_up.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._stopped.clear()
+
+    def _claim_next_job(self):
+        """
+        Mark the next due job as running,
+        the conditional update makes sure
+        only one worker gets it
+        :return:
+            EnrichmentJob |
+            None
+        """
+        now = time.time()
+        job = EnrichmentJob.query \
+            .filter(EnrichmentJob.status == PENDING,
+                    EnrichmentJob.next_attempt_at <= now) \
+            .order_by(EnrichmentJob.next_attempt_at) \
+            .first()
+        if job is None:
+            return None
+
+        claimed = self._db.session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.id == job.id, EnrichmentJob.status == PENDING)
+            .values(status=RUNNING, attempts=EnrichmentJob.attempts + 1, updated_at=now))
+        self._db.session.commit()
+        if claimed.rowcount != 1:
+            return None
+        self._db.session.refresh(job)
+        return job
+
+    def _retry_delay(self, attempts: int) -> float:
+        """
+        Exponential backoff with jitter
+        :param attempts: int
+        :return:
+            seconds (float)
+        """
+        delay = min(self._max_delay, self._base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _finish_job(self, job, status: str, error: str | None = None) -> None:
+        """
+        Record the outcome of a job attempt
+        """
+        now = time.time()
+        if status == PENDING:
+            job.next_attempt_at = now + self._retry_delay(job.attempts)
+        job.status = status
+        job.last_error = error
+        job.updated_at = now
+        self._db.session.commit()
+
+    def _run_job(self, job) -> None:
+        """
+        Fetch the movie details and update the movie.
+        Request errors are retried, an invalid movie name
+        or OMDb response (e.g. "N/A" year) fails the job
+        """
+        try:
+            movie_info = self._fetch_movie_info(job.movie_name)
+        except requests.exceptions.RequestException as err:
+            error = str(err) or type(err).__name__
+            if job.attempts >= self._max_attempts:
+                self._finish_job(job, FAILED, error)
+            else:
+                self._finish_job(job, PENDING, error)
+            return
+        except (ValueError, KeyError) as err:
+            self._finish_job(job, FAILED, str(err) or type(err).__name__)
+            return
+
+        updated = self._movies_data_manager.update_movie({
+            'id': job.movie_id,
+            'director': movie_info['director'],
+            'year': movie_info['year'],
+            'rating': movie_info['rating'],
+            'poster': movie_info['poster'],
+            'website': movie_info['website']
+        })
+        if updated is None:
+            self._finish_job(job, FAILED, 'Cannot update movie.')
+        else:
+            self._finish_job(job, DONE)
+
+    def _work(self) -> None:
+        """
+        Worker thread loop
+        """
+        with self._app.app_context():
+            while not self._stopped.is_set():
+                try:
+                    job = self._claim_next_job()
+                    if job is not None:
+                        self._run_job(job)
+                except SQLAlchemyError as err:
+                    print(err)
+                    self._db.session.rollback()
+                    job = None
+                finally:
+                    self._db.session.remove()
+
+                if job is None:
+                    self._wake_up.wait(self._poll_interval)
+                    self._wake_up.clear()
@@ -0,0 +1,28 @@
+"""
+gunicorn settings of wsgi.py, overridden by the command line
+or GUNICORN_CMD_ARGS, e.g. GUNICORN_CMD_ARGS="--workers 4"
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+# one worker per core, the requests are short and mostly CPU bound
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# a few threads per worker overlap the database and OMDb waits
+threads = int(os.environ.get('WEB_THREADS', 4))
+# the app is created once, schema upgrade and profile builds included,
+# then the workers are forked and open their own database connections
+preload_app = True
+# recycle the workers now and then, bounding memory growth
+max_requests = int(os.environ.get('MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    """
+    Start the enrichment workers of a worker process:
+    threads started before the fork would not survive it
+    """
+    worker.wsgi.extensions['movieflix']['enrichment_queue'].start()
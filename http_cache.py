@@ -0,0 +1,103 @@
+"""
+Conditional GET for the read endpoints:
+responses carry a strong ETag and Last-Modified built from
+the version counters of the tables they are read from,
+and a matching If-None-Match / If-Modified-Since
+is answered with 304 before any query runs.
+Rendered HTML pages can also be kept in a page cache
+keyed by URL and ETag.
+A URL is served as JSON or NDJSON depending on Accept,
+so the ETag names the representation and responses vary on Accept.
+"""
+from functools import wraps
+
+from flask import g, request, make_response
+
+from json_stream import wants_ndjson
+
+# tables each resource is built from,
+# e.g. user dicts embed their favourite movies
+RESOURCE_TABLES = {
+    # user dicts are read from user_profiles, rebuilt after the writes
+    'users': ('users', 'users_movies', 'movies', 'user_profiles'),
+    'movies': ('movies', 'movies_reviews', 'users'),
+    'user_movies': ('users', 'users_movies', 'movies', 'user_profiles'),
+    'movie_reviews': ('movies_reviews', 'movies', 'users'),
+    # movie_neighbours is updated after the users_movies and movies_reviews writes
+    'recommendations': ('users', 'users_movies', 'movies_reviews', 'movies',
+                        'movie_neighbours'),
+}
+
+
+def is_not_modified(etag: str, last_modified: float) -> bool:
+    """
+    Check the request conditional headers
+    against the current validators
+    :param etag: str
+    :param last_modified: unix time (float)
+    :return:
+        True when the client copy is current (bool)
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if request.if_modified_since is not None:
+        # Last-Modified is in whole seconds, a write later
+        # in the same second is still newer than the client copy
+        return last_modified <= request.if_modified_since.timestamp()
+
+    return False
+
+
+def set_validators(response, etag: str, last_modified: float):
+    """
+    Set the ETag, Last-Modified, Cache-Control and Vary headers
+    :return:
+        response
+    """
+    response.set_etag(etag)
+    response.last_modified = int(last_modified)
+    response.cache_control.no_cache = True  # clients revalidate on every use
+    response.vary.add('Accept')
+    return response
+
+
+def conditional_get(resource: str, cache_page: bool = False):
+    """
+    Decorate a GET view with conditional GET handling.
+    The validators are read before the view runs, so a write
+    during the view gives an older ETag and only costs a 200 later.
+    :param resource: key of RESOURCE_TABLES
+    :param cache_page: keep the rendered page in g.page_cache
+    :return:
+        decorator
+    """
+    tables = RESOURCE_TABLES[resource]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = g.resource_versions.validators(tables)
+            if wants_ndjson():
+                etag += '-ndjson'
+            if is_not_modified(etag, last_modified):
+                return set_validators(make_response('', 304), etag, last_modified)
+
+            page_cache = g.page_cache if cache_page else None
+            page_key = (request.full_path, etag)
+            if page_cache is not None:
+                page = page_cache.get('pages', page_key)
+                if page is not None:
+                    return set_validators(make_response(page), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if page_cache is not None:
+                page_cache.set('pages', page_key, response.get_data(as_text=True))
+            return set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,89 @@
+"""
+Streaming JSON responses for the list endpoints:
+items are encoded one at a time while they are read
+from the database, as NDJSON when the client accepts
+application/x-ndjson, else as the usual JSON object
+{"<key>": [...], "next_cursor": null}
+"""
+from typing import Iterable, Iterator
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CHUNK_SIZE = 64 * 1024
+
+
+def wants_ndjson() -> bool:
+    """
+    Check if the client prefers NDJSON over JSON
+    :return:
+        True or False (bool)
+    """
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) \
+        == NDJSON_MIMETYPE
+
+
+def wants_stream() -> bool:
+    """
+    Check if a list request asks for a streamed response:
+    ?stream=1 or an Accept header preferring NDJSON
+    :return:
+        True or False (bool)
+    """
+    return request.args.get('stream') == '1' or wants_ndjson()
+
+
+def encode_chunks(parts: Iterable[str]) -> Iterator[bytes]:
+    """
+    Join small encoded parts into chunks of about CHUNK_SIZE bytes
+    :param parts: iterable of str
+    :return:
+        chunks (Iterator[bytes])
+    """
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def ndjson_parts(items: Iterable[dict]) -> Iterator[str]:
+    """
+    Encode items as one JSON document per line
+    """
+    for item in items:
+        yield current_app.json.dumps(item) + '\n'
+
+
+def json_list_parts(items: Iterable[dict], key: str) -> Iterator[str]:
+    """
+    Encode items as {"<key>": [item, ...], "next_cursor": null}
+    """
+    yield f'{{"{key}": ['
+    separator = ''
+    for item in items:
+        yield separator + current_app.json.dumps(item)
+        separator = ', '
+    yield '], "next_cursor": null}\n'
+
+
+def stream_items(items: Iterable[dict], key: str) -> Response:
+    """
+    Return a streamed response of items,
+    NDJSON or JSON as negotiated with the client.
+    A database error during the stream truncates the body.
+    :param items: iterable of dict
+    :param key: key of the items list in the JSON object
+    :return:
+        Response
+    """
+    if wants_ndjson():
+        parts, mimetype = ndjson_parts(items), NDJSON_MIMETYPE
+    else:
+        parts, mimetype = json_list_parts(items, key), 'application/json'
+
+    return Response(stream_with_context(encode_chunks(parts)), mimetype=mimetype)
@@ -0,0 +1,187 @@
+"""
+Bulk movies import:
+stream movie names from a CSV or JSONL file,
+enrich them from OMDb with a bounded pool of workers
+and insert them in batched transactions,
+reporting the rows that failed without aborting the import
+"""
+import csv
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TextIO
+
+import requests
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 8
+NAME_COLUMNS = ('movie_name', 'title', 'Title')
+
+
+def read_jsonl_titles(file: TextIO) -> Iterator[tuple]:
+    """
+    Read movie names from JSONL lines,
+    either {"movie_name": ...} / {"title": ...} objects or strings
+    :param file: TextIO
+    :return:
+        (row number, movie name | None for an invalid row) (Iterator)
+    """
+    for row_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, None
+            continue
+
+        if isinstance(row, str):
+            yield row_number, row.strip()
+        elif isinstance(row, dict):
+            names = [row[column] for column in NAME_COLUMNS if isinstance(row.get(column), str)]
+            yield row_number, names[0].strip() if names else None
+        else:
+            yield row_number, None
+
+
+def read_csv_titles(file: TextIO) -> Iterator[tuple]:
+    """
+    Read movie names from a CSV file,
+    the movie_name or title column when there is a header,
+    otherwise the first column
+    :param file: TextIO
+    :return:
+        (row number, movie name | None for an invalid row) (Iterator)
+    """
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    name_columns = [header.index(column) for column in NAME_COLUMNS if column in header]
+    if name_columns:
+        column, first_row_number = name_columns[0], 2
+    else:
+        column, first_row_number = 0, 1
+        reader = _chain_row(header, reader)
+
+    for row_number, row in enumerate(reader, start=first_row_number):
+        if not row:
+            continue
+        yield row_number, row[column].strip() if len(row) > column else None
+
+
+def _chain_row(first_row: list, reader) -> Iterator[list]:
+    """
+    Yield first_row then the rows of reader
+    """
+    yield first_row
+    yield from reader
+
+
+def read_titles(file: TextIO, file_name: str) -> Iterator[tuple]:
+    """
+    Read movie names from a .jsonl / .ndjson or .csv file
+    :param file: TextIO
+    :param file_name: str
+    :return:
+        (row number, movie name | None) (Iterator)
+    """
+    if file_name.lower().endswith(('.jsonl', '.ndjson')):
+        return read_jsonl_titles(file)
+    return read_csv_titles(file)
+
+
+def _lookup_result(row_number: int, movie_name: str | None, future) -> tuple:
+    """
+    Return the result of a movie info lookup
+    :return:
+        (row number, movie name, movie info | None, error message | None) (tuple)
+    """
+    if future is None:
+        return row_number, movie_name, None, 'Invalid row'
+    try:
+        return row_number, movie_name, future.result(), None
+    except (requests.exceptions.RequestException, ValueError, KeyError) as err:
+        return row_number, movie_name, None, str(err) or type(err).__name__
+
+
+def enrich_titles(rows: Iterable[tuple], fetch_movie_info: Callable[[str], dict],
+                  workers: int = DEFAULT_WORKERS) -> Iterator[tuple]:
+    """
+    Look up movie infos concurrently, in input order,
+    with at most workers * 2 lookups queued at a time
+    so the input is streamed rather than loaded
+    :param rows: (row number, movie name) (Iterable)
+    :param fetch_movie_info: movie name -> movie info, raising on errors
+    :param workers: int
+    :return:
+        (row number, movie name, movie info | None, error message | None) (Iterator)
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for row_number, movie_name in rows:
+            future = None
+            if movie_name is not None:
+                future = executor.submit(fetch_movie_info, movie_name)
+            pending.append((row_number, movie_name, future))
+
+            if len(pending) >= workers * 2:
+                yield _lookup_result(*pending.popleft())
+
+        while pending:
+            yield _lookup_result(*pending.popleft())
+
+
+def write_batch(batch: list, movies_data_manager, report: dict) -> None:
+    """
+    Insert a batch of movie infos in one transaction
+    and record the results in report
+    :param batch: list of (row number, movie name, movie info)
+    :param movies_data_manager: Movies
+    :param report: dict
+    """
+    results = movies_data_manager.add_new_movies([movie_info for _, _, movie_info in batch])
+    for (row_number, movie_name, _), result in zip(batch, results):
+        if result:
+            report['imported'] += 1
+        else:
+            report['failed'].append({'row': row_number,
+                                     'movie_name': movie_name,
+                                     'error': 'Movie already exist in the database.'
+                                     if result is False else 'Cannot add movie.'})
+
+
+def import_movies(rows: Iterable[tuple], movies_data_manager,
+                  fetch_movie_info: Callable[[str], dict],
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  workers: int = DEFAULT_WORKERS) -> dict:
+    """
+    Import movies given their names
+    :param rows: (row number, movie name) (Iterable)
+    :param movies_data_manager: Movies
+    :param fetch_movie_info: movie name -> movie info, raising on errors
+    :param batch_size: rows per transaction (int)
+    :param workers: concurrent OMDb lookups (int)
+    :return:
+        import report {"imported": int,
+                       "failed": [{"row", "movie_name", "error"}]} (dict)
+    """
+    report = {'imported': 0, 'failed': []}
+    batch = []
+    for row_number, movie_name, movie_info, error in enrich_titles(rows, fetch_movie_info,
+                                                                    workers):
+        if error:
+            report['failed'].append({'row': row_number,
+                                     'movie_name': movie_name,
+                                     'error': error})
+            continue
+
+        batch.append((row_number, movie_name, movie_info))
+        if len(batch) >= batch_size:
+            write_batch(batch, movies_data_manager, report)
+            batch = []
+
+    if batch:
+        write_batch(batch, movies_data_manager, report)
+    return report
@@ -8,35 +8,75 @@ delete movie
 routes
 """
 import requests
-from flask import Blueprint, render_template, request, redirect, url_for, abort, g
+from flask import Blueprint, render_template, request, redirect, url_for, abort, g, current_app
+
+from http_cache import conditional_get
+from omdb_client import fetch_movie_api_response, format_movie_info, get_empty_info
+from request_args import get_movies_page_args, get_page_args, get_search_args, isnumber, \
+    REVIEWS_SORT_FIELDS
 
 movies_bp = Blueprint('movies', __name__)
 
-API_KEY = 'YourApiKey'
-BASE_URL_KEY = f'http://www.omdbapi.com/?apikey={API_KEY}'
-IMDB_BASE_URL = 'https://www.imdb.com/title/'
 
+def render_movies_page(error_message: str | None = None):
+    """
+    Render movies.html with the page of movies
+    selected by the request query string,
+    or with the search results when it has q
+    :param error_message: str | None
+    :return:
+        rendered movies.html page
+    """
+    if request.args.get('q'):
+        return render_search_results(error_message)
 
-@movies_bp.route('/movies', methods=['GET'])
-def get_movies():
+    page_args = get_movies_page_args(request.args)
+    if isinstance(page_args, list):
+        return render_template('movies.html',
+                               movies=[],
+                               filters=request.args,
+                               error_message=', '.join(page_args))
+
+    movies, next_cursor = g.movies_data_manager.get_movies_page(**page_args) or ([], None)
+    next_page_url = None
+    if next_cursor:
+        next_page_url = url_for('movies.get_movies',
+                                **{**request.args.to_dict(), 'cursor': next_cursor})
+    return render_template('movies.html',
+                           movies=movies,
+                           next_page_url=next_page_url,
+                           filters=request.args,
+                           error_message=error_message)
+
+
+def render_search_results(error_message: str | None = None):
     """
-    Get all the movies from the movies table
+    Render movies.html with the movies
+    matching the search text q, best match first
+    :param error_message: str | None
+    :return:
+        rendered movies.html page
     """
-    movies = g.movies_data_manager.get_movies()
-    return render_template('movies.html', movies=movies)
+    search_args = get_search_args(request.args)
+    if isinstance(search_args, list):
+        return render_template('movies.html',
+                               movies=[],
+                               filters=request.args,
+                               error_message=', '.join(search_args))
 
+    return render_template('movies.html',
+                           movies=g.movies_data_manager.search_movies(**search_args) or [],
+                           filters=request.args,
+                           error_message=error_message)
 
-def fetch_movie_api_response(title: str) -> dict:
+
+@movies_bp.route('/movies', methods=['GET'])
+@conditional_get('movies', cache_page=True)
+def get_movies():
     """
-    Fetch api response movie info
-    given movie title
-    :param title: str
-    :return: movie info (dict)
+    Get a page of movies from the movies table
     """
-    response = requests.get(f'{BASE_URL_KEY}&t={title}', timeout=5)
-    response.raise_for_status()  # check if there was an error with the request
-
-    return response.json()
+    return render_movies_page()
 
 
 def get_error_messages(movie_info: dict) -> list:
@@ -64,10 +104,10 @@ def get_error_messages(movie_info: dict) -> list:
         error_messages.append('Director name must start with letter')
 
     if len(year) != 0:
-        if not year.isdigit():
+        if not isnumber(year):
             error_messages.append('Year must be number')
 
-        if year.isdigit() and len(year) != 4:
+        if isnumber(year) and len(year) != 4:
             error_messages.append('Year must be 4 digits')
 
     if len(rating) != 0:
@@ -79,39 +119,6 @@ def get_error_messages(movie_info: dict) -> list:
     return error_messages
 
 
-def format_movie_info(response: dict, movie_name: str) -> dict:
-    """
-    Format movie info
-    :param response: dict
-    :param movie_name: str
-    :return:
-        movie info (dict)
-    """
-    return {'movie_name': response.get('Title', movie_name),
-            'director': response.get('Director', ''),
-            'year': int(response.get('Year', '0000')[:4]),
-            'rating': float(response.get('imdbRating', 0.0)),
-            'poster': response.get('Poster', ''),
-            'website': IMDB_BASE_URL + response.get('imdbID', '')
-            }
-
-
-def get_empty_info(movie_name: str) -> dict:
-    """
-    Return empty movie info
-    :param movie_name: str
-    :return:
-        empty movie info (dict)
-    """
-    return {'movie_name': movie_name,
-            'director': '',
-            'year': 0,
-            'rating': 0.0,
-            'poster': '',
-            'website': ''
-            }
-
-
 def get_new_movie_info() -> dict | list:
     """
     Get new movie info:
@@ -153,13 +160,16 @@ def add_new_movie():
             redirect to user_movies page |
             user not found error message
     """
+    if request.method == 'POST' and current_app.config['OMDB_ENRICHMENT_MODE'] == 'async':
+        return add_new_movie_async()
+
     if request.method == 'POST':
         new_movie_info = get_new_movie_info()
         if isinstance(new_movie_info, list):
             return render_template('add_new_movie.html',
                                    error_messages=new_movie_info)
 
-        if g.movies_data_manager.add_new_movie(new_movie_info) is None:
+        if not g.movies_data_manager.add_new_movie(new_movie_info):
             return render_template('add_new_movie.html',
                                    error_messages=['Cannot add movie. '
                                                    'Movie already exist in the database.'])
@@ -169,6 +179,30 @@ def add_new_movie():
     return render_template('add_new_movie.html')
 
 
+def add_new_movie_async():
+    """
+    Add a new movie with empty details right away
+    and queue the OMDb API lookup
+    :return:
+        redirect to movies page |
+        render add_new_movie page with error messages
+    """
+    movie_name = request.form.get('movie_name', '')
+
+    error_messages = get_error_messages({'movie_name': movie_name})
+    if error_messages:
+        return render_template('add_new_movie.html', error_messages=error_messages)
+
+    movie_id = g.movies_data_manager.add_pending_movie(get_empty_info(movie_name))
+    if not movie_id:
+        return render_template('add_new_movie.html',
+                               error_messages=['Cannot add movie. '
+                                               'Movie already exist in the database.'])
+
+    g.enrichment_queue.enqueue(movie_id, movie_name)
+    return redirect(url_for('movies.get_movies'))
+
+
 def isfloat(number: str) -> bool:
     """
     Check if the given number is float type
@@ -268,10 +302,7 @@ def delete_movie(movie_id: int):
         movie not found error message
     """
     if g.movies_data_manager.delete_movie(movie_id) is None:
-        movies = g.movies_data_manager.get_movies()
-        return render_template('movies.html',
-                               movies=movies,
-                               error_message='Unable to delete this movie as it was favourited.')
+        return render_movies_page('Unable to delete this movie as it was favourited.')
 
     return redirect(url_for('movies.get_movies'))
 
@@ -279,7 +310,7 @@ def delete_movie(movie_id: int):
 @movies_bp.route('/users/<int:user_id>/movie_reviews/<int:movie_id>', methods=['GET'])
 def get_movie_reviews(user_id: int, movie_id: int):
     """
-    Get all the movie's reviews from movie_reviews table
+    Get a page of the movie's reviews from movie_reviews table
     :param user_id: int
     :param movie_id: int
     """
@@ -287,11 +318,27 @@ def get_movie_reviews(user_id: int, movie_id: int):
     if user is None:
         abort(404)
 
-    movie = g.movies_data_manager.get_movie(movie_id)
-    movie_reviews = g.movies_reviews_data_manager.get_movie_reviews()
+    movie = g.movies_data_manager.get_movie_summary(movie_id)
+    if movie is None:
+        abort(404)
+
+    page_args = get_page_args(request.args, REVIEWS_SORT_FIELDS)
+    if isinstance(page_args, list):
+        abort(400, page_args)
+
+    movie_reviews, next_cursor = g.movies_reviews_data_manager. \
+        get_movie_reviews_page(movie_id, **page_args) or ([], None)
+    next_page_url = None
+    if next_cursor:
+        next_page_url = url_for('movies.get_movie_reviews', user_id=user_id, movie_id=movie_id,
+                                **{**request.args.to_dict(), 'cursor': next_cursor})
+
     return render_template('movie_reviews.html',
                            user=user,
                            movie_reviews=movie_reviews,
+                           next_page_url=next_page_url,
+                           user_reviewed=g.movies_reviews_data_manager.
+                           has_user_reviewed(user_id, movie_id),
                            movie=movie)
 
 
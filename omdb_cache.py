@@ -0,0 +1,179 @@
+"""
+OMDbCache class
+Persistent cache of OMDb API responses
+keyed by normalized movie title, in a local sqlite file:
+- found movies are kept for ttl seconds
+- "Movie not found!" responses are kept for negative_ttl seconds
+- in cache only mode (offline) OMDb is never called
+create_app builds it from the OMDB_CACHE_* settings of config.Config.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+import requests
+
+BASEDIR = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASEDIR, 'data/omdb_cache.sqlite')
+DEFAULT_TTL = 30 * 24 * 3600.0
+DEFAULT_NEGATIVE_TTL = 24 * 3600.0
+NOT_FOUND_ERRORS = ('Movie not found!',)
+
+
+class OMDbCacheMiss(requests.exceptions.RequestException):
+    """
+    Raised in cache only mode
+    for a title that is not in the cache
+    """
+
+
+class OMDbCache:
+    """
+    A class caching OMDb responses
+    in a sqlite table
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 cache_only: bool = False):
+        self._path = path
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self.cache_only = cache_only
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'negative_hits': 0, 'misses': 0,
+                          'stale_served': 0, 'offline_misses': 0}
+
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        """
+        Cache key of a title: case folded,
+        whitespace collapsed
+        :param title: str
+        :return:
+            normalized title (str)
+        """
+        return ' '.join(title.casefold().split())
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return this thread's connection,
+        creating the cache table on first use
+        :return:
+            Connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS omdb_cache ('
+                               'title_key TEXT PRIMARY KEY, '
+                               'response TEXT NOT NULL, '
+                               'found INTEGER NOT NULL, '
+                               'fetched_at REAL NOT NULL)')
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get(self, title: str) -> tuple[dict, bool] | None:
+        """
+        Return the cached response of a title
+        :param title: str
+        :return:
+            (response (dict), fresh (bool)) (tuple) |
+            None
+        """
+        row = self._connection().execute(
+            'SELECT response, found, fetched_at FROM omdb_cache WHERE title_key = ?',
+            (self.normalize_title(title),)).fetchone()
+        if row is None:
+            return None
+
+        response, found, fetched_at = row
+        ttl = self._ttl if found else self._negative_ttl
+        return json.loads(response), fetched_at + ttl >= time.time()
+
+    def set(self, title: str, response: dict) -> bool:
+        """
+        Cache a response, unless it is an error
+        other than "Movie not found!" (e.g. request limit reached)
+        :param title: str
+        :param response: dict
+        :return:
+            True if cached (bool)
+        """
+        found = response.get('Response') != 'False'
+        if not found and response.get('Error') not in NOT_FOUND_ERRORS:
+            return False
+
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO omdb_cache '
+                               '(title_key, response, found, fetched_at) VALUES (?, ?, ?, ?)',
+                               (self.normalize_title(title), json.dumps(response),
+                                int(found), time.time()))
+        return True
+
+    def fetch(self, title: str, fetch_response: Callable[[str], dict]) -> dict:
+        """
+        Return the OMDb response of a title
+        from the cache, or from fetch_response when
+        missing or expired. An expired response is served
+        when OMDb cannot be reached.
+        :param title: str
+        :param fetch_response: title -> OMDb response (dict)
+        :return:
+            OMDb response (dict)
+        :raises:
+            OMDbCacheMiss in cache only mode,
+            requests.exceptions.RequestException from fetch_response
+        """
+        cached = self.get(title)
+        if cached is not None and cached[1]:
+            self._count('hits' if cached[0].get('Response') != 'False' else 'negative_hits')
+            return cached[0]
+
+        if self.cache_only:
+            if cached is not None:
+                self._count('stale_served')
+                return cached[0]
+            self._count('offline_misses')
+            raise OMDbCacheMiss(f'{title} is not in the OMDb cache')
+
+        self._count('misses')
+        try:
+            response = fetch_response(title)
+        except requests.exceptions.RequestException:
+            if cached is None:
+                raise
+            self._count('stale_served')
+            return cached[0]
+
+        self.set(title, response)
+        return response
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters and size
+        :return:
+            stats (dict)
+        """
+        entries, negative_entries = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(found = 0), 0) FROM omdb_cache').fetchone()
+        with self._lock:
+            counters = dict(self._counters)
+        return {**counters,
+                'entries': entries,
+                'negative_entries': negative_entries,
+                'ttl': self._ttl,
+                'negative_ttl': self._negative_ttl,
+                'cache_only': self.cache_only}
+
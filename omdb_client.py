@@ -0,0 +1,236 @@
+"""
+OMDb API client shared by the API and HTML routes,
+the bulk import and the enrichment queue:
+- one pooled requests.Session with keep-alive connections
+- bounded retries with jittered exponential backoff
+- a concurrency limit and an optional requests/second limit
+  to stay under the OMDb quota during imports
+- latency and error metrics
+Responses go through the persistent OMDb cache given to use_cache.
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from omdb_cache import OMDbCache
+
+API_KEY = os.environ.get('OMDB_API_KEY', 'd5a88f10')
+OMDB_BASE_URL = os.environ.get('OMDB_BASE_URL', 'http://www.omdbapi.com/')
+IMDB_BASE_URL = 'https://www.imdb.com/title/'
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RateLimiter:
+    """
+    Token bucket allowing rate requests per second
+    with bursts of up to burst requests
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self._rate = rate
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Wait until a request is allowed
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity,
+                                   self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+class OMDbClient:
+    """
+    A class requesting movie info from OMDb API
+    """
+
+    def __init__(self, base_url: str = OMDB_BASE_URL, api_key: str = API_KEY,
+                 timeout: float = 5.0,
+                 max_retries: int = 2,
+                 backoff: float = 0.5,
+                 max_concurrency: int = 8,
+                 rate_limit: float = 0.0,
+                 cache: OMDbCache | None = None):
+        self._base_url = base_url
+        self._api_key = api_key
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rate_limit, max_concurrency) if rate_limit > 0 else None
+        self._cache = cache
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._metrics = {'requests': 0, 'errors': 0, 'retries': 0,
+                         'latency_seconds_total': 0.0, 'latency_seconds_max': 0.0}
+        self._latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def _record(self, latency: float, error: bool) -> None:
+        """
+        Record the latency and outcome of one HTTP request
+        """
+        with self._lock:
+            self._metrics['requests'] += 1
+            self._metrics['errors'] += int(error)
+            self._metrics['latency_seconds_total'] += latency
+            self._metrics['latency_seconds_max'] = max(self._metrics['latency_seconds_max'],
+                                                       latency)
+            bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS)
+                           if latency <= bound), len(LATENCY_BUCKETS))
+            self._latency_buckets[bucket] += 1
+
+    def _get(self, title: str) -> requests.Response:
+        """
+        One HTTP request, within the concurrency and rate limits
+        """
+        with self._semaphore:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+
+            started_at = time.perf_counter()
+            try:
+                response = self._session.get(self._base_url,
+                                             params={'apikey': self._api_key, 't': title},
+                                             timeout=self._timeout)
+            except requests.exceptions.RequestException:
+                self._record(time.perf_counter() - started_at, True)
+                raise
+
+            self._record(time.perf_counter() - started_at, not response.ok)
+            return response
+
+    def request_movie(self, title: str) -> dict:
+        """
+        Request movie info from OMDb API given movie title,
+        retrying connection errors, timeouts and 429 / 5xx responses
+        :param title: str
+        :return:
+            OMDb response (dict)
+        :raises:
+            requests.exceptions.RequestException
+        """
+        for attempt in range(self._max_retries + 1):
+            last_attempt = attempt == self._max_retries
+            try:
+                response = self._get(title)
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    raise
+
+            with self._lock:
+                self._metrics['retries'] += 1
+            time.sleep(self._backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        raise requests.exceptions.RetryError(f'OMDb request failed: {title}')
+
+    def fetch_movie(self, title: str) -> dict:
+        """
+        Return OMDb movie info given movie title,
+        from the OMDb cache when known
+        :param title: str
+        :return:
+            OMDb response (dict)
+        :raises:
+            requests.exceptions.RequestException
+        """
+        if self._cache is None:
+            return self.request_movie(title)
+        return self._cache.fetch(title, self.request_movie)
+
+    def use_cache(self, cache: OMDbCache | None) -> None:
+        """
+        Serve fetch_movie through a persistent OMDb cache
+        :param cache: OMDbCache | None
+        """
+        self._cache = cache
+
+    def stats(self) -> dict:
+        """
+        Return the client metrics
+        :return:
+            requests, errors, retries, latency totals
+            and cumulative latency buckets (dict)
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            buckets = list(self._latency_buckets)
+
+        cumulative, count = {}, 0
+        for bound, bucket_count in zip([*map(str, LATENCY_BUCKETS), '+Inf'], buckets):
+            count += bucket_count
+            cumulative[bound] = count
+        return {**metrics, 'latency_seconds_buckets': cumulative}
+
+
+omdb_client = OMDbClient(timeout=float(os.environ.get('OMDB_TIMEOUT', 5.0)),
+                         max_retries=int(os.environ.get('OMDB_MAX_RETRIES', 2)),
+                         max_concurrency=int(os.environ.get('OMDB_MAX_CONCURRENCY', 8)),
+                         rate_limit=float(os.environ.get('OMDB_RATE_LIMIT', 0.0)))
+
+
+def fetch_movie_api_response(title: str) -> dict:
+    """
+    Fetch api response movie info
+    given movie title
+    :param title: str
+    :return: movie info (dict)
+    """
+    return omdb_client.fetch_movie(title)
+
+
+def format_movie_info(response: dict, movie_name: str) -> dict:
+    """
+    Format movie info
+    :param response: dict
+    :param movie_name: str
+    :return:
+        movie info (dict)
+    """
+    return {'movie_name': response.get('Title', movie_name),
+            'director': response.get('Director', ''),
+            'year': int(response.get('Year', '0000')[:4]),
+            'rating': float(response.get('imdbRating', 0.0)),
+            'poster': response.get('Poster', ''),
+            'website': IMDB_BASE_URL + response.get('imdbID', '')
+            }
+
+
+def get_empty_info(movie_name: str) -> dict:
+    """
+    Return empty movie info
+    :param movie_name: str
+    :return:
+        empty movie info (dict)
+    """
+    return {'movie_name': movie_name,
+            'director': '',
+            'year': 0,
+            'rating': 0.0,
+            'poster': '',
+            'website': ''
+            }
@@ -0,0 +1,92 @@
+"""
+Local stub of the OMDb API for testing imports
+without network access or API quota:
+
+    python omdb_stub_server.py --port 8765 --delay 0.05
+    OMDB_BASE_URL=http://127.0.0.1:8765/ flask --app app import-movies titles.csv
+
+Answers /?apikey=...&t=<title> with a made up movie,
+or with OMDb's "Movie not found!" response
+for titles starting with "Unknown"
+"""
+import argparse
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def stub_movie(title: str) -> dict:
+    """
+    Return a deterministic OMDb response for title
+    :param title: str
+    :return:
+        OMDb response (dict)
+    """
+    if title.lower().startswith('unknown'):
+        return {'Response': 'False', 'Error': 'Movie not found!'}
+
+    digest = int(hashlib.sha1(title.encode('utf-8')).hexdigest(), 16)
+    return {'Title': title,
+            'Year': str(1950 + digest % 75),
+            'Director': f'Director {digest % 1000}',
+            'imdbRating': str(round(1 + digest % 90 / 10, 1)),
+            'Poster': f'https://example.com/posters/{digest % 100000}.jpg',
+            'imdbID': f'tt{digest % 10000000:07d}',
+            'Response': 'True'}
+
+
+class OMDbStubHandler(BaseHTTPRequestHandler):
+    """
+    Request handler answering like the OMDb title search
+    """
+    delay = 0.0
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Answer a title lookup
+        """
+        query = parse_qs(urlparse(self.path).query)
+        titles = query.get('t')
+        if not titles:
+            body = {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+        else:
+            body = stub_movie(titles[0])
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Keep the console quiet
+        """
+
+
+def main():
+    """
+    Run the stub server
+    """
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='seconds to wait before each response')
+    args = parser.parse_args()
+
+    OMDbStubHandler.delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), OMDbStubHandler)
+    print(f'OMDb stub listening on http://{args.host}:{args.port}/')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Listing query string arguments
+shared by the HTML and API routes:
+limit, cursor, sort, order,
+the movie filters
+min_year, max_year, min_rating, director
+and the movies search q, limit
+"""
+from data_manager.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+
+DEFAULT_SEARCH_LIMIT = 20
+
+MOVIES_SORT_FIELDS = ('id', 'movie_name', 'year', 'rating')
+USERS_SORT_FIELDS = ('id', 'user_name')
+REVIEWS_SORT_FIELDS = ('id', 'rating')
+TOP_MOVIES_FIELDS = ('user_rating', 'review_count', 'rating')
+DEFAULT_TOP_LIMIT = 10
+DEFAULT_RECOMMENDATIONS_LIMIT = 10
+
+
+def isnumber(text: str) -> bool:
+    """
+    Check if the given text is a whole number
+    written with the ASCII digits 0-9 only,
+    str.isdecimal() alone accepts other scripts' digits
+    :param text: str
+    :return:
+        True or False (bool)
+    """
+    return text.isascii() and text.isdecimal()
+
+
+def get_limit_errors(limit: str) -> list:
+    """
+    Validates a limit argument
+    :param limit: str
+    :return:
+        error messages (list), empty for a valid limit
+    """
+    if not isnumber(limit) or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        return [f'Limit must be a number between 1 - {MAX_PAGE_SIZE}']
+    return []
+
+
+def get_page_args(args, sort_fields: tuple) -> dict | list:
+    """
+    Validates the pagination arguments
+    of a listing request
+    :param args: request args (MultiDict)
+    :param sort_fields: allowed sort fields (tuple)
+    :return:
+        page arguments (dict) |
+        error messages (list)
+    """
+    error_messages = []
+
+    limit = args.get('limit', str(DEFAULT_PAGE_SIZE))
+    error_messages += get_limit_errors(limit)
+
+    sort_by = args.get('sort', 'id')
+    if sort_by not in sort_fields:
+        error_messages.append(f'Sort must be one of: {", ".join(sort_fields)}')
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        error_messages.append('Order must be asc or desc')
+
+    cursor = args.get('cursor') or None
+    if cursor and not error_messages \
+            and decode_cursor(cursor, sort_by, order == 'desc') is None:
+        error_messages.append('Invalid cursor')
+
+    if error_messages:
+        return error_messages
+
+    return {'limit': int(limit),
+            'cursor': cursor,
+            'sort_by': sort_by,
+            'descending': order == 'desc'}
+
+
+def get_search_args(args) -> dict | list:
+    """
+    Validates the arguments of a movies search request
+    :param args: request args (MultiDict)
+    :return:
+        search arguments (dict) |
+        error messages (list)
+    """
+    error_messages = []
+
+    search_text = args.get('q', '')
+    if len(search_text.strip()) == 0:
+        error_messages.append('Search text cannot be empty')
+
+    limit = args.get('limit', str(DEFAULT_SEARCH_LIMIT))
+    error_messages += get_limit_errors(limit)
+
+    if error_messages:
+        return error_messages
+
+    return {'search_text': search_text, 'limit': int(limit)}
+
+
+def get_top_movies_args(args) -> dict | list:
+    """
+    Validates the arguments of a top movies request
+    :param args: request args (MultiDict)
+    :return:
+        top movies arguments (dict) |
+        error messages (list)
+    """
+    error_messages = []
+
+    by = args.get('by', 'user_rating')
+    if by not in TOP_MOVIES_FIELDS:
+        error_messages.append(f'By must be one of: {", ".join(TOP_MOVIES_FIELDS)}')
+
+    limit = args.get('limit', str(DEFAULT_TOP_LIMIT))
+    error_messages += get_limit_errors(limit)
+
+    min_reviews = args.get('min_reviews', '0')
+    if not isnumber(min_reviews):
+        error_messages.append('Min reviews must be a number')
+
+    if error_messages:
+        return error_messages
+
+    return {'by': by, 'limit': int(limit), 'min_reviews': int(min_reviews)}
+
+
+def get_recommendations_args(args) -> dict | list:
+    """
+    Validates the arguments of a recommendations request
+    :param args: request args (MultiDict)
+    :return:
+        recommendations arguments (dict) |
+        error messages (list)
+    """
+    limit = args.get('limit', str(DEFAULT_RECOMMENDATIONS_LIMIT))
+    error_messages = get_limit_errors(limit)
+    if error_messages:
+        return error_messages
+
+    return {'limit': int(limit)}
+
+
+def get_movie_filters(args) -> tuple:
+    """
+    Validates the movie filters arguments
+    :param args: request args (MultiDict)
+    :return:
+        (filters (list of (key, operator, value) tuples),
+         error messages (list)) (tuple)
+    """
+    filters = []
+    error_messages = []
+
+    for arg, operator_name in (('min_year', '>='), ('max_year', '<=')):
+        year = args.get(arg, '')
+        if len(year) == 0:
+            continue
+        if not isnumber(year) or len(year) != 4:
+            error_messages.append('Year must be 4 digits')
+        else:
+            filters.append(('year', operator_name, int(year)))
+
+    min_rating = args.get('min_rating', '')
+    if len(min_rating) != 0:
+        try:
+            filters.append(('rating', '>=', float(min_rating)))
+        except ValueError:
+            error_messages.append('Rating must be a number')
+
+    director = args.get('director', '')
+    if len(director) != 0:
+        filters.append(('director', '==', director))
+
+    return filters, error_messages
+
+
+def get_movies_page_args(args) -> dict | list:
+    """
+    Validates pagination and filters arguments
+    of a movies listing request
+    :param args: request args (MultiDict)
+    :return:
+        page arguments with filters (dict) |
+        error messages (list)
+    """
+    page_args = get_page_args(args, MOVIES_SORT_FIELDS)
+    filters, error_messages = get_movie_filters(args)
+
+    if isinstance(page_args, list):
+        return page_args + error_messages
+    if error_messages:
+        return error_messages
+
+    page_args['filters'] = filters
+    return page_args
@@ -7,21 +7,35 @@ routes
 """
 from flask import Blueprint, render_template, request, redirect, url_for, abort, g
 
+from http_cache import conditional_get
+from request_args import get_page_args, USERS_SORT_FIELDS, MOVIES_SORT_FIELDS
+
 users_bp = Blueprint('users', __name__)
 
 
 @users_bp.route('/users', methods=['GET'])
+@conditional_get('users', cache_page=True)
 def list_users():
     """
-    Get a list of all users
+    Get a page of users
     :return:
-        - Response object containing a list of users
+        - Response object containing a page of users
         - Bad request error message
     """
-    users = g.users_data_manager.get_all_users()
-    if users is None:
+    page_args = get_page_args(request.args, USERS_SORT_FIELDS)
+    if isinstance(page_args, list):
+        abort(400, page_args)
+
+    users_page = g.users_data_manager.get_users_page(**page_args)
+    if users_page is None:
         abort(404)
-    return render_template('users.html', users=users)
+
+    users, next_cursor = users_page
+    next_page_url = None
+    if next_cursor:
+        next_page_url = url_for('users.list_users',
+                                **{**request.args.to_dict(), 'cursor': next_cursor})
+    return render_template('users.html', users=users, next_page_url=next_page_url)
 
 
 @users_bp.route('/users/<int:user_id>', methods=['GET'])
@@ -32,25 +46,35 @@ def get_user_movies(user_id: int):
         user_id: int
     :return:
         Render to user_movies.html
-            with user info and
+            with user info,
             movies that are not favourited
+            and recommendations
         User not found error message
     """
     user = g.users_data_manager.get_user(user_id)
+    if user is None:
+        abort(404)
 
-    movies = g.movies_data_manager.get_movies()
-    un_favourite_movies = []
+    page_args = get_page_args(request.args, MOVIES_SORT_FIELDS)
+    if isinstance(page_args, list):
+        abort(400, page_args)
 
-    for movie in movies:
-        if movie['id'] not in \
-                [user_movie['id'] for user_movie in user['movies']]:
-            un_favourite_movies.append(movie)
+    un_favourite_movies, next_cursor = g.movies_data_manager. \
+        get_unfavourited_movies_page(user_id, **page_args) or ([], None)
+    next_page_url = None
+    if next_cursor:
+        next_page_url = url_for('users.get_user_movies', user_id=user_id,
+                                **{**request.args.to_dict(), 'cursor': next_cursor})
 
-    if user is None:
-        abort(404)
+    favourite_ids = [movie['id'] for movie in user['movies']]
     return render_template('user_movies.html',
                            user=user,
-                           movies=un_favourite_movies)
+                           movies=un_favourite_movies,
+                           next_page_url=next_page_url,
+                           recommended_movies=g.recommendations.
+                           get_user_recommendations(user_id, 10) or [],
+                           similar_movies=g.recommendations.
+                           get_similar_movies(favourite_ids, 3) or {})
 
 
 def validate_user_input(user_info: dict) -> list:
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for a multi-process server, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The workers share the table versions through the database
+(config.WSGIConfig), and the caches through CACHE_PATH
+with CACHE_BACKEND=sqlite.
+"""
+from app import create_app
+from config import WSGIConfig
+
+app = create_app(WSGIConfig)